@@ -0,0 +1,138 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import JSONResponse, PlainTextResponse
+from app.core.config import settings
+from app.core.logging import logger
+from app.core.memory import memory_tracker
+from app.core.profiler import (
+    Profile,
+    ProfilerBusyError,
+    profile_worker,
+    stored_profiles,
+)
+from app.core.request_context import run_in_executor
+from app.utils.admin_auth import require_admin
+
+admin_router = APIRouter(dependencies=[Depends(require_admin)])
+
+
+def _profile_response(profile: Profile, output_format: str):
+    if output_format == "speedscope":
+        return JSONResponse(profile.speedscope())
+    return PlainTextResponse(
+        profile.collapsed(),
+        headers={
+            "X-Profile-Samples": str(profile.sample_count),
+            "X-Profile-Duration": f"{profile.duration:.3f}",
+        },
+    )
+
+
+@admin_router.get("/profile", include_in_schema=False)
+async def profile_running_worker(
+    seconds: float = Query(10.0, gt=0),
+    output_format: str = Query("collapsed", alias="format"),
+):
+    """
+    Sample every thread of this worker for `seconds` and return collapsed
+    stacks (default) or speedscope JSON (`format=speedscope`)
+    """
+    if output_format not in ("collapsed", "speedscope"):
+        raise HTTPException(
+            status_code=400, detail="format must be collapsed or speedscope"
+        )
+
+    seconds = min(seconds, settings.PROFILE_MAX_SECONDS)
+    try:
+        profile = await profile_worker(seconds)
+    except ProfilerBusyError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+    logger.info("Worker profiled for %.1fs: %d samples", seconds, profile.sample_count)
+    return _profile_response(profile, output_format)
+
+
+@admin_router.get("/profiles", include_in_schema=False)
+async def list_request_profiles():
+    """Request profiles kept in this worker, oldest first"""
+    return {
+        "profiles": [
+            {
+                "id": profile_id,
+                "name": profile.name,
+                "duration": round(profile.duration, 3),
+                "samples": profile.sample_count,
+            }
+            for profile_id, profile in stored_profiles.items()
+        ]
+    }
+
+
+@admin_router.get("/profiles/{profile_id}", include_in_schema=False)
+async def get_request_profile(
+    profile_id: str, output_format: str = Query("collapsed", alias="format")
+):
+    profile = stored_profiles.get(profile_id)
+    if profile is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return _profile_response(profile, output_format)
+
+
+@admin_router.get("/memory", include_in_schema=False)
+async def memory_status():
+    """tracemalloc state, traced and resident memory, stored snapshot ids"""
+    return memory_tracker.status()
+
+
+@admin_router.post("/memory/tracing", include_in_schema=False)
+async def start_memory_tracing(frames: int = Query(10, ge=1, le=64)):
+    memory_tracker.start(frames)
+    logger.info("tracemalloc started with %d frames", frames)
+    return memory_tracker.status()
+
+
+@admin_router.delete("/memory/tracing", include_in_schema=False)
+async def stop_memory_tracing():
+    memory_tracker.stop()
+    logger.info("tracemalloc stopped")
+    return memory_tracker.status()
+
+
+@admin_router.post("/memory/snapshots", include_in_schema=False)
+async def take_memory_snapshot(
+    key_type: str = Query("lineno", pattern="^(lineno|filename|traceback)$"),
+    limit: int = Query(25, ge=1, le=500),
+):
+    """Snapshot traced allocations and return the largest entries"""
+    if not memory_tracker.tracing:
+        raise HTTPException(status_code=409, detail="tracemalloc is not tracing")
+
+    # Snapshotting walks every traced block; keep it off the loop
+    snapshot_id = await run_in_executor(memory_tracker.take_snapshot)
+    top = await run_in_executor(memory_tracker.top, snapshot_id, key_type, limit)
+    return {"snapshot_id": snapshot_id, "top": top}
+
+
+@admin_router.get("/memory/snapshots/{snapshot_id}", include_in_schema=False)
+async def get_memory_snapshot(
+    snapshot_id: str,
+    key_type: str = Query("lineno", pattern="^(lineno|filename|traceback)$"),
+    limit: int = Query(25, ge=1, le=500),
+):
+    top = await run_in_executor(memory_tracker.top, snapshot_id, key_type, limit)
+    if top is None:
+        raise HTTPException(status_code=404, detail="Snapshot not found")
+    return {"snapshot_id": snapshot_id, "top": top}
+
+
+@admin_router.get("/memory/diff", include_in_schema=False)
+async def diff_memory_snapshots(
+    old: str,
+    new: str,
+    key_type: str = Query("lineno", pattern="^(lineno|filename|traceback)$"),
+    limit: int = Query(25, ge=1, le=500),
+):
+    """Allocation growth from snapshot `old` to snapshot `new`, largest first"""
+    diff = await run_in_executor(memory_tracker.diff, old, new, key_type, limit)
+    if diff is None:
+        raise HTTPException(status_code=404, detail="Snapshot not found")
+    return {"old": old, "new": new, "diff": diff}
@@ -2,7 +2,9 @@ from fastapi import APIRouter
 from app.core.errors import APIError
 from app.models.auth_models import AuthRequest, AuthResponse
 from app.utils.firestore import firestore_client
+from app.core.etag import RESOURCE_PROFILE, resource_versions
 from app.core.logging import logger
+from app.core.metrics import track_dependency
 from datetime import timezone, datetime
 from google.cloud.firestore import FieldFilter
 
@@ -17,7 +19,8 @@ async def create_or_get_account(account_data: AuthRequest):
         query = profiles_ref.where(
             filter=FieldFilter("user_id", "==", account_data.google_id)
         ).limit(1)
-        existing_profiles = list(query.stream())
+        with track_dependency("firestore", "profiles.query"):
+            existing_profiles = list(query.stream())
         current_time = datetime.now(timezone.utc)
 
         if existing_profiles:
@@ -41,7 +44,9 @@ async def create_or_get_account(account_data: AuthRequest):
             }
 
             try:
-                profiles_ref.add(new_profile_data)
+                with track_dependency("firestore", "profiles.add"):
+                    profiles_ref.add(new_profile_data)
+                await resource_versions.bump(RESOURCE_PROFILE, account_data.google_id)
             except Exception as e:
                 raise APIError(
                     status_code=500,
@@ -1,13 +1,30 @@
-from fastapi import APIRouter, HTTPException, Request
+from fastapi import APIRouter, HTTPException, Request, Response
 from typing import List, Dict, Any
 from pydantic import BaseModel
 from app.utils.extract_user_id import get_user_id
 from app.utils.firestore import firestore_client
 from datetime import datetime
+from app.core.etag import (
+    CACHE_PRIVATE_REVALIDATE,
+    CACHE_PUBLIC_REVALIDATE,
+    RESOURCE_USER_BINS,
+    etag_matches,
+    make_etag,
+    not_modified,
+    resource_versions,
+    set_validators,
+)
 from app.core.logging import logger
+from app.core.metrics import track_dependency
+from app.core.request_context import run_in_executor
+from app.services.bins_catalog import bins_catalog
+from app.utils.single_flight import SingleFlight
 
 bin_router = APIRouter()
 
+# Concurrent reads of one user's bin list share one Firestore get
+_user_bins_reads = SingleFlight("user_bins")
+
 
 class UpdateBinListRequest(BaseModel):
     bin_ids: List[str]
@@ -42,26 +59,25 @@ def convert_flutter_color_to_hex(flutter_color: str) -> str:
 
 
 @bin_router.get("/available", response_model=Dict[str, List[AvailableBin]])
-async def get_all_available_bins():
+async def get_all_available_bins(request: Request, response: Response):
     """
     Endpoint 1: Get all available bin types from Firestore
     Uses Firestore document ID as the bin ID - much simpler!
     """
     try:
 
-        # Get all documents from 'bins' collection
-        bins_collection = firestore_client.collection("bins")
-        docs = bins_collection.get()
+        # The bins catalog is cached in memory and refreshed on a TTL
+        bins = await bins_catalog.get_bins()
+
+        etag = make_etag("bins", bins_catalog.version)
+        if etag_matches(request, etag):
+            return not_modified(etag, CACHE_PUBLIC_REVALIDATE)
+        set_validators(response, etag, CACHE_PUBLIC_REVALIDATE)
 
         available_bins = []
 
-        for doc in docs:
+        for bin_id, bin_data in bins.items():
             try:
-                bin_data = doc.to_dict()
-
-                # Use Firestore document ID as bin ID
-                bin_id = doc.id
-
                 # Skip if document has no data
                 if bin_data is None:
                     logger.warning(f"Bin document {bin_id} has no data")
@@ -92,11 +108,13 @@ async def get_all_available_bins():
                 )
 
                 available_bins.append(available_bin)
-                logger.debug(f"Successfully added bin: {bin_id} - {available_bin.name}")
+                logger.debug(
+                    "Successfully added bin: %s - %s", bin_id, available_bin.name
+                )
 
             except Exception as doc_error:
                 logger.error(
-                    f"Error processing bin document {doc.id}: {str(doc_error)}"
+                    f"Error processing bin document {bin_id}: {str(doc_error)}"
                 )
                 continue
 
@@ -115,8 +133,13 @@ async def get_all_available_bins():
         )
 
 
+def _get_user_bins(doc_ref):
+    with track_dependency("firestore", "available_bins.get"):
+        return doc_ref.get()
+
+
 @bin_router.get("/user-bins", response_model=Dict[str, List[str]])
-async def get_bins_user_has_access_to(request: Request):
+async def get_bins_user_has_access_to(request: Request, response: Response):
     """
     Endpoint 2: Get bins that user has access to
     Returns list of Firestore document IDs that the user has selected
@@ -124,9 +147,23 @@ async def get_bins_user_has_access_to(request: Request):
     try:
         user_id = get_user_id(request)
 
+        # The answer also depends on which bins still exist
+        version = await resource_versions.current(RESOURCE_USER_BINS, user_id)
+        await bins_catalog.get_bins()
+        etag = (
+            make_etag(RESOURCE_USER_BINS, user_id, version, bins_catalog.version)
+            if version
+            else None
+        )
+        if etag_matches(request, etag):
+            return not_modified(etag, CACHE_PRIVATE_REVALIDATE)
+        set_validators(response, etag, CACHE_PRIVATE_REVALIDATE)
+
         # Get user's bin document from Firestore
         doc_ref = firestore_client.collection("available-bins").document(user_id)
-        doc = doc_ref.get()
+        doc = await _user_bins_reads.do(
+            f"{user_id}|{version}", lambda: run_in_executor(_get_user_bins, doc_ref)
+        )
 
         if not doc.exists:
             return {"accessible_bin_ids": []}
@@ -201,6 +238,7 @@ async def allow_user_update_their_bin_list(
             # Create new document with created_at timestamp
             doc_data["created_at"] = datetime.now().isoformat()
             doc_ref.set(doc_data)
+        await resource_versions.bump(RESOURCE_USER_BINS, user_id)
 
         return {
             "success": True,
@@ -220,25 +258,20 @@ async def allow_user_update_their_bin_list(
 
 async def _validate_bin_document_ids(bin_ids: List[str]) -> List[str]:
     """
-    Helper function to validate bin IDs as existing Firestore document IDs
-    Much simpler - just check if documents exist!
+    Helper function to validate bin IDs as existing Firestore document IDs,
+    checked against the cached bins catalog
     """
     try:
         if not bin_ids:
             return []
 
-        bins_collection = firestore_client.collection("bins")
-        validated_bins = []
-
-        for bin_id in bin_ids:
-            # Check if document exists
-            doc_ref = bins_collection.document(bin_id)
-            if doc_ref.get().exists:
-                validated_bins.append(bin_id)
-            else:
-                logger.warning(f"Bin document '{bin_id}' does not exist")
+        validated_bins = await bins_catalog.existing_ids(bin_ids)
+        for bin_id in set(bin_ids) - set(validated_bins):
+            logger.warning(f"Bin document '{bin_id}' does not exist")
 
-        logger.debug(f"Validated {len(validated_bins)} out of {len(bin_ids)} bin IDs")
+        logger.debug(
+            "Validated %d out of %d bin IDs", len(validated_bins), len(bin_ids)
+        )
         return validated_bins
 
     except Exception as e:
@@ -1,16 +1,19 @@
 from fastapi import APIRouter, HTTPException, Request, Query
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional, Tuple
 from pydantic import BaseModel, field_validator
 from app.utils.extract_user_id import get_user_id
 from app.utils.firestore import firestore_client
 from app.core.config import settings
-from app.core.logging import logger
+from app.core.logging import NOT_RATE_LIMITED, logger
+from app.core.request_context import run_in_executor
+from app.core.metrics import track_dependency
+from app.core.cache import Cache
 from google.cloud.firestore import FieldFilter
 from datetime import datetime, timezone
-import asyncio
-from concurrent.futures import ThreadPoolExecutor
 import traceback
 from app.utils.storage import storage_client
+from app.services.account_deletion import account_deletion_service
+from app.services.history_cache import history_cache
 
 
 danger_router = APIRouter()
@@ -28,23 +31,43 @@ class UserDeletionRequest(BaseModel):
         return v
 
 
-class UserDeletionResponse(BaseModel):
+class DeletionJobResponse(BaseModel):
     success: bool
     message: str
-    deleted_items: Dict[str, Any]
-    errors: List[str]
+    job_id: str
+    status: str
+    status_url: str
+    current_phase: Optional[str] = None
+    completed_phases: List[str] = []
+    deleted_items: Dict[str, int] = {}
+    errors: List[str] = []
     timestamp: str
 
 
-class UserDeletionSummary(BaseModel):
-    firestore_deletions: Dict[str, int]
-    storage_deletions: Dict[str, int]
-    total_files_deleted: int
-    total_documents_deleted: int
-    errors_encountered: List[str]
-
-
-@danger_router.delete("/user/delete-all-data", response_model=UserDeletionResponse)
+def _job_response(job_data: Dict[str, Any], message: str) -> DeletionJobResponse:
+    job_id = job_data["job_id"]
+    updated_at = job_data.get("updated_at")
+    return DeletionJobResponse(
+        success=job_data.get("status") != "failed",
+        message=message,
+        job_id=job_id,
+        status=job_data.get("status", "pending"),
+        status_url=f"{settings.APP_API_PREFIX}/danger/user/deletion-jobs/{job_id}",
+        current_phase=job_data.get("current_phase"),
+        completed_phases=job_data.get("completed_phases", []),
+        deleted_items=job_data.get("deleted", {}),
+        errors=job_data.get("errors", []),
+        timestamp=(
+            updated_at.isoformat()
+            if isinstance(updated_at, datetime)
+            else datetime.now(timezone.utc).isoformat()
+        ),
+    )
+
+
+@danger_router.delete(
+    "/user/delete-all-data", response_model=DeletionJobResponse, status_code=202
+)
 async def DELETE_user_data(
     deletion_request: UserDeletionRequest,
     request: Request,
@@ -61,78 +84,48 @@ async def DELETE_user_data(
     - All Firestore documents (profiles, disposal-history, available-bins)
     - All Cloud Storage files (disposal-images/{user_id}/, profile-images/{user_id}/)
 
+    The deletion runs as a background job; the response carries the job id
+    and the URL to poll for progress. Jobs interrupted by a restart are
+    resumed automatically.
+
     ⚠️  THIS OPERATION CANNOT BE UNDONE ⚠️
 
     Required confirmation: "DELETE"
     """
     try:
         user_id = get_user_id(request)
-        deletion_timestamp = datetime.now(timezone.utc).isoformat()
 
         logger.critical(
             f"🚨 DANGER: User deletion request initiated for user: {user_id}"
         )
-        logger.critical(f"🚨 Confirmation: {deletion_request.confirmation_text}")
         logger.critical(f"🚨 Email verification: {deletion_request.user_email}")
         logger.critical(f"🚨 Force delete: {force_delete}")
-        logger.critical(f"🚨 Timestamp: {deletion_timestamp}")
 
-        # Initialize tracking variables
-        deleted_items = {"firestore": {}, "cloud_storage": {}, "summary": {}}
-        errors = []
+        # A second request while a job is running returns the running job
+        active_job = await run_in_executor(
+            account_deletion_service.get_active_job, user_id
+        )
+        if active_job:
+            return _job_response(active_job, "Deletion already in progress")
 
-        # Step 1: Verify user exists in profiles
+        # Verify user exists in profiles
         await _verify_user_exists(user_id, deletion_request.user_email)
 
-        # Step 2: Delete Firestore documents
-        logger.warning(f"Starting Firestore deletion for user: {user_id}")
-        firestore_results = await _delete_firestore_data(user_id, force_delete)
-        deleted_items["firestore"] = firestore_results["deleted"]
-        errors.extend(firestore_results["errors"])
-
-        # Step 3: Delete Cloud Storage files
-        logger.warning(f"Starting Cloud Storage deletion for user: {user_id}")
-        storage_results = await _delete_cloud_storage_data(user_id, force_delete)
-        deleted_items["cloud_storage"] = storage_results["deleted"]
-        errors.extend(storage_results["errors"])
-
-        # Step 4: Calculate summary
-        total_docs = sum(deleted_items["firestore"].values())
-        total_files = sum(deleted_items["cloud_storage"].values())
-
-        deleted_items["summary"] = {
-            "total_documents_deleted": total_docs,
-            "total_files_deleted": total_files,
-            "deletion_timestamp": deletion_timestamp,
-            "user_id": user_id,
-            "force_delete_used": force_delete,
-        }
+        # Atomic per user: of two concurrent requests only one creates a job
+        job_data, created = await run_in_executor(
+            account_deletion_service.create_job, user_id, force_delete
+        )
+        if not created:
+            return _job_response(job_data, "Deletion already in progress")
+
+        await _preview_cache.delete(user_id)
+        await history_cache.invalidate(user_id)
+        account_deletion_service.start(job_data)
 
-        # Final logging
-        logger.critical(f"🚨 DELETION COMPLETED for user: {user_id}")
-        logger.critical(f"🚨 Documents deleted: {total_docs}")
-        logger.critical(f"🚨 Files deleted: {total_files}")
-        logger.critical(f"🚨 Errors encountered: {len(errors)}")
-
-        # Determine success status
-        has_critical_errors = len(errors) > 0 and not force_delete
-        success = not has_critical_errors
-
-        if not success:
-            logger.error(f"User deletion failed for {user_id} due to errors: {errors}")
-
-        return UserDeletionResponse(
-            success=success,
-            message=(
-                f"✅ User data deletion completed successfully. "
-                f"Deleted {total_docs} documents and {total_files} files."
-                if success
-                else f"❌ User data deletion completed with errors. "
-                f"Use force_delete=true to ignore errors."
-            ),
-            deleted_items=deleted_items,
-            errors=errors,
-            timestamp=deletion_timestamp,
+        logger.critical(f"🚨 Deletion job {job_data['job_id']} started for {user_id}")
+
+        return _job_response(
+            job_data, "User data deletion started. Poll status_url for progress."
         )
 
     except HTTPException:
@@ -147,16 +140,49 @@ async def DELETE_user_data(
         )
 
 
-async def _verify_user_exists(user_id: str, provided_email: str) -> None:
-    """Verify user exists and email matches for additional security"""
+@danger_router.get("/user/deletion-jobs/{job_id}", response_model=DeletionJobResponse)
+async def get_deletion_job(request: Request, job_id: str):
+    """
+    Progress of a deletion job started by DELETE /user/delete-all-data
+    """
     try:
+        user_id = get_user_id(request)
+
+        job_data = await run_in_executor(account_deletion_service.get_job, job_id)
+        if not job_data or job_data.get("user_id") != user_id:
+            raise HTTPException(status_code=404, detail="Deletion job not found")
 
-        profiles_ref = firestore_client.collection("profiles")
-        query = profiles_ref.where(filter=FieldFilter("user_id", "==", user_id)).limit(
-            1
+        status = job_data.get("status", "pending")
+        messages = {
+            "pending": "Deletion is queued",
+            "running": f"Deleting {job_data.get('current_phase') or 'data'}",
+            "completed": "✅ User data deletion completed successfully.",
+            "failed": "❌ User data deletion failed. Use force_delete=true to ignore errors.",
+        }
+        return _job_response(job_data, messages.get(status, status))
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error getting deletion job {job_id}: {e}")
+        raise HTTPException(
+            status_code=500, detail=f"Failed to get deletion job: {str(e)}"
         )
 
-        docs = list(query.stream())
+
+def _find_profile(user_id: str) -> list:
+    """Blocking: the user's profile document, as a list of at most one"""
+    profiles_ref = firestore_client.collection("profiles")
+    query = profiles_ref.where(filter=FieldFilter("user_id", "==", user_id)).limit(1)
+    with track_dependency("firestore", "profiles.query"):
+        return list(query.stream())
+
+
+async def _verify_user_exists(user_id: str, provided_email: str) -> None:
+    """Verify user exists and email matches for additional security"""
+    try:
+
+        docs = await run_in_executor(_find_profile, user_id)
 
         if not docs:
             logger.warning(f"User not found in profiles: {user_id}")
@@ -178,7 +204,8 @@ async def _verify_user_exists(user_id: str, provided_email: str) -> None:
         if stored_email != provided_email_lower:
             logger.warning(
                 f"Email mismatch for user {user_id}: "
-                f"stored='{stored_email}' vs provided='{provided_email_lower}'"
+                f"stored='{stored_email}' vs provided='{provided_email_lower}'",
+                extra=NOT_RATE_LIMITED,
             )
             raise HTTPException(
                 status_code=403,
@@ -192,150 +219,92 @@ async def _verify_user_exists(user_id: str, provided_email: str) -> None:
         raise HTTPException(status_code=500, detail=f"Failed to verify user: {str(e)}")
 
 
-async def _delete_firestore_data(user_id: str, force_delete: bool) -> Dict[str, Any]:
-    """Delete all Firestore documents for the user"""
-    deleted_counts = {"profiles": 0, "disposal_history": 0, "available_bins": 0}
-    errors = []
-
-    try:
-        # Delete from profiles collection
-        try:
-            profiles_ref = firestore_client.collection("profiles")
-            query = profiles_ref.where(filter=FieldFilter("user_id", "==", user_id))
-
-            docs = list(query.stream())
-            for doc in docs:
-                doc.reference.delete()
-                deleted_counts["profiles"] += 1
-
-        except Exception as e:
-            error_msg = f"Error deleting profiles: {str(e)}"
-            logger.error(error_msg)
-            errors.append(error_msg)
-            if not force_delete:
-                raise
-
-        # Delete from disposal-history collection
-        try:
-            disposal_ref = firestore_client.collection("disposal-history")
-            query = disposal_ref.where(filter=FieldFilter("user_id", "==", user_id))
-
-            docs = list(query.stream())
-            for doc in docs:
-                doc.reference.delete()
-                deleted_counts["disposal_history"] += 1
+# Previews are cheap now but the screen re-requests them on every open
+PREVIEW_CACHE_TTL_SECONDS = 30
+# Blob listings stop counting here; the preview reports "at least" the cap
+PREVIEW_BLOB_COUNT_CAP = 1000
 
-        except Exception as e:
-            error_msg = f"Error deleting disposal history: {str(e)}"
-            logger.error(error_msg)
-            errors.append(error_msg)
-            if not force_delete:
-                raise
+_preview_cache = Cache("deletion_preview", ttl=PREVIEW_CACHE_TTL_SECONDS)
 
-        # Delete from available-bins collection
-        try:
-            bins_ref = firestore_client.collection("available-bins")
-            user_bins_doc = bins_ref.document(user_id)
 
-            if user_bins_doc.get().exists:
-                user_bins_doc.delete()
-                deleted_counts["available_bins"] += 1
+def _count_query(query) -> int:
+    """Server-side count() aggregation - one read per 1000 matches, no documents"""
+    result = query.count(alias="count").get()
+    return int(result[0][0].value)
 
-        except Exception as e:
-            error_msg = f"Error deleting available bins: {str(e)}"
-            logger.error(error_msg)
-            errors.append(error_msg)
-            if not force_delete:
-                raise
 
-    except Exception as e:
-        if not force_delete:
-            raise
-        errors.append(f"Critical Firestore error: {str(e)}")
+def _count_blobs(bucket, prefix: str, cap: int) -> Tuple[int, bool]:
+    """Count blobs page by page without materializing them; returns (count, capped)"""
+    blobs = bucket.list_blobs(
+        prefix=prefix, max_results=cap, fields="items(name),nextPageToken"
+    )
+    count = 0
+    for page in blobs.pages:
+        count += page.num_items
+    return count, count >= cap
 
-    return {"deleted": deleted_counts, "errors": errors}
-
-
-async def _delete_cloud_storage_data(
-    user_id: str, force_delete: bool
-) -> Dict[str, Any]:
-    """Delete all Cloud Storage files for the user"""
-    if not storage_client:
-        error_msg = "Cloud Storage client not initialized"
-        logger.error(error_msg)
-        return {
-            "deleted": {"disposal_images": 0, "profile_images": 0},
-            "errors": [error_msg] if not force_delete else [],
-        }
 
-    deleted_counts = {"disposal_images": 0, "profile_images": 0}
-    errors = []
+def _compute_deletion_preview(user_id: str) -> Dict[str, Any]:
+    preview_data: Dict[str, Any] = {
+        "user_id": user_id,
+        "firestore_collections": {},
+        "cloud_storage_folders": {},
+        "estimated_total_items": 0,
+        "storage_count_capped": False,
+    }
 
+    # Count Firestore documents
     try:
-        bucket = storage_client.bucket(settings.GCS_BUCKET_NAME)
-
-        # Delete disposal images
-        try:
-            disposal_prefix = f"disposal-images/{user_id}/"
-            disposal_count = await _delete_storage_folder(bucket, disposal_prefix)
-            deleted_counts["disposal_images"] = disposal_count
-
-        except Exception as e:
-            error_msg = f"Error deleting disposal images: {str(e)}"
-            logger.error(error_msg)
-            errors.append(error_msg)
-            if not force_delete:
-                raise
+        profiles_query = firestore_client.collection("profiles").where(
+            filter=FieldFilter("user_id", "==", user_id)
+        )
+        preview_data["firestore_collections"]["profiles"] = _count_query(profiles_query)
 
-        # Delete profile images
-        try:
-            profile_prefix = f"profile-images/{user_id}/"
-            profile_count = await _delete_storage_folder(bucket, profile_prefix)
-            deleted_counts["profile_images"] = profile_count
+        disposal_query = firestore_client.collection("disposal-history").where(
+            filter=FieldFilter("user_id", "==", user_id)
+        )
+        preview_data["firestore_collections"]["disposal_history"] = _count_query(
+            disposal_query
+        )
 
-        except Exception as e:
-            error_msg = f"Error deleting profile images: {str(e)}"
-            logger.error(error_msg)
-            errors.append(error_msg)
-            if not force_delete:
-                raise
+        bins_doc = firestore_client.collection("available-bins").document(user_id)
+        preview_data["firestore_collections"]["available_bins"] = (
+            1 if bins_doc.get(field_paths=[]).exists else 0
+        )
 
     except Exception as e:
-        if not force_delete:
-            raise
-        errors.append(f"Critical Cloud Storage error: {str(e)}")
-
-    return {"deleted": deleted_counts, "errors": errors}
-
+        logger.warning(f"Error counting Firestore documents: {e}")
+        preview_data["firestore_collections"]["error"] = str(e)
 
-async def _delete_storage_folder(bucket, prefix: str) -> int:
-    """Delete all files in a Cloud Storage folder"""
-
-    def _delete_blobs():
-        deleted_count = 0
+    # Count Cloud Storage files
+    if storage_client:
         try:
-            blobs = list(bucket.list_blobs(prefix=prefix))
-
-            for blob in blobs:
-                try:
-                    blob.delete()
-                    deleted_count += 1
-                    logger.debug(f"Deleted blob: {blob.name}")
-                except Exception as e:
-                    logger.warning(f"Failed to delete blob {blob.name}: {e}")
+            bucket = storage_client.bucket(settings.GCS_BUCKET_NAME)
+            for folder, prefix in (
+                ("disposal_images", f"disposal-images/{user_id}/"),
+                ("profile_images", f"profile-images/{user_id}/"),
+            ):
+                count, capped = _count_blobs(bucket, prefix, PREVIEW_BLOB_COUNT_CAP)
+                preview_data["cloud_storage_folders"][folder] = count
+                if capped:
+                    preview_data["storage_count_capped"] = True
 
         except Exception as e:
-            logger.error(f"Error listing blobs with prefix {prefix}: {e}")
-            raise
+            logger.warning(f"Error counting Cloud Storage files: {e}")
+            preview_data["cloud_storage_folders"]["error"] = str(e)
+    else:
+        preview_data["cloud_storage_folders"]["error"] = "Storage client not available"
 
-        return deleted_count
+    # Calculate total
+    firestore_total = sum(
+        v for v in preview_data["firestore_collections"].values() if isinstance(v, int)
+    )
+    storage_total = sum(
+        v for v in preview_data["cloud_storage_folders"].values() if isinstance(v, int)
+    )
+    preview_data["estimated_total_items"] = firestore_total + storage_total
 
-    # Run in thread pool to avoid blocking
-    loop = asyncio.get_event_loop()
-    with ThreadPoolExecutor() as executor:
-        deleted_count = await loop.run_in_executor(executor, _delete_blobs)
-
-    return deleted_count
+    return preview_data
 
 
 @danger_router.get("/user/deletion-preview")
@@ -347,82 +316,11 @@ async def preview_user_deletion(request: Request):
     try:
         user_id = get_user_id(request)
 
-        preview_data = {
-            "user_id": user_id,
-            "firestore_collections": {},
-            "cloud_storage_folders": {},
-            "estimated_total_items": 0,
-        }
-
-        # Count Firestore documents
-        try:
-            # Count profiles
-            profiles_ref = firestore_client.collection("profiles")
-            profiles_query = profiles_ref.where(
-                filter=FieldFilter("user_id", "==", user_id)
-            )
-            profiles_count = len(list(profiles_query.stream()))
-            preview_data["firestore_collections"]["profiles"] = profiles_count
-
-            # Count disposal history
-            disposal_ref = firestore_client.collection("disposal-history")
-            disposal_query = disposal_ref.where(
-                filter=FieldFilter("user_id", "==", user_id)
-            )
-            disposal_count = len(list(disposal_query.stream()))
-            preview_data["firestore_collections"]["disposal_history"] = disposal_count
-
-            # Count available bins
-            bins_ref = firestore_client.collection("available-bins")
-            bins_doc = bins_ref.document(user_id)
-            bins_count = 1 if bins_doc.get().exists else 0
-            preview_data["firestore_collections"]["available_bins"] = bins_count
-
-        except Exception as e:
-            logger.warning(f"Error counting Firestore documents: {e}")
-            preview_data["firestore_collections"]["error"] = str(e)
-
-        # Count Cloud Storage files
-        if storage_client:
-            try:
-                bucket = storage_client.bucket(settings.GCS_BUCKET_NAME)
-
-                # Count disposal images
-                disposal_blobs = list(
-                    bucket.list_blobs(prefix=f"disposal-images/{user_id}/")
-                )
-                preview_data["cloud_storage_folders"]["disposal_images"] = len(
-                    disposal_blobs
-                )
-
-                # Count profile images
-                profile_blobs = list(
-                    bucket.list_blobs(prefix=f"profile-images/{user_id}/")
-                )
-                preview_data["cloud_storage_folders"]["profile_images"] = len(
-                    profile_blobs
-                )
-
-            except Exception as e:
-                logger.warning(f"Error counting Cloud Storage files: {e}")
-                preview_data["cloud_storage_folders"]["error"] = str(e)
-        else:
-            preview_data["cloud_storage_folders"][
-                "error"
-            ] = "Storage client not available"
-
-        # Calculate total
-        firestore_total = sum(
-            v
-            for v in preview_data["firestore_collections"].values()
-            if isinstance(v, int)
-        )
-        storage_total = sum(
-            v
-            for v in preview_data["cloud_storage_folders"].values()
-            if isinstance(v, int)
-        )
-        preview_data["estimated_total_items"] = firestore_total + storage_total
+        preview_data = await _preview_cache.get(user_id)
+        if preview_data is None:
+            with track_dependency("firestore", "deletion_preview"):
+                preview_data = await run_in_executor(_compute_deletion_preview, user_id)
+            await _preview_cache.set(user_id, preview_data)
 
         return {
             "success": True,
@@ -0,0 +1,21 @@
+from fastapi import APIRouter
+from fastapi.responses import JSONResponse
+from app.core.health import health_monitor
+
+health_router = APIRouter()
+
+
+@health_router.get("/livez", include_in_schema=False)
+async def liveness():
+    """The process is up and its event loop is serving requests"""
+    return {
+        "status": "alive",
+        "uptime_seconds": health_monitor.report()["uptime_seconds"],
+    }
+
+
+@health_router.get("/readyz", include_in_schema=False)
+async def readiness():
+    """Warm-up done and required dependencies passing, from cached probes"""
+    report = health_monitor.report()
+    return JSONResponse(report, status_code=200 if health_monitor.ready else 503)
@@ -1,15 +1,43 @@
-from fastapi import APIRouter, HTTPException, Request, Query, Path
+from fastapi import APIRouter, HTTPException, Request, Response, Query, Path
 from typing import List, Dict, Any, Optional
-from pydantic import BaseModel, validator
+from pydantic import BaseModel, Field, validator
 from app.utils.extract_user_id import get_user_id
 from app.utils.firestore import firestore_client
-from app.core.logging import logger
+from app.core.etag import (
+    CACHE_PRIVATE_REVALIDATE,
+    RESOURCE_HISTORY,
+    etag_matches,
+    make_etag,
+    not_modified,
+    resource_versions,
+    set_validators,
+)
+from app.core.logging import NOT_RATE_LIMITED, logger
+from app.core.metrics import track_dependency
+from app.core.request_context import run_in_executor
+from app.core.serialization import AppJSONResponse
+from app.services.history_cache import history_cache
+from app.utils.single_flight import SingleFlight
 from google.cloud.firestore import FieldFilter
 from datetime import datetime
 
 
 history_router = APIRouter()
 
+# Identical history queries running at the same time share one Firestore call
+_history_reads = SingleFlight("disposal_history")
+
+
+def _run_history_query(query) -> list:
+    with track_dependency("firestore", "disposal_history.query"):
+        return list(query.stream())
+
+
+async def _read_history(key: str, query) -> list:
+    return await _history_reads.do(
+        key, lambda: run_in_executor(_run_history_query, query)
+    )
+
 
 class RecommendedBin(BaseModel):
     description: str
@@ -23,6 +51,8 @@ class DisposalHistoryItem(BaseModel):
     disposal_tips: str
     environmental_note: str
     image_url: str
+    thumbnail_url: Optional[str] = None
+    preview_url: Optional[str] = None
     preparation_steps: str
     recommended_bin: Optional[RecommendedBin] = None
     saved_at: str
@@ -43,6 +73,34 @@ class DeleteResponse(BaseModel):
     deleted_item_id: str
 
 
+# One WriteBatch holds up to 500 writes; batch requests stay below that
+HISTORY_BATCH_MAX_IDS = 300
+
+
+class BatchIdsRequest(BaseModel):
+    item_ids: List[str] = Field(..., min_length=1, max_length=HISTORY_BATCH_MAX_IDS)
+
+
+class BatchItemResult(BaseModel):
+    id: str
+    status: str  # "deleted", "found", "not_found", "forbidden" or "invalid"
+
+
+class BatchDeleteResponse(BaseModel):
+    success: bool
+    message: str
+    deleted_count: int
+    results: List[BatchItemResult]
+
+
+class BatchGetResponse(BaseModel):
+    success: bool
+    message: str
+    count: int
+    history: List[DisposalHistoryItem]
+    results: List[BatchItemResult]
+
+
 class DateRangeRequest(BaseModel):
     start_date: str
     end_date: str
@@ -59,6 +117,42 @@ class DateRangeRequest(BaseModel):
             )
 
 
+def _history_item(doc_id: str, doc_data: Dict[str, Any]) -> DisposalHistoryItem:
+    """Response item for a disposal-history document, without internal fields"""
+    filtered_data = {
+        "id": doc_id,
+        "confidence": doc_data.get("confidence", 0.0),
+        "disposal_tips": doc_data.get("disposal_tips", ""),
+        "environmental_note": doc_data.get("environmental_note", ""),
+        "image_url": doc_data.get("image_url", ""),
+        "thumbnail_url": doc_data.get("thumbnail_url"),
+        "preview_url": doc_data.get("preview_url"),
+        "preparation_steps": doc_data.get("preparation_steps", ""),
+        "saved_at": doc_data.get("saved_at", ""),
+        "user_id": doc_data.get("user_id", ""),
+        "waste_class": doc_data.get("waste_class", ""),
+    }
+
+    # Handle recommended_bin object
+    recommended_bin_data = doc_data.get("recommended_bin")
+    if recommended_bin_data and isinstance(recommended_bin_data, dict):
+        try:
+            filtered_data["recommended_bin"] = RecommendedBin(
+                description=recommended_bin_data.get("description", ""),
+                id=recommended_bin_data.get("id", ""),
+                name=recommended_bin_data.get("name", ""),
+            )
+        except Exception as bin_error:
+            logger.warning(
+                f"Error processing recommended_bin for doc {doc_id}: {bin_error}"
+            )
+            filtered_data["recommended_bin"] = None
+    else:
+        filtered_data["recommended_bin"] = None
+
+    return DisposalHistoryItem(**filtered_data)
+
+
 @history_router.get("/history", response_model=DisposalHistoryResponse)
 async def get_disposal_history(
     request: Request,
@@ -74,6 +168,13 @@ async def get_disposal_history(
     try:
         user_id = get_user_id(request)
 
+        # Taken before reading, so a cached page is never older than its version
+        version = await resource_versions.current(RESOURCE_HISTORY, user_id)
+        page = f"{waste_class}|{limit}"
+        cached = history_cache.get(user_id, page, version)
+        if cached is not None:
+            return Response(content=cached, media_type="application/json")
+
         # Start building the query
         disposal_collection = firestore_client.collection("disposal-history")
 
@@ -90,7 +191,7 @@ async def get_disposal_history(
         query = query.order_by("saved_at", direction="DESCENDING").limit(limit)
 
         # Execute query
-        docs = query.stream()
+        docs = await _read_history(f"history|{user_id}|{page}|{version}", query)
 
         history = []
         for doc in docs:
@@ -101,41 +202,9 @@ async def get_disposal_history(
                     logger.warning(f"Document {doc.id} has no data")
                     continue
 
-                # Create the filtered response object excluding specified fields
-                filtered_data = {
-                    "id": doc.id,
-                    "confidence": doc_data.get("confidence", 0.0),
-                    "disposal_tips": doc_data.get("disposal_tips", ""),
-                    "environmental_note": doc_data.get("environmental_note", ""),
-                    "image_url": doc_data.get("image_url", ""),
-                    "preparation_steps": doc_data.get("preparation_steps", ""),
-                    "saved_at": doc_data.get("saved_at", ""),
-                    "user_id": doc_data.get("user_id", ""),
-                    "waste_class": doc_data.get("waste_class", ""),
-                }
-
-                # Handle recommended_bin object
-                recommended_bin_data = doc_data.get("recommended_bin")
-                if recommended_bin_data and isinstance(recommended_bin_data, dict):
-                    try:
-                        filtered_data["recommended_bin"] = RecommendedBin(
-                            description=recommended_bin_data.get("description", ""),
-                            id=recommended_bin_data.get("id", ""),
-                            name=recommended_bin_data.get("name", ""),
-                        )
-                    except Exception as bin_error:
-                        logger.warning(
-                            f"Error processing recommended_bin for doc {doc.id}: {bin_error}"
-                        )
-                        filtered_data["recommended_bin"] = None
-                else:
-                    filtered_data["recommended_bin"] = None
-
-                # Create and validate the response item
-                disposal_item = DisposalHistoryItem(**filtered_data)
-                history.append(disposal_item)
-
-                logger.debug(f"Successfully processed disposal record: {doc.id}")
+                history.append(_history_item(doc.id, doc_data))
+
+                logger.debug("Successfully processed disposal record: %s", doc.id)
 
             except Exception as doc_error:
                 logger.error(f"Error processing document {doc.id}: {str(doc_error)}")
@@ -145,9 +214,14 @@ async def get_disposal_history(
         filter_msg = f" for waste class '{waste_class}'" if waste_class else ""
         message = f"Retrieved {len(history)} disposal records{filter_msg}"
 
-        return DisposalHistoryResponse(
-            success=True, history=history, count=len(history), message=message
+        # Returned as a response so FastAPI does not re-serialize the model
+        response = AppJSONResponse(
+            DisposalHistoryResponse(
+                success=True, history=history, count=len(history), message=message
+            )
         )
+        history_cache.put(user_id, page, version, response.body)
+        return response
 
     except HTTPException:
         raise
@@ -184,7 +258,8 @@ async def delete_disposal_item(
         doc_ref = disposal_collection.document(item_id)
 
         # Check if document exists and get its data
-        doc = doc_ref.get()
+        with track_dependency("firestore", "disposal_history.get"):
+            doc = doc_ref.get()
 
         if not doc.exists:
             logger.warning(f"Disposal item {item_id} not found")
@@ -207,7 +282,8 @@ async def delete_disposal_item(
         if doc_user_id != user_id:
             logger.warning(
                 f"User {user_id} attempted to delete item {item_id} "
-                f"belonging to user {doc_user_id}"
+                f"belonging to user {doc_user_id}",
+                extra=NOT_RATE_LIMITED,
             )
             raise HTTPException(
                 status_code=403, detail="You can only delete your own disposal items"
@@ -217,7 +293,9 @@ async def delete_disposal_item(
         waste_class = doc_data.get("waste_class", "unknown")
 
         # Delete the document
-        doc_ref.delete()
+        with track_dependency("firestore", "disposal_history.delete"):
+            doc_ref.delete()
+        await history_cache.invalidate(user_id)
 
         return DeleteResponse(
             success=True,
@@ -288,6 +366,10 @@ async def get_disposal_history_by_date_range(
                 detail="Invalid date format. Use ISO format like: 2024-01-01T00:00:00Z",
             )
 
+        # Taken before the read so a query started before a write is never
+        # shared with requests that arrive after it
+        version = await resource_versions.current(RESOURCE_HISTORY, user_id)
+
         # Start building the query
         disposal_collection = firestore_client.collection("disposal-history")
 
@@ -309,7 +391,10 @@ async def get_disposal_history_by_date_range(
         query = query.order_by("saved_at", direction="DESCENDING").limit(limit)
 
         # Execute query
-        docs = query.stream()
+        docs = await _read_history(
+            f"range|{user_id}|{start_iso}|{end_iso}|{waste_class}|{limit}|{version}",
+            query,
+        )
 
         history = []
         for doc in docs:
@@ -320,41 +405,9 @@ async def get_disposal_history_by_date_range(
                     logger.warning(f"Document {doc.id} has no data")
                     continue
 
-                # Create the filtered response object
-                filtered_data = {
-                    "id": doc.id,
-                    "confidence": doc_data.get("confidence", 0.0),
-                    "disposal_tips": doc_data.get("disposal_tips", ""),
-                    "environmental_note": doc_data.get("environmental_note", ""),
-                    "image_url": doc_data.get("image_url", ""),
-                    "preparation_steps": doc_data.get("preparation_steps", ""),
-                    "saved_at": doc_data.get("saved_at", ""),
-                    "user_id": doc_data.get("user_id", ""),
-                    "waste_class": doc_data.get("waste_class", ""),
-                }
-
-                # Handle recommended_bin object
-                recommended_bin_data = doc_data.get("recommended_bin")
-                if recommended_bin_data and isinstance(recommended_bin_data, dict):
-                    try:
-                        filtered_data["recommended_bin"] = RecommendedBin(
-                            description=recommended_bin_data.get("description", ""),
-                            id=recommended_bin_data.get("id", ""),
-                            name=recommended_bin_data.get("name", ""),
-                        )
-                    except Exception as bin_error:
-                        logger.warning(
-                            f"Error processing recommended_bin for doc {doc.id}: {bin_error}"
-                        )
-                        filtered_data["recommended_bin"] = None
-                else:
-                    filtered_data["recommended_bin"] = None
-
-                # Create and validate the response item
-                disposal_item = DisposalHistoryItem(**filtered_data)
-                history.append(disposal_item)
-
-                logger.debug(f"Successfully processed disposal record: {doc.id}")
+                history.append(_history_item(doc.id, doc_data))
+
+                logger.debug("Successfully processed disposal record: %s", doc.id)
 
             except Exception as doc_error:
                 logger.error(f"Error processing document {doc.id}: {str(doc_error)}")
@@ -369,8 +422,11 @@ async def get_disposal_history_by_date_range(
         date_msg = f" between {start_date_str} and {end_date_str}"
         message = f"Retrieved {len(history)} disposal records{date_msg}{filter_msg}"
 
-        return DisposalHistoryResponse(
-            success=True, history=history, count=len(history), message=message
+        # Returned as a response so FastAPI does not re-serialize the model
+        return AppJSONResponse(
+            DisposalHistoryResponse(
+                success=True, history=history, count=len(history), message=message
+            )
         )
 
     except HTTPException:
@@ -386,18 +442,28 @@ async def get_disposal_history_by_date_range(
 
 
 @history_router.get("/waste-classes", response_model=Dict[str, Any])
-async def get_user_waste_classes(request: Request):
+async def get_user_waste_classes(request: Request, response: Response):
     """
     Get all unique waste classes from user's disposal history
     """
     try:
         user_id = get_user_id(request)
 
+        version = await resource_versions.current(RESOURCE_HISTORY, user_id)
+        etag = (
+            make_etag(RESOURCE_HISTORY, "waste_classes", user_id, version)
+            if version
+            else None
+        )
+        if etag_matches(request, etag):
+            return not_modified(etag, CACHE_PRIVATE_REVALIDATE)
+        set_validators(response, etag, CACHE_PRIVATE_REVALIDATE)
+
         # Query all disposal records for the user
         disposal_collection = firestore_client.collection("disposal-history")
         query = disposal_collection.where(filter=FieldFilter("user_id", "==", user_id))
 
-        docs = query.stream()
+        docs = await _read_history(f"classes|{user_id}|{version}", query)
 
         waste_classes = set()
         total_records = 0
@@ -427,3 +493,154 @@ async def get_user_waste_classes(request: Request):
     except Exception as e:
         logger.error(f"Error getting waste classes: {str(e)}")
         raise HTTPException(status_code=500, detail="Failed to retrieve waste classes")
+
+
+def _unique_ids(item_ids: List[str]) -> List[str]:
+    """Request order, duplicates dropped"""
+    return list(dict.fromkeys(item_ids))
+
+
+def _get_history_documents(item_ids: List[str]) -> Dict[str, Any]:
+    """
+    Blocking: the existing documents among `item_ids`, fetched in one
+    get_all round trip. Ids that are not valid document ids are skipped.
+    """
+    disposal_collection = firestore_client.collection("disposal-history")
+    references = [
+        disposal_collection.document(item_id)
+        for item_id in item_ids
+        if item_id and "/" not in item_id
+    ]
+    if not references:
+        return {}
+    with track_dependency("firestore", "disposal_history.get_all"):
+        snapshots = firestore_client.get_all(references)
+        return {snapshot.id: snapshot for snapshot in snapshots if snapshot.exists}
+
+
+def _owned_item_status(
+    item_id: str, documents: Dict[str, Any], user_id: str, found_status: str
+) -> str:
+    if not item_id or "/" in item_id:
+        return "invalid"
+    snapshot = documents.get(item_id)
+    if snapshot is None:
+        return "not_found"
+    doc_data = snapshot.to_dict() or {}
+    if doc_data.get("user_id") != user_id:
+        return "forbidden"
+    return found_status
+
+
+def _delete_history_documents(references: list) -> None:
+    """Blocking: delete in one atomic WriteBatch commit"""
+    batch = firestore_client.batch()
+    for reference in references:
+        batch.delete(reference)
+    with track_dependency("firestore", "disposal_history.batch_delete"):
+        batch.commit()
+
+
+@history_router.post("/history/batch-delete", response_model=BatchDeleteResponse)
+async def batch_delete_disposal_items(body: BatchIdsRequest, request: Request):
+    """
+    Delete up to HISTORY_BATCH_MAX_IDS disposal history items in one request
+
+    Ownership is checked like for a single delete, with one get_all for all
+    ids; the user's items are then deleted in a single batched write.
+    Items that do not exist or belong to someone else are reported per id
+    and left alone.
+
+    Returns:
+    - results: one entry per distinct id, in request order, with status
+      "deleted", "not_found", "forbidden" or "invalid"
+    """
+    try:
+        user_id = get_user_id(request)
+        item_ids = _unique_ids(body.item_ids)
+
+        documents = await run_in_executor(_get_history_documents, item_ids)
+        results = [
+            BatchItemResult(
+                id=item_id,
+                status=_owned_item_status(item_id, documents, user_id, "deleted"),
+            )
+            for item_id in item_ids
+        ]
+
+        owned = [documents[r.id].reference for r in results if r.status == "deleted"]
+        forbidden = [r.id for r in results if r.status == "forbidden"]
+        if forbidden:
+            logger.warning(
+                f"User {user_id} attempted to delete {len(forbidden)} items "
+                f"belonging to other users",
+                extra=NOT_RATE_LIMITED,
+            )
+
+        if owned:
+            await run_in_executor(_delete_history_documents, owned)
+            await history_cache.invalidate(user_id)
+
+        return AppJSONResponse(
+            BatchDeleteResponse(
+                success=len(owned) == len(item_ids),
+                message=f"Deleted {len(owned)} of {len(item_ids)} disposal items",
+                deleted_count=len(owned),
+                results=results,
+            )
+        )
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error batch deleting disposal items: {str(e)}", exc_info=True)
+        raise HTTPException(
+            status_code=500, detail=f"Failed to delete disposal items: {str(e)}"
+        )
+
+
+@history_router.post("/history/batch-get", response_model=BatchGetResponse)
+async def batch_get_disposal_items(body: BatchIdsRequest, request: Request):
+    """
+    Fetch up to HISTORY_BATCH_MAX_IDS of the user's disposal history items
+    by id with one get_all
+
+    Returns:
+    - history: the user's items, in request order
+    - results: one entry per distinct id with status "found", "not_found",
+      "forbidden" or "invalid"
+    """
+    try:
+        user_id = get_user_id(request)
+        item_ids = _unique_ids(body.item_ids)
+
+        documents = await run_in_executor(_get_history_documents, item_ids)
+        results = []
+        history = []
+        for item_id in item_ids:
+            status = _owned_item_status(item_id, documents, user_id, "found")
+            if status == "found":
+                try:
+                    history.append(_history_item(item_id, documents[item_id].to_dict()))
+                except Exception as doc_error:
+                    logger.error(f"Error processing document {item_id}: {doc_error}")
+                    status = "invalid"
+            results.append(BatchItemResult(id=item_id, status=status))
+
+        return AppJSONResponse(
+            BatchGetResponse(
+                success=len(history) == len(item_ids),
+                message=f"Retrieved {len(history)} of {len(item_ids)} disposal records",
+                count=len(history),
+                history=history,
+                results=results,
+            )
+        )
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error batch getting disposal items: {str(e)}", exc_info=True)
+        raise HTTPException(
+            status_code=500, detail=f"Failed to retrieve disposal items: {str(e)}"
+        )
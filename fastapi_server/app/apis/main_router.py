@@ -7,6 +7,7 @@ from app.apis import (
     history_router,
     profile_router,
     danger_router,
+    admin_router,
 )
 
 main_router = APIRouter()
@@ -18,3 +19,4 @@ main_router.include_router(scan_router.scan_router, prefix="/scan")
 main_router.include_router(history_router.history_router, prefix="/disposal")
 main_router.include_router(profile_router.profile_router, prefix="/profile")
 main_router.include_router(danger_router.danger_router, prefix="/danger")
+main_router.include_router(admin_router.admin_router, prefix="/admin")
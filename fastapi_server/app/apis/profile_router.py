@@ -1,19 +1,42 @@
-import uuid
 import mimetypes
 from datetime import datetime
 from typing import Dict, Any, Optional
-from fastapi import APIRouter, HTTPException, Request, UploadFile, File, Form
+from fastapi import (
+    APIRouter,
+    BackgroundTasks,
+    HTTPException,
+    Request,
+    Response,
+    UploadFile,
+    File,
+    Form,
+)
+from PIL import UnidentifiedImageError
 from pydantic import BaseModel
-from app.utils.storage import storage_client
 from google.cloud.firestore import FieldFilter
 
 from app.utils.extract_user_id import get_user_id
 from app.utils.firestore import firestore_client
-from app.core.config import settings
+from app.core.etag import (
+    CACHE_PRIVATE_REVALIDATE,
+    RESOURCE_PROFILE,
+    etag_matches,
+    make_etag,
+    not_modified,
+    resource_versions,
+    set_validators,
+)
 from app.core.logging import logger
+from app.core.request_context import run_in_executor
+from app.core.metrics import track_dependency
+from app.services.avatars import avatar_service, DEFAULT_AVATAR_SIZE
+from app.utils.single_flight import SingleFlight
 
 profile_router = APIRouter()
 
+# Concurrent /me requests for the same user share one Firestore query
+_profile_reads = SingleFlight("profile")
+
 
 class UpdateProfileRequest(BaseModel):
     display_name: Optional[str] = None
@@ -57,54 +80,24 @@ def is_valid_image_file(file: UploadFile) -> bool:
         return False
 
 
-async def upload_profile_image_to_gcs(
-    file: UploadFile, user_id: str, bucket_name: str = ""
-) -> str:
+async def upload_profile_avatars(file: UploadFile, user_id: str) -> Dict[str, str]:
     """
-    Upload profile image to Google Cloud Storage and return public URL
+    Resize the uploaded profile image to fixed square WebP sizes, upload them
+    under content-addressed names and return {size: public URL}
     """
     try:
-        # Use default bucket name if not provided
-        if not bucket_name:
-            bucket_name = settings.GCS_BUCKET_NAME
-
-        # Read file content
         file_content = await file.read()
         await file.seek(0)
 
-        # Generate unique filename
-        file_extension = ""
-        if file.filename:
-            file_extension = (
-                file.filename.split(".")[-1] if "." in file.filename else "jpg"
-            )
-        else:
-            file_extension = "jpg"
-
-        # Create unique filename: profile-images/{user_id}/{timestamp}_{uuid}.{extension}
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        unique_id = str(uuid.uuid4())[:8]
-        blob_name = f"profile-images/{user_id}/{timestamp}_{unique_id}.{file_extension}"
-
-        # Get bucket and create blob
-        bucket = storage_client.bucket(bucket_name)
-        blob = bucket.blob(blob_name)
-
-        # Set content type
-        content_type = file.content_type or f"image/{file_extension}"
-        blob.content_type = content_type
-
-        # Upload file
-        blob.upload_from_string(file_content, content_type=content_type)
-
-        # Make the blob publicly accessible
-        blob.make_public()
-
-        # Get public URL
-        public_url = blob.public_url
-
-        return public_url
+        return await run_in_executor(
+            avatar_service.store_avatars, user_id, file_content
+        )
 
+    except (UnidentifiedImageError, OSError) as e:
+        logger.warning(f"Profile image could not be decoded: {e}")
+        raise HTTPException(
+            status_code=400, detail="File is not a valid image or is corrupted"
+        )
     except Exception as e:
         logger.error(f"Error uploading profile image to GCS: {str(e)}")
         raise HTTPException(
@@ -115,6 +108,7 @@ async def upload_profile_image_to_gcs(
 @profile_router.put("/update", response_model=ProfileUpdateResponse)
 async def update_user_profile(
     request: Request,
+    background_tasks: BackgroundTasks,
     display_name: Optional[str] = Form(None),
     profile_image: Optional[UploadFile] = File(None),
 ):
@@ -138,12 +132,12 @@ async def update_user_profile(
                     detail="Invalid image file. Please upload a valid image (JPG, PNG, GIF, BMP, WebP).",
                 )
 
-            # Upload to Google Cloud Storage
+            # Resize and upload to Google Cloud Storage
             try:
-                new_photo_url = await upload_profile_image_to_gcs(
-                    profile_image, user_id
-                )
+                photo_urls = await upload_profile_avatars(profile_image, user_id)
+                new_photo_url = photo_urls[str(DEFAULT_AVATAR_SIZE)]
                 update_data["photo_url"] = new_photo_url
+                update_data["photo_urls"] = photo_urls
 
             except HTTPException:
                 raise
@@ -172,7 +166,8 @@ async def update_user_profile(
             query = profiles_ref.where(
                 filter=FieldFilter("user_id", "==", user_id)
             ).limit(1)
-            existing_profiles = list(query.stream())
+            with track_dependency("firestore", "profiles.query"):
+                existing_profiles = list(query.stream())
 
             if not existing_profiles:
                 logger.error(f"User profile not found for user_id: {user_id}")
@@ -180,7 +175,20 @@ async def update_user_profile(
 
             # Update the profile
             profile_doc = existing_profiles[0]
-            profile_doc.reference.update(update_data)
+            previous_photo_url = (profile_doc.to_dict() or {}).get("photo_url")
+            with track_dependency("firestore", "profiles.update"):
+                profile_doc.reference.update(update_data)
+            await resource_versions.bump(RESOURCE_PROFILE, user_id)
+
+            # Superseded avatars are removed after the response is sent
+            if new_photo_url:
+                background_tasks.add_task(
+                    avatar_service.cleanup_superseded_avatars,
+                    user_id,
+                    profile_doc.reference,
+                    previous_photo_url,
+                    new_photo_url,
+                )
 
             # Get updated profile data
             updated_profile = profile_doc.reference.get().to_dict()
@@ -208,20 +216,31 @@ async def update_user_profile(
         )
 
 
+def _query_profile(user_id: str) -> list:
+    profiles_ref = firestore_client.collection("profiles")
+    query = profiles_ref.where(filter=FieldFilter("user_id", "==", user_id)).limit(1)
+    with track_dependency("firestore", "profiles.query"):
+        return list(query.stream())
+
+
 @profile_router.get("/me")
-async def get_user_profile(request: Request):
+async def get_user_profile(request: Request, response: Response):
     """
     Get current user's profile information
     """
     try:
         user_id = get_user_id(request)
 
+        version = await resource_versions.current(RESOURCE_PROFILE, user_id)
+        etag = make_etag(RESOURCE_PROFILE, user_id, version) if version else None
+        if etag_matches(request, etag):
+            return not_modified(etag, CACHE_PRIVATE_REVALIDATE)
+        set_validators(response, etag, CACHE_PRIVATE_REVALIDATE)
+
         # Find user profile in Firestore
-        profiles_ref = firestore_client.collection("profiles")
-        query = profiles_ref.where(filter=FieldFilter("user_id", "==", user_id)).limit(
-            1
+        existing_profiles = await _profile_reads.do(
+            f"{user_id}|{version}", lambda: run_in_executor(_query_profile, user_id)
         )
-        existing_profiles = list(query.stream())
 
         if not existing_profiles:
             logger.error(f"User profile not found for user_id: {user_id}")
@@ -2,25 +2,64 @@ import base64
 from datetime import datetime
 import io
 import mimetypes
+import time
 import uuid
 from typing import Dict, Any, List, Optional
-from fastapi import APIRouter, Form, HTTPException, Request, UploadFile, File
+from fastapi import (
+    APIRouter,
+    BackgroundTasks,
+    Form,
+    HTTPException,
+    Request,
+    Response,
+    UploadFile,
+    File,
+)
 from pydantic import BaseModel
-from google import genai
 from app.utils.storage import storage_client
 from PIL import Image
 
 from app.utils.extract_user_id import get_user_id
 from app.utils.firestore import firestore_client
 from app.services.waste_detection import waste_detection_service
+from app.services.history_cache import history_cache
+from app.services.image_derivatives import image_derivative_service
 from app.core.config import settings
+from app.core.etag import (
+    CACHE_PUBLIC_REVALIDATE,
+    RESOURCE_HISTORY,
+    RESOURCE_PROFILE,
+    etag_matches,
+    make_etag,
+    not_modified,
+    resource_versions,
+    set_validators,
+)
 from app.core.logging import logger
+from app.core.metrics import (
+    GEMINI_REQUEST_DURATION,
+    IMAGE_DECODE_DURATION,
+    track_dependency,
+)
+from app.core.tracing import SPAN_KIND_CLIENT, start_span
+from app.core.clients import LazyClient
+from app.core.request_context import run_in_executor
+from app.core.serialization import AppJSONResponse
+from app.utils.single_flight import SingleFlight
 from google.cloud.firestore import FieldFilter
 
 scan_router = APIRouter()
 
-# Configure Gemini API
-client = genai.Client(api_key=settings.GEMINI_API_KEY)
+
+def get_gemini_client():
+    """Gemini client; google.genai is imported here since it is slow to load"""
+    from google import genai
+
+    return genai.Client(api_key=settings.GEMINI_API_KEY)
+
+
+# Configure Gemini API on first use
+client = LazyClient("gemini", get_gemini_client)
 
 
 class ScanRequest(BaseModel):
@@ -96,10 +135,11 @@ async def upload_image_to_gcs(
         blob.content_type = content_type
 
         # Upload file
-        blob.upload_from_string(file_content, content_type=content_type)
+        with track_dependency("gcs", "disposal_image.upload"):
+            blob.upload_from_string(file_content, content_type=content_type)
 
-        # Make the blob publicly accessible
-        blob.make_public()
+            # Make the blob publicly accessible
+            blob.make_public()
 
         # Get public URL
         public_url = blob.public_url
@@ -178,7 +218,8 @@ async def get_user_available_bins(user_id: str) -> List[str]:
     """Get list of bin IDs that user has access to"""
     try:
         doc_ref = firestore_client.collection("available-bins").document(user_id)
-        doc = doc_ref.get()
+        with track_dependency("firestore", "available_bins.get"):
+            doc = doc_ref.get()
 
         if not doc.exists:
 
@@ -237,13 +278,18 @@ async def get_disposal_tips_from_gemini(
     waste_class: str, user_bins: List[str]
 ) -> Dict[str, Any]:
     """Get disposal tips from Gemini API"""
+    start_time = time.perf_counter()
+    outcome = "error"
     try:
         prompt = create_disposal_prompt(waste_class, user_bins)
 
-        response = client.models.generate_content(
-            model="gemini-2.5-flash-preview-05-20",
-            contents=prompt,
-        )
+        with start_span(
+            "gemini.generate_content", kind=SPAN_KIND_CLIENT, waste_class=waste_class
+        ):
+            response = client.models.generate_content(
+                model="gemini-2.5-flash-preview-05-20",
+                contents=prompt,
+            )
 
         # Parse the JSON response
         import json
@@ -251,8 +297,10 @@ async def get_disposal_tips_from_gemini(
         try:
             response_text = response.text or ""
             tips_data = json.loads(response_text.strip())
+            outcome = "ok"
             return tips_data
         except json.JSONDecodeError:
+            outcome = "invalid_json"
             # Fallback if JSON parsing fails
             return {
                 "recommended_bin_id": (
@@ -272,11 +320,16 @@ async def get_disposal_tips_from_gemini(
             "preparation_steps": "Clean the item if necessary before disposal",
             "environmental_note": "Proper waste disposal helps protect our environment",
         }
+    finally:
+        GEMINI_REQUEST_DURATION.labels(outcome).observe(
+            time.perf_counter() - start_time
+        )
 
 
 @scan_router.post("/save-tips", response_model=Dict[str, Any])
 async def save_disposal_tips(
     request: Request,
+    background_tasks: BackgroundTasks,
     file: UploadFile = File(...),
     waste_class: str = Form(...),
     confidence: str = Form(...),
@@ -357,7 +410,18 @@ async def save_disposal_tips(
         # Save to Firestore disposal-history collection
         try:
             disposal_collection = firestore_client.collection("disposal-history")
-            doc_ref = disposal_collection.add(disposal_record)
+            with track_dependency("firestore", "disposal_history.add"):
+                doc_ref = disposal_collection.add(disposal_record)
+            await history_cache.invalidate(user_id)
+
+            # Thumbnails and previews are rendered after the response is sent
+            background_tasks.add_task(
+                image_derivative_service.process_disposal_image,
+                doc_ref[1].id,
+                image_url,
+                file_content,
+                user_id,
+            )
 
             # Update user's profile with eco points and scan count
             try:
@@ -365,7 +429,8 @@ async def save_disposal_tips(
                 user_query = profiles_ref.where(
                     filter=FieldFilter("user_id", "==", user_id)
                 ).limit(1)
-                user_docs = list(user_query.stream())
+                with track_dependency("firestore", "profiles.query"):
+                    user_docs = list(user_query.stream())
 
                 if user_docs:
                     user_doc = user_docs[0]
@@ -375,13 +440,15 @@ async def save_disposal_tips(
                     new_eco_points = current_data.get("eco_points", 0) + 10
                     new_total_scans = current_data.get("total_scans", 0) + 1
 
-                    user_doc.reference.update(
-                        {
-                            "eco_points": new_eco_points,
-                            "total_scans": new_total_scans,
-                            "updated_at": current_time,
-                        }
-                    )
+                    with track_dependency("firestore", "profiles.update"):
+                        user_doc.reference.update(
+                            {
+                                "eco_points": new_eco_points,
+                                "total_scans": new_total_scans,
+                                "updated_at": current_time,
+                            }
+                        )
+                    await resource_versions.bump(RESOURCE_PROFILE, user_id)
 
             except Exception as profile_error:
                 logger.warning(f"Failed to update user profile: {profile_error}")
@@ -421,7 +488,7 @@ async def analyze_waste_item(scan_data: ScanRequest, request: Request):
         detection_data = {"type": "detect", "image": scan_data.image}
 
         detection_result = await waste_detection_service.process_detection_request(
-            detection_data
+            detection_data, "scan"
         )
 
         if detection_result.get("type") == "error":
@@ -445,7 +512,8 @@ async def analyze_waste_item(scan_data: ScanRequest, request: Request):
         confidence = best_detection.get("confidence", 0.0)
 
         # Step 2: Get user's available bins
-        user_bins = await get_user_available_bins(user_id)
+        with start_span("bins.lookup"):
+            user_bins = await get_user_available_bins(user_id)
 
         # Step 3: Get disposal tips from Gemini
         disposal_info = await get_disposal_tips_from_gemini(waste_class, user_bins)
@@ -522,12 +590,13 @@ async def analyze_waste_from_upload(request: Request, file: UploadFile = File(..
 
         # Process image
         try:
-            image = Image.open(io.BytesIO(image_data))
+            with IMAGE_DECODE_DURATION.labels("upload").time():
+                image = Image.open(io.BytesIO(image_data))
 
-            # Convert to RGB if necessary
-            if image.mode != "RGB":
+                # Convert to RGB if necessary
+                if image.mode != "RGB":
 
-                image = image.convert("RGB")
+                    image = image.convert("RGB")
 
         except Exception as e:
             logger.error(f"Error processing image: {e}")
@@ -560,6 +629,15 @@ async def analyze_waste_from_upload(request: Request, file: UploadFile = File(..
         )
 
 
+# Identical history queries running at the same time share one Firestore call
+_history_reads = SingleFlight("scan_disposal_history")
+
+
+def _run_history_query(query) -> list:
+    with track_dependency("firestore", "disposal_history.query"):
+        return list(query.stream())
+
+
 # Add a new endpoint to get user's disposal history
 @scan_router.get("/disposal-history", response_model=Dict[str, Any])
 async def get_disposal_history(request: Request, limit: int = 20):
@@ -568,6 +646,9 @@ async def get_disposal_history(request: Request, limit: int = 20):
     """
     try:
         user_id = get_user_id(request)
+        # In the coalescing key, so reads started before a write are not
+        # shared with requests made after it
+        version = await resource_versions.current(RESOURCE_HISTORY, user_id)
 
         # Query disposal history for the user
         disposal_collection = firestore_client.collection("disposal-history")
@@ -577,20 +658,24 @@ async def get_disposal_history(request: Request, limit: int = 20):
             .limit(limit)
         )
 
-        docs = query.stream()
-
+        docs = await _history_reads.do(
+            f"{user_id}|{limit}|{version}",
+            lambda: run_in_executor(_run_history_query, query),
+        )
         history = []
         for doc in docs:
             doc_data = doc.to_dict()
             doc_data["id"] = doc.id  # Add document ID
             history.append(doc_data)
 
-        return {
-            "success": True,
-            "history": history,
-            "count": len(history),
-            "message": f"Retrieved {len(history)} disposal records",
-        }
+        return AppJSONResponse(
+            {
+                "success": True,
+                "history": history,
+                "count": len(history),
+                "message": f"Retrieved {len(history)} disposal records",
+            }
+        )
 
     except HTTPException:
         raise
@@ -599,26 +684,36 @@ async def get_disposal_history(request: Request, limit: int = 20):
         raise HTTPException(status_code=500, detail="Failed to get disposal history")
 
 
+# This would typically come from your model's class list
+# For now, returning common waste categories
+SUPPORTED_CLASSES = {
+    "supported_classes": [
+        "plastic_bottle",
+        "glass_bottle",
+        "aluminum_can",
+        "paper",
+        "cardboard",
+        "food_waste",
+        "electronic_waste",
+        "battery",
+        "textile",
+        "metal",
+        "general_waste",
+    ],
+    "total_classes": 11,
+}
+# Fixed per deploy
+SUPPORTED_CLASSES_ETAG = make_etag(
+    "supported_classes", ",".join(SUPPORTED_CLASSES["supported_classes"])
+)
+
+
 @scan_router.get("/supported-classes")
-async def get_supported_waste_classes():
+async def get_supported_waste_classes(request: Request, response: Response):
     """
     Get list of waste classes that can be detected
     """
-    # This would typically come from your model's class list
-    # For now, returning common waste categories
-    return {
-        "supported_classes": [
-            "plastic_bottle",
-            "glass_bottle",
-            "aluminum_can",
-            "paper",
-            "cardboard",
-            "food_waste",
-            "electronic_waste",
-            "battery",
-            "textile",
-            "metal",
-            "general_waste",
-        ],
-        "total_classes": 11,
-    }
+    if etag_matches(request, SUPPORTED_CLASSES_ETAG):
+        return not_modified(SUPPORTED_CLASSES_ETAG, CACHE_PUBLIC_REVALIDATE)
+    set_validators(response, SUPPORTED_CLASSES_ETAG, CACHE_PUBLIC_REVALIDATE)
+    return SUPPORTED_CLASSES
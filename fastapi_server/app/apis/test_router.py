@@ -1,6 +1,7 @@
 from typing import Union
 from fastapi import APIRouter, HTTPException as StarletteHTTPException, status
 import time
+from app.core.health import health_monitor
 
 test_router = APIRouter()
 
@@ -12,13 +13,18 @@ async def root():
 
 @test_router.get("/health")
 async def health_check():
-    """Health check endpoint"""
+    """Health check endpoint, from the cached readiness probes"""
+    detector = health_monitor.statuses.get("roboflow", {}).get("status")
     return {
-        "status": "healthy",
+        "status": "healthy" if health_monitor.ready else "degraded",
         "timestamp": time.time(),
         "services": {
             "api": "running",
             "websocket": "running",
-            "waste_detection": "ready",
+            "waste_detection": (
+                "ready"
+                if detector == "ok"
+                else "warming_up" if not health_monitor.warmed_up else "unavailable"
+            ),
         },
     }
@@ -1,8 +1,11 @@
-import json
 import asyncio
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect
 from app.services.waste_detection import waste_detection_service
+from app.core.config import settings
 from app.core.logging import logger
+from app.core.serialization import JSONDecodeError, dumps_text, loads
+from app.core.metrics import WEBSOCKET_BUDGET_REJECTIONS, WEBSOCKET_FRAMES
+from app.core.ws_recording import start_session_recording
 
 websocket_router = APIRouter()
 
@@ -12,11 +15,14 @@ async def websocket_waste_detection(websocket: WebSocket):
     """WebSocket endpoint for real-time waste detection"""
     await websocket.accept()
     await waste_detection_service.add_client(websocket)
+    recorder = None
 
     try:
+        recorder = await start_session_recording(websocket.url.path)
+
         # Send welcome message
         await websocket.send_text(
-            json.dumps(
+            dumps_text(
                 {
                     "type": "connected",
                     "message": "Connected to waste classification live server",
@@ -29,29 +35,47 @@ async def websocket_waste_detection(websocket: WebSocket):
             try:
                 # Receive message with timeout
                 message = await asyncio.wait_for(websocket.receive_text(), timeout=30.0)
+                if recorder:
+                    await recorder.record(message)
+
+                # The text and its parsed copy alone would exceed the budget
+                if 2 * len(message) > settings.WS_MEMORY_BUDGET_BYTES:
+                    WEBSOCKET_BUDGET_REJECTIONS.inc()
+                    await websocket.send_text(
+                        dumps_text(
+                            {
+                                "type": "error",
+                                "message": "Message exceeds the per-connection memory budget",
+                            }
+                        )
+                    )
+                    continue
 
                 # Parse message
                 try:
-                    data = json.loads(message)
-                except json.JSONDecodeError:
+                    data = loads(message)
+                except JSONDecodeError:
                     await websocket.send_text(
-                        json.dumps({"type": "error", "message": "Invalid JSON format"})
+                        dumps_text({"type": "error", "message": "Invalid JSON format"})
                     )
                     continue
 
                 message_type = data.get("type")
+                WEBSOCKET_FRAMES.labels(
+                    message_type if message_type in ("detect", "ping") else "other"
+                ).inc()
 
                 if message_type == "detect":
                     # Process detection request
                     response = await waste_detection_service.process_detection_request(
-                        data
+                        data, "websocket", settings.WS_MEMORY_BUDGET_BYTES
                     )
-                    await websocket.send_text(json.dumps(response))
+                    await websocket.send_text(dumps_text(response))
 
                 elif message_type == "ping":
                     # Health check
                     await websocket.send_text(
-                        json.dumps(
+                        dumps_text(
                             {
                                 "type": "pong",
                                 "timestamp": asyncio.get_event_loop().time(),
@@ -61,7 +85,7 @@ async def websocket_waste_detection(websocket: WebSocket):
 
                 else:
                     await websocket.send_text(
-                        json.dumps(
+                        dumps_text(
                             {
                                 "type": "error",
                                 "message": f"Unknown message type: {message_type}",
@@ -72,7 +96,7 @@ async def websocket_waste_detection(websocket: WebSocket):
             except asyncio.TimeoutError:
                 # Send ping to check connection
                 await websocket.send_text(
-                    json.dumps(
+                    dumps_text(
                         {"type": "ping", "timestamp": asyncio.get_event_loop().time()}
                     )
                 )
@@ -83,6 +107,8 @@ async def websocket_waste_detection(websocket: WebSocket):
         logger.error(f"Error in WebSocket connection: {e}", exc_info=True)
     finally:
         await waste_detection_service.remove_client(websocket)
+        if recorder:
+            await recorder.close()
 
 
 @websocket_router.websocket("/test")
@@ -92,7 +118,7 @@ async def websocket_test(websocket: WebSocket):
 
     try:
         await websocket.send_text(
-            json.dumps(
+            dumps_text(
                 {
                     "type": "connected",
                     "message": "Test WebSocket connection established",
@@ -103,7 +129,7 @@ async def websocket_test(websocket: WebSocket):
         while True:
             message = await websocket.receive_text()
             await websocket.send_text(
-                json.dumps(
+                dumps_text(
                     {
                         "type": "echo",
                         "message": f"Echo: {message}",
@@ -0,0 +1,447 @@
+"""
+Cache tier shared by the routers, with a pluggable backend.
+
+CACHE_BACKEND picks where entries live:
+
+- "memory": an in-process dict; each worker has its own copy.
+- "sqlite": one SQLite file (CACHE_SQLITE_PATH, on tmpfs by default) that
+  every worker on the node reads and writes, so one worker's miss fills the
+  cache for all of them.
+- "redis": any server speaking the Redis protocol (CACHE_REDIS_URL), shared
+  across nodes. benchmarks/resp_server.py is a local stand-in for testing.
+
+Semantics are the same on every backend. Each entry has an absolute expiry
+(its TTL from the time of writing) and expired entries are never returned.
+Past CACHE_MAX_ENTRIES the oldest writes are evicted (on SQLite, checked
+every PRUNE_EVERY writes), and expired entries are swept on the same
+schedule. On Redis, capacity is governed by the server's maxmemory-policy,
+and `volatile-ttl` comes closest to this behaviour. Values are JSON. A
+backend error counts as a miss and is logged, so the request falls back to
+the source of truth. While the Redis server is unreachable, calls fail fast
+and one probe per CACHE_RETRY_INTERVAL_SECONDS checks whether it is back.
+"""
+
+import asyncio
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, List, Optional, Tuple
+from urllib.parse import unquote, urlsplit
+
+from app.core.config import settings
+from app.core.logging import logger
+from app.core.metrics import Counter, Histogram, record_cache_lookup
+from app.core.request_context import run_in_executor
+from app.core.serialization import dumps, loads
+
+CACHE_OPERATION_DURATION = Histogram(
+    "cache_operation_duration_seconds",
+    "Cache backend operation latency",
+    ["backend", "operation"],
+    buckets=(0.0001, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25),
+)
+
+CACHE_ERRORS = Counter(
+    "cache_backend_errors",
+    "Cache backend operations that failed and were treated as misses",
+    ["backend", "operation"],
+)
+
+
+class CacheBackendError(Exception):
+    pass
+
+
+class CacheUnavailableError(CacheBackendError):
+    """Failed fast: the backend is known to be down"""
+
+
+class CacheReplyError(CacheBackendError):
+    """The server answered with an error; the connection is still usable"""
+
+
+# Expired entries are swept on one set in this many (all backends but Redis)
+PRUNE_EVERY = 64
+
+
+class MemoryBackend:
+    name = "memory"
+    shared = False
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        # key -> (expires_at, value), oldest write first
+        self._entries: "OrderedDict[str, Tuple[float, bytes]]" = OrderedDict()
+        self._writes = 0
+
+    async def get(self, key: str) -> Optional[bytes]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry[0] <= time.time():
+            self._entries.pop(key, None)
+            return None
+        return entry[1]
+
+    async def set(self, key: str, value: bytes, ttl: float) -> None:
+        self._entries.pop(key, None)
+        now = time.time()
+        self._entries[key] = (now + ttl, value)
+        self._writes += 1
+        if self._writes % PRUNE_EVERY == 0:
+            for expired in [k for k, (exp, _) in self._entries.items() if exp <= now]:
+                del self._entries[expired]
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    async def delete(self, key: str) -> None:
+        self._entries.pop(key, None)
+
+    async def close(self) -> None:
+        self._entries.clear()
+
+
+class SqliteBackend:
+    """
+    One table in a file every worker opens. WAL mode lets readers proceed
+    while one worker writes; durability is switched off since losing the
+    cache on a crash costs nothing but misses.
+    """
+
+    name = "sqlite"
+    shared = True
+
+    def __init__(self, path: str, max_entries: int):
+        self.path = path
+        self.max_entries = max_entries
+        self._local = threading.local()
+        self._writes = 0
+
+    def _connection(self) -> sqlite3.Connection:
+        # sqlite3 connections are per thread; executor threads each open one
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=1.0, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=OFF")
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS cache ("
+                " key TEXT PRIMARY KEY, value BLOB NOT NULL,"
+                " expires_at REAL NOT NULL, written_at REAL NOT NULL)"
+            )
+            connection.execute(
+                "CREATE INDEX IF NOT EXISTS cache_written_at ON cache (written_at)"
+            )
+            self._local.connection = connection
+        return connection
+
+    def _get(self, key: str) -> Optional[bytes]:
+        row = (
+            self._connection()
+            .execute(
+                "SELECT value FROM cache WHERE key = ? AND expires_at > ?",
+                (key, time.time()),
+            )
+            .fetchone()
+        )
+        return row[0] if row else None
+
+    def _prune(self, connection: sqlite3.Connection, now: float) -> None:
+        connection.execute("DELETE FROM cache WHERE expires_at <= ?", (now,))
+        # Capacity is checked on the same schedule; COUNT(*) scans the table
+        (count,) = connection.execute("SELECT COUNT(*) FROM cache").fetchone()
+        if count > self.max_entries:
+            connection.execute(
+                "DELETE FROM cache WHERE key IN"
+                " (SELECT key FROM cache ORDER BY written_at LIMIT ?)",
+                (count - self.max_entries,),
+            )
+
+    def _set(self, key: str, value: bytes, ttl: float) -> None:
+        connection = self._connection()
+        now = time.time()
+        connection.execute(
+            "INSERT OR REPLACE INTO cache (key, value, expires_at, written_at)"
+            " VALUES (?, ?, ?, ?)",
+            (key, value, now + ttl, now),
+        )
+        self._writes += 1
+        if self._writes % PRUNE_EVERY == 0:
+            self._prune(connection, now)
+
+    def _delete(self, key: str) -> None:
+        self._connection().execute("DELETE FROM cache WHERE key = ?", (key,))
+
+    async def _run(self, func, *args):
+        try:
+            return await run_in_executor(func, *args)
+        except sqlite3.Error as e:
+            raise CacheBackendError(str(e)) from e
+
+    async def get(self, key: str) -> Optional[bytes]:
+        return await self._run(self._get, key)
+
+    async def set(self, key: str, value: bytes, ttl: float) -> None:
+        await self._run(self._set, key, value, ttl)
+
+    async def delete(self, key: str) -> None:
+        await self._run(self._delete, key)
+
+    async def close(self) -> None:
+        connection = getattr(self._local, "connection", None)
+        if connection is not None:
+            connection.close()
+            self._local.connection = None
+
+
+class RespBackend:
+    """
+    Minimal Redis-protocol client: GET, SET with PX, DEL over a small pool
+    of connections owned by this worker's event loop.
+
+    A connection failure or timeout opens a circuit breaker: for the next
+    `retry_interval` seconds every call raises CacheUnavailableError without
+    touching the network. After that a single call probes the server and
+    closes the breaker if it succeeds.
+    """
+
+    name = "redis"
+    shared = True
+
+    def __init__(self, url: str, pool_size: int, timeout: float, retry_interval: float):
+        parts = urlsplit(url)
+        self.host = parts.hostname or "localhost"
+        self.port = parts.port or 6379
+        self.password = unquote(parts.password) if parts.password else None
+        self.db = int(parts.path.lstrip("/") or 0)
+        self.timeout = timeout
+        self.retry_interval = retry_interval
+        self._down_until = 0.0  # breaker open while set
+        self._probing = False
+        self._idle: List[Tuple[asyncio.StreamReader, asyncio.StreamWriter]] = []
+        self._slots = asyncio.Semaphore(pool_size)
+
+    @staticmethod
+    def _encode(*parts: Any) -> bytes:
+        out = [b"*%d\r\n" % len(parts)]
+        for part in parts:
+            if not isinstance(part, bytes):
+                part = str(part).encode("utf-8")
+            out.append(b"$%d\r\n%s\r\n" % (len(part), part))
+        return b"".join(out)
+
+    @staticmethod
+    async def _read_reply(reader: asyncio.StreamReader) -> Any:
+        line = await reader.readline()
+        if not line:
+            raise CacheBackendError("connection closed")
+        kind, body = line[:1], line[1:-2]
+        if kind == b"+":
+            return body.decode()
+        if kind == b"-":
+            raise CacheReplyError(body.decode())
+        if kind == b":":
+            return int(body)
+        if kind == b"$":
+            length = int(body)
+            if length < 0:
+                return None
+            data = await reader.readexactly(length + 2)
+            return data[:-2]
+        raise CacheBackendError(f"unexpected reply {line[:20]!r}")
+
+    async def _connect(self) -> Tuple[asyncio.StreamReader, asyncio.StreamWriter]:
+        reader, writer = await asyncio.open_connection(self.host, self.port)
+        try:
+            if self.password:
+                writer.write(self._encode("AUTH", self.password))
+                await self._read_reply(reader)
+            if self.db:
+                writer.write(self._encode("SELECT", self.db))
+                await self._read_reply(reader)
+        except BaseException:
+            writer.close()
+            raise
+        return reader, writer
+
+    def _trip(self, error: BaseException) -> None:
+        if not self._down_until:
+            logger.warning(
+                f"Cache server {self.host}:{self.port} unreachable ({error!r}), "
+                f"retrying every {self.retry_interval:g}s"
+            )
+        self._down_until = time.monotonic() + self.retry_interval
+        # Pooled connections to a server that went away are dead too
+        while self._idle:
+            self._idle.pop()[1].close()
+
+    async def _command(self, *parts: Any) -> Any:
+        probe = False
+        if self._down_until:
+            if self._probing or time.monotonic() < self._down_until:
+                raise CacheUnavailableError(f"{self.host}:{self.port} is down")
+            self._probing = probe = True
+        try:
+            reply = await self._send(*parts)
+        finally:
+            if probe:
+                self._probing = False
+        if self._down_until:
+            logger.info("Cache server %s:%d reachable again", self.host, self.port)
+            self._down_until = 0.0
+        return reply
+
+    async def _send(self, *parts: Any) -> Any:
+        async with self._slots:
+            connection = self._idle.pop() if self._idle else None
+            try:
+                if connection is None:
+                    connection = await asyncio.wait_for(self._connect(), self.timeout)
+                reader, writer = connection
+                writer.write(self._encode(*parts))
+                reply = await asyncio.wait_for(self._read_reply(reader), self.timeout)
+            except CacheReplyError as e:
+                if connection is None:
+                    # AUTH/SELECT rejected: every new connection will be too
+                    self._trip(e)
+                else:
+                    # The reply was read in full, so the connection is still good
+                    self._idle.append(connection)
+                raise
+            except (
+                OSError,
+                asyncio.TimeoutError,
+                asyncio.IncompleteReadError,
+                CacheBackendError,
+            ) as e:
+                # Closed by the server, a garbled reply or a half-read one:
+                # never reuse the connection
+                if connection is not None:
+                    connection[1].close()
+                self._trip(e)
+                raise CacheBackendError(str(e) or type(e).__name__) from e
+            except BaseException:
+                # Cancelled mid-command: same reason
+                if connection is not None:
+                    connection[1].close()
+                raise
+            self._idle.append(connection)
+            return reply
+
+    async def get(self, key: str) -> Optional[bytes]:
+        return await self._command("GET", key)
+
+    async def set(self, key: str, value: bytes, ttl: float) -> None:
+        await self._command("SET", key, value, "PX", max(int(ttl * 1000), 1))
+
+    async def delete(self, key: str) -> None:
+        await self._command("DEL", key)
+
+    async def close(self) -> None:
+        while self._idle:
+            self._idle.pop()[1].close()
+
+
+def _default_sqlite_path() -> str:
+    directory = "/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir()
+    return os.path.join(directory, "trasholini-cache.sqlite3")
+
+
+def build_backend():
+    backend = settings.CACHE_BACKEND.lower()
+    if backend == "sqlite":
+        return SqliteBackend(
+            settings.CACHE_SQLITE_PATH or _default_sqlite_path(),
+            settings.CACHE_MAX_ENTRIES,
+        )
+    if backend == "redis":
+        return RespBackend(
+            settings.CACHE_REDIS_URL,
+            settings.CACHE_REDIS_POOL_SIZE,
+            settings.CACHE_TIMEOUT_SECONDS,
+            settings.CACHE_RETRY_INTERVAL_SECONDS,
+        )
+    if backend != "memory":
+        logger.error(f"Unknown CACHE_BACKEND {backend!r}, using memory")
+    return MemoryBackend(settings.CACHE_MAX_ENTRIES)
+
+
+class Cache:
+    """A named, TTL'd namespace in the shared backend"""
+
+    def __init__(self, name: str, ttl: float, backend=None):
+        self.name = name
+        self.ttl = ttl
+        self._backend = backend
+
+    @property
+    def backend(self):
+        return self._backend or cache_backend
+
+    def _key(self, key: str) -> str:
+        return f"{self.name}:{key}"
+
+    async def _call(self, operation: str, *args, raise_errors: bool = False):
+        backend = self.backend
+        started = time.perf_counter()
+        try:
+            return await getattr(backend, operation)(*args)
+        except CacheUnavailableError:
+            # Already logged once by the backend when it went down
+            CACHE_ERRORS.labels(backend.name, operation).inc()
+            if raise_errors:
+                raise
+            return None
+        except CacheBackendError as e:
+            CACHE_ERRORS.labels(backend.name, operation).inc()
+            if raise_errors:
+                raise
+            logger.warning(f"Cache {operation} on {backend.name} failed: {e}")
+            return None
+        finally:
+            CACHE_OPERATION_DURATION.labels(backend.name, operation).observe(
+                time.perf_counter() - started
+            )
+
+    async def get(self, key: str) -> Optional[Any]:
+        raw = await self._call("get", self._key(key))
+        record_cache_lookup(self.name, raw is not None)
+        if raw is None:
+            return None
+        try:
+            return loads(raw)
+        except ValueError:
+            return None
+
+    async def set(
+        self,
+        key: str,
+        value: Any,
+        ttl: Optional[float] = None,
+        raise_errors: bool = False,
+    ) -> None:
+        """
+        With raise_errors, a failed write raises CacheBackendError instead of
+        being logged and ignored, for callers that must not lose it
+        """
+        await self._call(
+            "set",
+            self._key(key),
+            dumps(value),
+            ttl or self.ttl,
+            raise_errors=raise_errors,
+        )
+
+    async def delete(self, key: str) -> None:
+        await self._call("delete", self._key(key))
+
+
+# Global backend instance, shared by every Cache
+cache_backend = build_backend()
+
+
+async def close_cache() -> None:
+    await cache_backend.close()
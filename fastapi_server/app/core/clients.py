@@ -0,0 +1,107 @@
+"""
+Lazily built SDK clients.
+
+Firestore, Cloud Storage, Gemini and Roboflow clients used to be created at
+import time, which made importing app.main slow (inference_sdk alone pulls
+in opencv and matplotlib) and impossible without credentials. Each is now a
+LazyClient: a module-level stand-in that builds the real client - importing
+its SDK then - on first attribute access. Call sites keep using it like the
+client itself (`firestore_client.collection(...)`).
+
+The lifespan starts building all of them in the background
+(`initialize_clients`) so the first request rarely pays for it, and closes
+them on shutdown. `override_client` swaps in a replacement - a fake for
+benchmarks and tests - before or after first use.
+"""
+
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from app.core.logging import logger
+
+_registry: Dict[str, "LazyClient"] = {}
+_overrides: Dict[str, Any] = {}
+
+
+class LazyClient:
+    def __init__(self, name: str, factory: Callable[[], Any]):
+        self._name = name
+        self._factory = factory
+        self._client: Optional[Any] = None
+        self._lock = threading.Lock()
+        _registry[name] = self
+
+    @property
+    def name(self) -> str:
+        return self._name
+
+    @property
+    def initialized(self) -> bool:
+        return self._client is not None or self._name in _overrides
+
+    def get(self) -> Any:
+        override = _overrides.get(self._name)
+        if override is not None:
+            return override
+
+        client = self._client
+        if client is None:
+            # Concurrent first uses (threads, or the loop and the warm-up task) build once
+            with self._lock:
+                if self._client is None:
+                    started = time.perf_counter()
+                    self._client = self._factory()
+                    logger.info(
+                        "Initialized %s client in %.3fs",
+                        self._name,
+                        time.perf_counter() - started,
+                    )
+                client = self._client
+        return client
+
+    def close(self) -> None:
+        client, self._client = self._client, None
+        close = getattr(client, "close", None)
+        if callable(close):
+            try:
+                close()
+            except Exception as e:
+                logger.error(f"Error closing {self._name} client: {e}")
+
+    def __getattr__(self, attribute: str) -> Any:
+        return getattr(self.get(), attribute)
+
+    def __repr__(self) -> str:
+        state = "initialized" if self.initialized else "not initialized"
+        return f"<LazyClient {self._name} ({state})>"
+
+
+def override_client(name: str, client: Any) -> None:
+    """Use `client` wherever the named lazy client is used; None removes the override"""
+    if client is None:
+        _overrides.pop(name, None)
+    else:
+        _overrides[name] = client
+
+
+def registered_clients() -> List[LazyClient]:
+    return list(_registry.values())
+
+
+def initialize_clients() -> Dict[str, Optional[str]]:
+    """Build every registered client; returns the error per client, None on success"""
+    errors: Dict[str, Optional[str]] = {}
+    for client in registered_clients():
+        try:
+            client.get()
+            errors[client.name] = None
+        except Exception as e:
+            logger.error(f"Failed to initialize {client.name} client: {e}")
+            errors[client.name] = str(e)
+    return errors
+
+
+def close_clients() -> None:
+    for client in registered_clients():
+        client.close()
@@ -0,0 +1,111 @@
+"""
+Payload compression shared by the HTTP middleware and the WebSocket
+permessage-deflate extension.
+
+Brotli is used when the `brotli` package is installed and the client
+accepts it, gzip otherwise. Compression competes with request handling
+for the worker's CPU, so each worker has a budget: COMPRESSION_CPU_BUDGET
+CPU-seconds of compression per second. Once a second's budget is spent,
+payloads go out uncompressed until the next second starts.
+"""
+
+import gzip
+import threading
+import time
+from typing import Optional
+
+from app.core.config import settings
+from app.core.metrics import Counter
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSION_INPUT_BYTES = Counter(
+    "compression_input_bytes",
+    "Payload bytes before compression",
+    ["transport", "encoding"],
+)
+
+COMPRESSION_OUTPUT_BYTES = Counter(
+    "compression_output_bytes",
+    "Payload bytes after compression",
+    ["transport", "encoding"],
+)
+
+COMPRESSION_SKIPPED = Counter(
+    "compression_skipped",
+    "Payloads sent uncompressed because the CPU budget was spent",
+    ["transport"],
+)
+
+# Most preferred first
+SUPPORTED_ENCODINGS = ("br", "gzip") if brotli is not None else ("gzip",)
+
+
+class CompressionBudget:
+    """CPU seconds of compression allowed per one-second window"""
+
+    def __init__(self, seconds_per_second: float):
+        self.limit = seconds_per_second
+        self._lock = threading.Lock()
+        self._window_start = time.monotonic()
+        self._spent = 0.0
+
+    def allow(self) -> bool:
+        if self.limit <= 0:
+            return True
+        with self._lock:
+            now = time.monotonic()
+            if now - self._window_start >= 1.0:
+                self._window_start = now
+                self._spent = 0.0
+            return self._spent < self.limit
+
+    def charge(self, seconds: float) -> None:
+        with self._lock:
+            self._spent += seconds
+
+
+def choose_encoding(accept_encoding: str) -> Optional[str]:
+    """Best supported coding the Accept-Encoding header allows, if any"""
+    accepted = {}
+    for part in accept_encoding.split(","):
+        coding, _, params = part.strip().partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[coding.strip().lower()] = quality
+
+    wildcard = accepted.get("*", 0.0)
+    for coding in SUPPORTED_ENCODINGS:
+        if accepted.get(coding, wildcard) > 0:
+            return coding
+    return None
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    """
+    Compress with the configured level and charge the time to the budget.
+    Both zlib and brotli release the GIL, so this may run on the thread pool.
+    """
+    started = time.thread_time()
+    if encoding == "br":
+        compressed = brotli.compress(body, quality=settings.COMPRESSION_BROTLI_QUALITY)
+    else:
+        compressed = gzip.compress(
+            body, compresslevel=settings.COMPRESSION_GZIP_LEVEL, mtime=0
+        )
+    compression_budget.charge(time.thread_time() - started)
+    COMPRESSION_INPUT_BYTES.labels("http", encoding).inc(len(body))
+    COMPRESSION_OUTPUT_BYTES.labels("http", encoding).inc(len(compressed))
+    return compressed
+
+
+# Global budget instance, shared by HTTP and WebSocket compression
+compression_budget = CompressionBudget(settings.COMPRESSION_CPU_BUDGET)
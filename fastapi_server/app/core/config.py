@@ -13,14 +13,82 @@ class Settings(BaseSettings):
     """Pydantic v2 doesn't support parsing List[str] from a plain comma-separated string by default anymore."""
     ALLOWED_HOSTS: Union[str, List[str]] = ""
     LOG_LEVEL: str = ""
+    LOG_FORMAT: str = "json"
+    """Comma-separated route prefix=rate pairs, e.g. "/bin/available=0.1,/ws=0.01"."""
+    LOG_ROUTE_SAMPLE_RATES: str = ""
+    LOG_RATE_LIMIT_BURST: int = 20
+    LOG_RATE_LIMIT_WINDOW_SECONDS: float = 10.0
+    """Span exporter: "" (tracing off), "json" or "otlp"."""
+    TRACE_EXPORTER: str = ""
+    TRACE_JSON_PATH: str = "traces.jsonl"
+    TRACE_OTLP_ENDPOINT: str = "http://localhost:4318/v1/traces"
+    TRACE_SAMPLE_RATE: float = 1.0
+    LOOP_MONITOR_ENABLED: bool = True
+    LOOP_MONITOR_INTERVAL_SECONDS: float = 0.1
+    LOOP_STALL_THRESHOLD_SECONDS: float = 0.25
+    """Enables /admin routes and per-request profiling; empty disables both."""
+    ADMIN_TOKEN: str = ""
+    PROFILE_MAX_SECONDS: float = 60.0
+    PROFILE_SAMPLE_INTERVAL_SECONDS: float = 0.005
+    """tracemalloc traceback depth to start with; 0 leaves it off until started via /admin."""
+    TRACEMALLOC_FRAMES: int = 0
+    MEMORY_SAMPLE_RATE: float = 0.01
+    WS_MEMORY_BUDGET_BYTES: int = 64 * 1024 * 1024
+    """Directory for /ws/detect session recordings; empty disables recording."""
+    WS_RECORD_DIR: str = ""
+    WS_RECORD_SAMPLE_RATE: float = 1.0
+    WS_RECORD_MAX_SESSION_BYTES: int = 256 * 1024 * 1024
+    """permessage-deflate for WebSockets whose client offers it; applies to app.launcher."""
+    WS_PER_MESSAGE_DEFLATE: bool = True
+    WS_DEFLATE_LEVEL: int = 1
+    WS_DEFLATE_WINDOW_BITS: int = 12
+    WS_DEFLATE_MIN_BYTES: int = 512
+    """gzip, or brotli when installed, for HTTP responses of at least COMPRESSION_MIN_BYTES."""
+    COMPRESSION_ENABLED: bool = True
+    COMPRESSION_MIN_BYTES: int = 1024
+    COMPRESSION_GZIP_LEVEL: int = 6
+    COMPRESSION_BROTLI_QUALITY: int = 4
+    """Bodies this large are compressed on the thread pool instead of the event loop."""
+    COMPRESSION_OFFLOAD_BYTES: int = 128 * 1024
+    """CPU seconds per second a worker may spend compressing (HTTP and WebSocket); 0 = no limit."""
+    COMPRESSION_CPU_BUDGET: float = 0.25
     GOOGLE_FIREBASE_CREDENTIALS: str = ""
     GOOGLE_STORAGE_CREDENTIALS: str = ""
     ROBOFLOW_MODEL_URL: str = ""
     ROBOFLOW_API_KEY: str = ""
     ROBOFLOW_MODEL_ID: str = ""
     GEMINI_API_KEY: str = ""
+    """Shared cache tier: "memory" (per worker), "sqlite" (per node) or "redis"."""
+    CACHE_BACKEND: str = "memory"
+    """Empty: trasholini-cache.sqlite3 in /dev/shm, or the temp directory."""
+    CACHE_SQLITE_PATH: str = ""
+    CACHE_REDIS_URL: str = "redis://localhost:6379/0"
+    CACHE_REDIS_POOL_SIZE: int = 8
+    CACHE_TIMEOUT_SECONDS: float = 0.2
+    """While the Redis cache is unreachable, calls fail fast and it is probed once per interval."""
+    CACHE_RETRY_INTERVAL_SECONDS: float = 5.0
+    CACHE_MAX_ENTRIES: int = 10000
+    """Lifetime of the per-user version tokens behind ETags; an expired token costs one full response."""
+    ETAG_VERSION_TTL_SECONDS: int = 24 * 3600
+    """Per-worker cache of /disposal/history pages, checked against the history version."""
+    HISTORY_CACHE_MAX_BYTES: int = 32 * 1024 * 1024
+    HISTORY_CACHE_MAX_PAGES_PER_USER: int = 8
     GCS_BUCKET_NAME: str = ""
+    BINS_CATALOG_TTL_SECONDS: float = 300.0
+    """Least time between catalog reloads forced by an unknown bin id."""
+    BINS_CATALOG_MIN_RELOAD_SECONDS: float = 10.0
+    HEALTH_PROBE_INTERVAL_SECONDS: float = 15.0
+    HEALTH_PROBE_TIMEOUT_SECONDS: float = 5.0
+    """Send the detector one blank frame at startup to open its connection."""
+    WARMUP_DETECTOR: bool = True
     ENVIRONMENT: str = "development"
+    SERVER_HOST: str = "0.0.0.0"
+    SERVER_PORT: int = 8000
+    """Workers forked by app.launcher; 0 means one per CPU."""
+    WEB_CONCURRENCY: int = 0
+    """Private memory per worker before app.launcher replaces it; 0 disables."""
+    WORKER_MAX_MEMORY_BYTES: int = 1024 * 1024 * 1024
+    WORKER_GRACEFUL_TIMEOUT_SECONDS: int = 30
 
     @field_validator("ALLOWED_HOSTS", mode="before")
     def assemble_cors_origins(cls, v: Union[str, List[str]]) -> Union[List[str], str]:
@@ -0,0 +1,192 @@
+"""
+ETags and conditional GETs for read endpoints.
+
+An ETag is a hash of the versions of everything a response is built from,
+so `If-None-Match` can be answered with 304 before any Firestore read:
+
+- the bins catalog: its content hash, `bins_catalog.version`
+- per-user resources (RESOURCE_*): a random token in the shared cache tier,
+  replaced by `bump()` after every write to that resource
+
+A reader takes the current token, creating one if there is none, before it
+reads Firestore, and a writer bumps only after its write has committed, so
+a token is never paired with data older than itself. A missing or expired
+token just means one full response.
+
+A bump that fails (backend timeout, SQLite busy) must not leave the old
+token in place, or clients would get 304s, and workers cached pages, for
+data that has changed until the token expires. `bump()` reports the
+failure to the writer and keeps retrying in the background until the new
+token is written; until then this worker hands out no token for that
+resource at all.
+
+Per-user tokens have to be seen by every worker that may serve the user.
+With CACHE_BACKEND=memory that only holds for a single worker, so with
+several workers (WEB_CONCURRENCY > 1) per-user ETags are turned off there
+and those endpoints answer in full.
+"""
+
+import asyncio
+import hashlib
+import uuid
+from typing import Dict, Optional
+
+from fastapi import Request, Response
+
+from app.core.cache import Cache, CacheBackendError, cache_backend
+from app.core.config import settings
+from app.core.logging import logger
+from app.core.metrics import Counter
+
+RESOURCE_PROFILE = "profile"
+RESOURCE_HISTORY = "history"
+RESOURCE_USER_BINS = "user_bins"
+USER_RESOURCES = (RESOURCE_PROFILE, RESOURCE_HISTORY, RESOURCE_USER_BINS)
+
+# Shared by everyone, changes with a deploy or a catalog edit
+CACHE_PUBLIC_REVALIDATE = "public, no-cache"
+# Per-user: only the client may keep it, and must check back every time
+CACHE_PRIVATE_REVALIDATE = "private, no-cache"
+
+VERSION_BUMP_FAILURES = Counter(
+    "etag_version_bump_failures",
+    "Version token writes that failed and were retried in the background",
+    ["resource"],
+)
+
+# Backoff between background retries of a failed bump, in seconds
+BUMP_RETRY_INITIAL_DELAY = 0.1
+BUMP_RETRY_MAX_DELAY = 5.0
+
+# Suffixes CompressionMiddleware appends to the ETag of an encoded body
+_ENCODING_SUFFIXES = ("-br", "-gzip")
+
+
+def make_etag(*parts: str) -> str:
+    """Strong ETag for a response determined by `parts`"""
+    digest = hashlib.sha1("|".join(parts).encode("utf-8")).hexdigest()[:20]
+    return f'"{digest}"'
+
+
+def _normalize(tag: str) -> str:
+    tag = tag.strip()
+    if tag.startswith("W/"):
+        tag = tag[2:]
+    for suffix in _ENCODING_SUFFIXES:
+        if tag.endswith(suffix + '"'):
+            return tag[: -len(suffix) - 1] + '"'
+    return tag
+
+
+def etag_matches(request: Request, etag: Optional[str]) -> bool:
+    """
+    Whether If-None-Match names `etag`. Uses the weak comparison RFC 9110
+    prescribes for If-None-Match and ignores the content-coding suffix.
+    """
+    if etag is None:
+        return False
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    return any(_normalize(tag) == etag for tag in header.split(","))
+
+
+def not_modified(etag: str, cache_control: str) -> Response:
+    return Response(
+        status_code=304, headers={"ETag": etag, "Cache-Control": cache_control}
+    )
+
+
+def set_validators(response: Response, etag: Optional[str], cache_control: str) -> None:
+    response.headers["Cache-Control"] = cache_control
+    if etag is not None:
+        response.headers["ETag"] = etag
+
+
+class ResourceVersions:
+    def __init__(self, cache: Cache):
+        self.cache = cache
+        # key -> background task retrying a bump that failed
+        self._pending: Dict[str, asyncio.Task] = {}
+
+    @property
+    def enabled(self) -> bool:
+        return getattr(cache_backend, "shared", False) or settings.WEB_CONCURRENCY <= 1
+
+    @staticmethod
+    def _key(resource: str, user_id: str) -> str:
+        return f"{resource}:{user_id}"
+
+    async def current(self, resource: str, user_id: str) -> Optional[str]:
+        """
+        The resource's version token, created if missing. Call before reading
+        the data the response is built from. None when per-user versions are
+        off.
+        """
+        if not self.enabled:
+            return None
+        key = self._key(resource, user_id)
+        if key in self._pending:
+            # The stored token may predate a committed write
+            return None
+        version = await self.cache.get(key)
+        if version is None:
+            version = uuid.uuid4().hex
+            await self.cache.set(key, version)
+        return version
+
+    async def _write(self, key: str) -> None:
+        await self.cache.set(key, uuid.uuid4().hex, raise_errors=True)
+
+    async def _retry(self, key: str) -> None:
+        delay = BUMP_RETRY_INITIAL_DELAY
+        loop = asyncio.get_running_loop()
+        # Past the TTL the old token has expired on its own
+        deadline = loop.time() + self.cache.ttl
+        while loop.time() < deadline:
+            await asyncio.sleep(delay)
+            try:
+                await self._write(key)
+                logger.info("Version token %s replaced after retrying", key)
+                return
+            except CacheBackendError:
+                delay = min(delay * 2, BUMP_RETRY_MAX_DELAY)
+
+    def _retry_finished(self, key: str, task: asyncio.Task) -> None:
+        if self._pending.get(key) is task:
+            del self._pending[key]
+
+    async def bump(self, resource: str, user_id: str) -> bool:
+        """
+        Call after a write to the resource has committed. Returns False if
+        the new token could not be written; it is then retried in the
+        background and this worker serves the resource without a token.
+        """
+        key = self._key(resource, user_id)
+        try:
+            await self._write(key)
+        except CacheBackendError as e:
+            VERSION_BUMP_FAILURES.labels(resource).inc()
+            logger.error(f"Failed to bump version token {key}, retrying: {e}")
+            if key not in self._pending:
+                task = asyncio.ensure_future(self._retry(key))
+                self._pending[key] = task
+                task.add_done_callback(lambda done: self._retry_finished(key, done))
+            return False
+
+        pending = self._pending.pop(key, None)
+        if pending is not None:
+            pending.cancel()
+        return True
+
+    async def bump_all(self, user_id: str) -> bool:
+        results = [await self.bump(resource, user_id) for resource in USER_RESOURCES]
+        return all(results)
+
+
+# Global instance, shared by the routers
+resource_versions = ResourceVersions(
+    Cache("resource_versions", ttl=settings.ETAG_VERSION_TTL_SECONDS)
+)
@@ -0,0 +1,118 @@
+"""
+Readiness state: the startup warm-up flag plus cached dependency probes.
+
+Probes are plain blocking callables that raise on failure. A background task
+runs them every HEALTH_PROBE_INTERVAL_SECONDS (each bounded by
+HEALTH_PROBE_TIMEOUT_SECONDS) and caches the outcome, so /readyz and
+/livez answer from memory and a probe storm never reaches Firestore.
+"""
+
+import asyncio
+import time
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Optional
+
+from app.core.config import settings
+from app.core.logging import logger
+from app.core.request_context import run_in_executor
+
+
+class HealthMonitor:
+    def __init__(self, interval: float, timeout: float):
+        self.interval = interval
+        self.timeout = timeout
+        self.started_at = time.time()
+        self.warmed_up = False
+        self.warmup: Dict[str, Dict[str, Any]] = {}
+        self._probes: Dict[str, Callable[[], Any]] = {}
+        self._required: Dict[str, bool] = {}
+        self.statuses: Dict[str, Dict[str, Any]] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    def register(self, name: str, probe: Callable[[], Any], required: bool = True):
+        """Required probes must pass for the worker to report ready"""
+        self._probes[name] = probe
+        self._required[name] = required
+
+    def set_status(self, name: str, ok: bool, error: Optional[str] = None, **extra):
+        """Record a status for a dependency that has no periodic probe"""
+        self.statuses[name] = {
+            "status": "ok" if ok else "error",
+            "error": error,
+            "checked_at": datetime.now(timezone.utc).isoformat(),
+            **extra,
+        }
+        self._required.setdefault(name, False)
+
+    async def _run_probe(self, name: str, probe: Callable[[], Any]) -> None:
+        started = time.perf_counter()
+        error = None
+        try:
+            await asyncio.wait_for(run_in_executor(probe), self.timeout)
+        except asyncio.TimeoutError:
+            error = f"timed out after {self.timeout}s"
+        except Exception as e:
+            error = str(e)
+
+        previous = self.statuses.get(name, {}).get("status")
+        self.set_status(
+            name,
+            error is None,
+            error,
+            latency_ms=round((time.perf_counter() - started) * 1000, 1),
+        )
+        if error and previous != "error":
+            logger.warning(f"Health probe {name} failed: {error}")
+        elif not error and previous == "error":
+            logger.info("Health probe %s recovered", name)
+
+    async def probe_all(self) -> None:
+        await asyncio.gather(
+            *(self._run_probe(name, probe) for name, probe in self._probes.items())
+        )
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            await self.probe_all()
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    @property
+    def ready(self) -> bool:
+        if not self.warmed_up:
+            return False
+        return all(
+            self.statuses.get(name, {}).get("status") == "ok"
+            for name, required in self._required.items()
+            if required
+        )
+
+    def report(self) -> Dict[str, Any]:
+        return {
+            "status": "ready" if self.ready else "not_ready",
+            "warmed_up": self.warmed_up,
+            "uptime_seconds": round(time.time() - self.started_at, 1),
+            "dependencies": {
+                name: {**status, "required": self._required.get(name, False)}
+                for name, status in self.statuses.items()
+            },
+            "warmup": self.warmup,
+        }
+
+
+# Global monitor instance
+health_monitor = HealthMonitor(
+    settings.HEALTH_PROBE_INTERVAL_SECONDS, settings.HEALTH_PROBE_TIMEOUT_SECONDS
+)
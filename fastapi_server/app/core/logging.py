@@ -1,21 +1,220 @@
+import atexit
+import json
 import logging
+import os
+import queue
+import random
 import sys
+import threading
+import time
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from typing import Dict, List, Optional, Tuple
 
 from app.core.config import settings
+from app.core.request_context import request_id_var, route_var, user_id_var
 
 # Configure logging levels
 log_level = getattr(logging, settings.LOG_LEVEL.upper(), logging.INFO)
 
-# Configure root logger
-logging.basicConfig(
-    level=log_level,
-    format="{asctime} - {name} - {levelname} - {message}",
-    style="{",
-    datefmt="%Y-%m-%d %H:%M:%S",
-    handlers=[
-        logging.StreamHandler(sys.stdout),
-    ],
+
+class RequestContextFilter(logging.Filter):
+    """Attach the current request's ids to the record in the emitting thread"""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.request_id = request_id_var.get()
+        record.user_id = user_id_var.get()
+        record.route = route_var.get()
+        return True
+
+
+class RouteSamplingFilter(logging.Filter):
+    """
+    Keep only a fraction of INFO/DEBUG records emitted while serving routes
+    configured in LOG_ROUTE_SAMPLE_RATES ("/bin/available=0.1,/ws=0.01").
+    Warnings and errors are never sampled out.
+    """
+
+    def __init__(self, sample_rates: str):
+        super().__init__()
+        self.rates: List[Tuple[str, float]] = []
+        for entry in sample_rates.split(","):
+            if "=" not in entry:
+                continue
+            prefix, rate = entry.split("=", 1)
+            self.rates.append((prefix.strip(), float(rate)))
+        # Longest prefix wins
+        self.rates.sort(key=lambda item: len(item[0]), reverse=True)
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if not self.rates or record.levelno >= logging.WARNING:
+            return True
+        route = getattr(record, "route", None)
+        if not route:
+            return True
+        for prefix, rate in self.rates:
+            if route.startswith(prefix):
+                return random.random() < rate
+        return True
+
+
+# Pass as `extra=` for warnings that must never be dropped (security events)
+NOT_RATE_LIMITED = {"rate_limit": False}
+
+
+class RateLimitFilter(logging.Filter):
+    """
+    Let at most `burst` WARNING/ERROR records from the same call site (file,
+    line) and level through per window. The first record of the next window
+    reports how many were suppressed. Keying on the call site rather than
+    the message also catches f-string messages, which differ on every call.
+
+    INFO and DEBUG pass untouched: the access log is one call site, and its
+    volume is LOG_ROUTE_SAMPLE_RATES' job. CRITICAL and records logged with
+    NOT_RATE_LIMITED always pass.
+    """
+
+    def __init__(self, burst: int, window_seconds: float):
+        super().__init__()
+        self.burst = burst
+        self.window_seconds = window_seconds
+        # key -> [window start, emitted in window, suppressed in window]
+        self._windows: Dict[Tuple[str, int, int], List[float]] = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if (
+            self.burst <= 0
+            or not logging.WARNING <= record.levelno < logging.CRITICAL
+            or getattr(record, "rate_limit", True) is False
+        ):
+            return True
+
+        key = (record.pathname, record.lineno, record.levelno)
+        now = time.monotonic()
+        with self._lock:
+            window = self._windows.get(key)
+            if window is None or now - window[0] >= self.window_seconds:
+                suppressed = int(window[2]) if window else 0
+                self._windows[key] = [now, 1, 0]
+                if len(self._windows) > 10000:
+                    self._windows.clear()
+                if suppressed:
+                    record.suppressed = suppressed
+                return True
+
+            if window[1] < self.burst:
+                window[1] += 1
+                return True
+
+            window[2] += 1
+            return False
+
+
+class DeferredQueueHandler(QueueHandler):
+    """
+    QueueHandler that leaves message interpolation to the listener thread.
+    The stock prepare() formats the record in the caller; the queue is
+    in-process so the record can be passed through untouched.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        payload = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        for field in ("request_id", "user_id", "route", "suppressed"):
+            value = getattr(record, field, None)
+            if value is not None:
+                payload[field] = value
+        if record.exc_info:
+            payload["exc_info"] = self.formatException(record.exc_info)
+        return json.dumps(payload, ensure_ascii=False, default=str)
+
+
+class TextFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        message = super().format(record)
+        request_id = getattr(record, "request_id", None)
+        if request_id:
+            message = f"{message} [request_id={request_id}]"
+        suppressed = getattr(record, "suppressed", None)
+        if suppressed:
+            message = f"{message} [suppressed {suppressed} similar messages]"
+        return message
+
+
+def _build_output_handler() -> logging.Handler:
+    handler = logging.StreamHandler(sys.stdout)
+    if settings.LOG_FORMAT.lower() == "text":
+        handler.setFormatter(
+            TextFormatter(
+                "{asctime} - {name} - {levelname} - {message}",
+                style="{",
+                datefmt="%Y-%m-%d %H:%M:%S",
+            )
+        )
+    else:
+        handler.setFormatter(JsonFormatter())
+    return handler
+
+
+log_queue: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+
+queue_handler = DeferredQueueHandler(log_queue)
+queue_handler.addFilter(RequestContextFilter())
+queue_handler.addFilter(RouteSamplingFilter(settings.LOG_ROUTE_SAMPLE_RATES))
+queue_handler.addFilter(
+    RateLimitFilter(
+        settings.LOG_RATE_LIMIT_BURST, settings.LOG_RATE_LIMIT_WINDOW_SECONDS
+    )
+)
+
+# Only this thread writes to stdout; request handlers just enqueue records
+log_listener: Optional[QueueListener] = QueueListener(
+    log_queue, _build_output_handler(), respect_handler_level=True
 )
+log_listener.start()
+
+
+def stop_log_listener() -> None:
+    """Flush queued records; safe to call more than once"""
+    global log_listener
+    if log_listener is not None:
+        log_listener.stop()
+        log_listener = None
+
+
+atexit.register(stop_log_listener)
+
+
+def _restart_log_listener() -> None:
+    """
+    The listener thread does not survive fork(), and the inherited queue may
+    hold the parent's records or a lock taken mid-get; each worker starts
+    over with a fresh queue and its own listener
+    """
+    global log_queue, log_listener
+    if log_listener is not None:
+        log_queue = queue.SimpleQueue()
+        queue_handler.queue = log_queue
+        log_listener = QueueListener(
+            log_queue, *log_listener.handlers, respect_handler_level=True
+        )
+        log_listener.start()
+
+
+os.register_at_fork(after_in_child=_restart_log_listener)
+
+# Configure root logger
+logging.basicConfig(level=log_level, handlers=[queue_handler])
 
 # Create app logger
 logger = logging.getLogger("app")
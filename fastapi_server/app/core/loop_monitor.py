@@ -0,0 +1,167 @@
+"""
+Event-loop stall detector.
+
+A heartbeat coroutine wakes every LOOP_MONITOR_INTERVAL_SECONDS and records
+how late it was (loop lag). A watchdog thread watches the heartbeat; when it
+has not run for LOOP_STALL_THRESHOLD_SECONDS the loop is blocked, and the
+watchdog captures the loop thread's stack right then - while the blocking
+call is still on it - and reports it with the route and request id of the
+task that was running.
+
+Cost when the loop is healthy is one short sleep per interval on each side.
+"""
+
+import asyncio
+import os
+import sys
+import threading
+import time
+import traceback
+from typing import Dict, List, Optional, Tuple
+
+from starlette.types import Scope
+
+from app.core.config import settings
+from app.core.logging import logger
+from app.core.metrics import Counter, Histogram
+
+LOOP_LAG = Histogram(
+    "event_loop_lag_seconds",
+    "How late the loop monitor heartbeat woke up",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0),
+)
+
+LOOP_STALLS = Counter(
+    "event_loop_stalls",
+    "Loop stalls over the threshold by route and innermost application frame",
+    ["route", "site"],
+)
+
+# Frames under this directory are "ours"; the innermost one names the stall site
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+STACK_LIMIT = 25
+
+
+def _stall_site(frames: List[traceback.FrameSummary]) -> str:
+    """Innermost application frame, falling back to the innermost frame"""
+    for frame in reversed(frames):
+        if frame.filename.startswith(APP_DIR) and not frame.filename.endswith(
+            "loop_monitor.py"
+        ):
+            relative = os.path.relpath(frame.filename, os.path.dirname(APP_DIR))
+            return f"{relative}:{frame.lineno} {frame.name}"
+    if frames:
+        return f"{os.path.basename(frames[-1].filename)}:{frames[-1].lineno} {frames[-1].name}"
+    return "unknown"
+
+
+class LoopMonitor:
+    def __init__(self, interval: float, threshold: float):
+        self.interval = interval
+        self.threshold = threshold
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread_id: Optional[int] = None
+        self._heartbeat_task: Optional[asyncio.Task] = None
+        self._watchdog: Optional[threading.Thread] = None
+        self._stopping = threading.Event()
+        self._last_beat = time.monotonic()
+        # task -> (ASGI scope, request id), maintained by RequestContextMiddleware
+        self._task_requests: Dict[asyncio.Task, Tuple[Scope, Optional[str]]] = {}
+
+    @property
+    def running(self) -> bool:
+        return self._heartbeat_task is not None
+
+    def register_task(self, scope: Scope, request_id: Optional[str]) -> None:
+        """Associate the current task with a request until unregister_task()"""
+        task = asyncio.current_task()
+        if task is not None:
+            self._task_requests[task] = (scope, request_id)
+
+    def unregister_task(self) -> None:
+        task = asyncio.current_task()
+        if task is not None:
+            self._task_requests.pop(task, None)
+
+    def start(self) -> None:
+        """Start monitoring the running loop; call from the loop thread"""
+        if self.running:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread_id = threading.get_ident()
+        self._last_beat = time.monotonic()
+        self._stopping.clear()
+        self._heartbeat_task = self._loop.create_task(self._heartbeat())
+        self._watchdog = threading.Thread(
+            target=self._watch, name="loop-watchdog", daemon=True
+        )
+        self._watchdog.start()
+        logger.info(
+            "Loop monitor started (interval %.3fs, stall threshold %.3fs)",
+            self.interval,
+            self.threshold,
+        )
+
+    async def stop(self) -> None:
+        if not self.running:
+            return
+        self._stopping.set()
+        self._heartbeat_task.cancel()
+        try:
+            await self._heartbeat_task
+        except asyncio.CancelledError:
+            pass
+        self._heartbeat_task = None
+        self._watchdog.join(timeout=self.interval * 4)
+        self._watchdog = None
+
+    async def _heartbeat(self) -> None:
+        while True:
+            expected = time.monotonic() + self.interval
+            await asyncio.sleep(self.interval)
+            now = time.monotonic()
+            LOOP_LAG.observe(max(now - expected, 0.0))
+            self._last_beat = now
+
+    def _watch(self) -> None:
+        reported_beat = None
+        while not self._stopping.wait(self.interval):
+            last_beat = self._last_beat
+            blocked_for = time.monotonic() - last_beat
+            # One report per stall: the heartbeat value identifies the stall
+            if blocked_for >= self.threshold and last_beat != reported_beat:
+                reported_beat = last_beat
+                try:
+                    self._report_stall(blocked_for)
+                except Exception as e:
+                    logger.warning(f"Loop monitor failed to report a stall: {e}")
+
+    def _report_stall(self, blocked_for: float) -> None:
+        frame = sys._current_frames().get(self._loop_thread_id)
+        frames = traceback.extract_stack(frame, limit=STACK_LIMIT) if frame else []
+
+        # Reading the loop's current task from another thread is a plain dict
+        # lookup; the loop thread is blocked so it cannot change underneath us
+        task = asyncio.current_task(self._loop)
+        scope, request_id = self._task_requests.get(task, (None, None))
+        route = "-"
+        if scope is not None:
+            # Route templates once matched keep the metric labels bounded
+            route = getattr(scope.get("route"), "path", None) or scope["path"]
+        site = _stall_site(frames)
+
+        LOOP_STALLS.labels(route, site).inc()
+        logger.warning(
+            "Event loop blocked for %.3fs at %s (route %s, request_id %s)\n%s",
+            blocked_for,
+            site,
+            route,
+            request_id,
+            "".join(traceback.format_list(frames)),
+        )
+
+
+# Global monitor instance
+loop_monitor = LoopMonitor(
+    settings.LOOP_MONITOR_INTERVAL_SECONDS, settings.LOOP_STALL_THRESHOLD_SECONDS
+)
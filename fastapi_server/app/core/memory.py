@@ -0,0 +1,153 @@
+"""
+Memory instrumentation: tracemalloc snapshots and diffs for the admin API,
+per-route peak allocation sampling, and the resident set size gauge.
+
+tracemalloc is off unless started (TRACEMALLOC_FRAMES > 0 at startup, or via
+the admin API), since tracing every allocation slows the process down. Route
+peaks are only sampled while it is on.
+"""
+
+import os
+import random
+import tracemalloc
+from collections import OrderedDict
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterator, List, Optional
+
+from app.core.config import settings
+from app.core.metrics import Gauge, Histogram
+
+MAX_STORED_SNAPSHOTS = 5
+
+ROUTE_PEAK_ALLOCATION = Histogram(
+    "route_peak_allocation_bytes",
+    "Peak traced allocation above the starting point during sampled requests",
+    ["route"],
+    buckets=tuple(2**power for power in range(16, 31, 2)),
+)
+
+PROCESS_RSS = Gauge(
+    "process_resident_memory_bytes",
+    "Resident set size of this worker",
+)
+
+_PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+
+def resident_memory_bytes() -> int:
+    """RSS from /proc/self/statm; 0 where procfs is not available"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * _PAGE_SIZE
+    except (OSError, IndexError, ValueError):
+        return 0
+
+
+PROCESS_RSS.set_function(resident_memory_bytes)
+
+
+class MemoryTracker:
+    def __init__(self, sample_rate: float):
+        self.sample_rate = sample_rate
+        # tracemalloc has one process-wide peak, so one sampled request at a time
+        self._sampling = False
+        self.snapshots: "OrderedDict[str, tracemalloc.Snapshot]" = OrderedDict()
+
+    @property
+    def tracing(self) -> bool:
+        return tracemalloc.is_tracing()
+
+    def start(self, frames: int) -> None:
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(frames)
+
+    def stop(self) -> None:
+        tracemalloc.stop()
+        self.snapshots.clear()
+
+    def status(self) -> Dict[str, Any]:
+        current, peak = tracemalloc.get_traced_memory()
+        return {
+            "tracing": self.tracing,
+            "traceback_limit": tracemalloc.get_traceback_limit(),
+            "traced_current_bytes": current,
+            "traced_peak_bytes": peak,
+            "tracemalloc_overhead_bytes": tracemalloc.get_tracemalloc_memory(),
+            "rss_bytes": resident_memory_bytes(),
+            "snapshots": list(self.snapshots),
+        }
+
+    def take_snapshot(self) -> str:
+        """Store a snapshot (filtered of tracemalloc's own frames) and return its id"""
+        snapshot = tracemalloc.take_snapshot().filter_traces(
+            (
+                tracemalloc.Filter(False, tracemalloc.__file__),
+                tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+            )
+        )
+        snapshot_id = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S.%f")
+        self.snapshots[snapshot_id] = snapshot
+        while len(self.snapshots) > MAX_STORED_SNAPSHOTS:
+            self.snapshots.popitem(last=False)
+        return snapshot_id
+
+    @staticmethod
+    def _format_stat(stat) -> Dict[str, Any]:
+        entry = {
+            "size_bytes": stat.size,
+            "count": stat.count,
+            "traceback": [f"{f.filename}:{f.lineno}" for f in stat.traceback],
+        }
+        size_diff = getattr(stat, "size_diff", None)
+        if size_diff is not None:
+            entry["size_diff_bytes"] = size_diff
+            entry["count_diff"] = stat.count_diff
+        return entry
+
+    def top(
+        self, snapshot_id: str, key_type: str = "lineno", limit: int = 25
+    ) -> Optional[List[Dict[str, Any]]]:
+        snapshot = self.snapshots.get(snapshot_id)
+        if snapshot is None:
+            return None
+        return [
+            self._format_stat(stat) for stat in snapshot.statistics(key_type)[:limit]
+        ]
+
+    def diff(
+        self, old_id: str, new_id: str, key_type: str = "lineno", limit: int = 25
+    ) -> Optional[List[Dict[str, Any]]]:
+        """Largest growth first; missing snapshot ids return None"""
+        old, new = self.snapshots.get(old_id), self.snapshots.get(new_id)
+        if old is None or new is None:
+            return None
+        return [
+            self._format_stat(stat) for stat in new.compare_to(old, key_type)[:limit]
+        ]
+
+    @contextmanager
+    def sample_request(self, scope) -> Iterator[None]:
+        """Record this request's peak allocation if tracing and it is sampled"""
+        if (
+            self._sampling
+            or not tracemalloc.is_tracing()
+            or random.random() >= self.sample_rate
+        ):
+            yield
+            return
+
+        self._sampling = True
+        start, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        try:
+            yield
+        finally:
+            _, peak = tracemalloc.get_traced_memory()
+            self._sampling = False
+            route = getattr(scope.get("route"), "path", "unmatched")
+            ROUTE_PEAK_ALLOCATION.labels(route).observe(max(peak - start, 0))
+
+
+# Global tracker instance
+memory_tracker = MemoryTracker(settings.MEMORY_SAMPLE_RATE)
@@ -0,0 +1,308 @@
+"""
+Minimal Prometheus-compatible metrics.
+
+Counters and histograms are plain Python numbers updated without locks:
+almost every update happens on the event loop thread, and the few made from
+executor threads can at worst lose an increment under contention, which is
+an acceptable trade for keeping the hot path free of lock traffic.
+"""
+
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from app.core.tracing import SPAN_KIND_CLIENT, start_span
+
+# Latency buckets in seconds, from in-process work up to slow upstream calls
+DEFAULT_BUCKETS: Tuple[float, ...] = (
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    pairs = ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values))
+    return f"{{{pairs}}}"
+
+
+class _Metric:
+    metric_type = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[Tuple[str, ...], object] = {}
+        REGISTRY.register(self)
+
+    @property
+    def exposed_name(self) -> str:
+        return self.name
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def labels(self, *values: str):
+        key = tuple(str(value) for value in values)
+        child = self._children.get(key)
+        if child is None:
+            child = self._children.setdefault(key, self._new_child())
+        return child
+
+    def _render_samples(self) -> List[str]:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        name = self.exposed_name
+        lines = [
+            f"# HELP {name} {self.documentation}",
+            f"# TYPE {name} {self.metric_type}",
+        ]
+        lines.extend(self._render_samples())
+        return "\n".join(lines)
+
+
+class _CounterChild:
+    __slots__ = ("value",)
+
+    def __init__(self):
+        self.value = 0.0
+
+    def inc(self, amount: float = 1.0) -> None:
+        self.value += amount
+
+
+class Counter(_Metric):
+    metric_type = "counter"
+
+    @property
+    def exposed_name(self) -> str:
+        return f"{self.name}_total"
+
+    def _new_child(self) -> _CounterChild:
+        return _CounterChild()
+
+    def inc(self, amount: float = 1.0) -> None:
+        self.labels().inc(amount)
+
+    def _render_samples(self) -> List[str]:
+        return [
+            f"{self.name}_total{_format_labels(self.labelnames, key)} {child.value}"
+            for key, child in list(self._children.items())
+        ]
+
+
+class _HistogramChild:
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets: Tuple[float, ...]):
+        self.buckets = buckets
+        # One slot per bucket plus +Inf; cumulative sums are built when rendering
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    @contextmanager
+    def time(self) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start)
+
+
+class Histogram(_Metric):
+    metric_type = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ):
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, documentation, labelnames)
+
+    def _new_child(self) -> _HistogramChild:
+        return _HistogramChild(self.buckets)
+
+    def observe(self, value: float) -> None:
+        self.labels().observe(value)
+
+    def time(self):
+        return self.labels().time()
+
+    def _render_samples(self) -> List[str]:
+        lines = []
+        bucket_labelnames = self.labelnames + ("le",)
+        for key, child in list(self._children.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), child.counts):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                labels = _format_labels(bucket_labelnames, key + (le,))
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {child.sum}")
+            lines.append(f"{self.name}_count{labels} {child.count}")
+        return lines
+
+
+class Gauge(_Metric):
+    """Gauge whose value is read from a callback at scrape time"""
+
+    metric_type = "gauge"
+
+    def __init__(self, name: str, documentation: str):
+        self._function: Optional[Callable[[], float]] = None
+        super().__init__(name, documentation)
+
+    def set_function(self, function: Callable[[], float]) -> None:
+        self._function = function
+
+    def _render_samples(self) -> List[str]:
+        if self._function is None:
+            return []
+        try:
+            return [f"{self.exposed_name} {float(self._function())}"]
+        except Exception:
+            return []
+
+
+class CounterFunction(Gauge):
+    """Counter whose running total is read from a callback at scrape time"""
+
+    metric_type = "counter"
+
+    @property
+    def exposed_name(self) -> str:
+        return f"{self.name}_total"
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+
+    def register(self, metric: _Metric) -> None:
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric {metric.name} is already registered")
+        self._metrics[metric.name] = metric
+
+    def render(self) -> str:
+        return "\n".join(metric.render() for metric in self._metrics.values()) + "\n"
+
+
+REGISTRY = Registry()
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+# Application metrics
+
+HTTP_REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency by route template",
+    ["method", "route", "status"],
+)
+
+INFERENCE_DURATION = Histogram(
+    "detection_inference_seconds",
+    "Time spent in WasteDetectionService.run_inference",
+)
+
+IMAGE_DECODE_DURATION = Histogram(
+    "image_decode_seconds",
+    "Time to decode an uploaded or base64 image into a PIL image",
+    ["source"],
+)
+
+GEMINI_REQUEST_DURATION = Histogram(
+    "gemini_request_seconds",
+    "Gemini disposal-tip generation latency",
+    ["outcome"],
+    buckets=(0.25, 0.5, 1.0, 2.0, 4.0, 8.0, 16.0, 32.0),
+)
+
+CACHE_REQUESTS = Counter(
+    "cache_requests",
+    "In-process cache lookups by cache and result (hit/miss)",
+    ["cache", "result"],
+)
+
+DEPENDENCY_CALL_DURATION = Histogram(
+    "dependency_call_seconds",
+    "Firestore and Cloud Storage call latency by operation",
+    ["service", "operation", "outcome"],
+)
+
+PROCESS_CPU = CounterFunction(
+    "process_cpu_seconds",
+    "User and system CPU time consumed by this worker",
+)
+PROCESS_CPU.set_function(time.process_time)
+
+WEBSOCKET_CONNECTIONS = Gauge(
+    "websocket_connections",
+    "Currently connected /ws/detect clients",
+)
+
+WEBSOCKET_BUDGET_REJECTIONS = Counter(
+    "websocket_memory_budget_rejections",
+    "Detect frames rejected for exceeding the per-connection memory budget",
+)
+
+WEBSOCKET_FRAMES = Counter(
+    "websocket_frames",
+    "WebSocket messages received by type",
+    ["type"],
+)
+
+
+@contextmanager
+def track_dependency(service: str, operation: str) -> Iterator[None]:
+    """
+    Time a blocking Firestore/GCS call and trace it as a client span:
+        with track_dependency("firestore", "profiles.query"):
+    """
+    start = time.perf_counter()
+    outcome = "error"
+    try:
+        with start_span(
+            f"{service} {operation}",
+            kind=SPAN_KIND_CLIENT,
+            **{"peer.service": service, "operation": operation},
+        ):
+            yield
+        outcome = "ok"
+    finally:
+        DEPENDENCY_CALL_DURATION.labels(service, operation, outcome).observe(
+            time.perf_counter() - start
+        )
+
+
+def record_cache_lookup(cache: str, hit: bool) -> None:
+    CACHE_REQUESTS.labels(cache, "hit" if hit else "miss").inc()
@@ -0,0 +1,216 @@
+"""
+In-process sampling profiler.
+
+A daemon thread snapshots every thread's stack with sys._current_frames() at
+a fixed interval and counts identical stacks. Output is either collapsed
+stacks ("frame;frame;frame count", for flamegraph.pl / speedscope import) or
+speedscope's JSON format. Only one profile may run per worker at a time.
+
+Request profiles sample only the event loop thread, and only while the
+profiled request's task is the one running; time the request spends awaiting
+I/O is therefore not in its profile.
+"""
+
+import asyncio
+import os
+import sys
+import threading
+import time
+from collections import Counter as CounterDict, OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.core.config import settings
+
+# Only one profile per process; request and worker profiles share the lock
+_profile_lock = threading.Lock()
+
+# Finished request profiles kept for retrieval via the admin API
+MAX_STORED_PROFILES = 20
+MAX_STACK_DEPTH = 128
+
+_SITE_PACKAGES_MARKER = f"site-packages{os.sep}"
+_APP_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+class ProfilerBusyError(Exception):
+    """Raised when a profile is requested while another one is running"""
+
+
+def _short_filename(filename: str) -> str:
+    if _SITE_PACKAGES_MARKER in filename:
+        return filename.split(_SITE_PACKAGES_MARKER, 1)[1]
+    if filename.startswith(_APP_ROOT):
+        return os.path.relpath(filename, _APP_ROOT)
+    return os.path.basename(filename)
+
+
+def _frame_label(code) -> str:
+    # Keyed by function, not line, so samples in one function aggregate
+    return f"{code.co_name} ({_short_filename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class Profile:
+    def __init__(self, name: str, interval: float):
+        self.name = name
+        self.interval = interval
+        self.started_at = time.time()
+        self.duration = 0.0
+        self.samples: "CounterDict[Tuple[str, ...]]" = CounterDict()
+
+    @property
+    def sample_count(self) -> int:
+        return sum(self.samples.values())
+
+    def collapsed(self) -> str:
+        """Brendan Gregg's collapsed stack format, heaviest stacks first"""
+        return "".join(
+            f"{';'.join(stack)} {count}\n"
+            for stack, count in self.samples.most_common()
+        )
+
+    def speedscope(self) -> Dict[str, Any]:
+        frames: List[Dict[str, str]] = []
+        frame_index: Dict[str, int] = {}
+        samples: List[List[int]] = []
+        weights: List[float] = []
+
+        for stack, count in self.samples.most_common():
+            indexed = []
+            for label in stack:
+                if label not in frame_index:
+                    frame_index[label] = len(frames)
+                    frames.append({"name": label})
+                indexed.append(frame_index[label])
+            samples.append(indexed)
+            weights.append(round(count * self.interval, 6))
+
+        return {
+            "$schema": "https://www.speedscope.app/file-format-schema.json",
+            "shared": {"frames": frames},
+            "profiles": [
+                {
+                    "type": "sampled",
+                    "name": self.name,
+                    "unit": "seconds",
+                    "startValue": 0,
+                    "endValue": round(sum(weights), 6),
+                    "samples": samples,
+                    "weights": weights,
+                }
+            ],
+            "name": self.name,
+            "activeProfileIndex": 0,
+            "exporter": "app.core.profiler",
+        }
+
+
+class SamplingProfiler:
+    """
+    Samples all threads, or only the event loop thread while `task` runs.
+    Use start()/stop(); stop() returns the finished Profile.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        interval: float,
+        loop: Optional[asyncio.AbstractEventLoop] = None,
+        loop_thread_id: Optional[int] = None,
+        task: Optional[asyncio.Task] = None,
+    ):
+        self.profile = Profile(name, interval)
+        self.interval = interval
+        self._loop = loop
+        self._loop_thread_id = loop_thread_id
+        self._task = task
+        self._stopping = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._started = 0.0
+
+    def start(self) -> None:
+        if not _profile_lock.acquire(blocking=False):
+            raise ProfilerBusyError("A profile is already running in this worker")
+        self._started = time.perf_counter()
+        self._thread = threading.Thread(
+            target=self._run, name="sampling-profiler", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> Profile:
+        try:
+            self._stopping.set()
+            if self._thread is not None:
+                self._thread.join()
+            self.profile.duration = time.perf_counter() - self._started
+            return self.profile
+        finally:
+            _profile_lock.release()
+
+    def _run(self) -> None:
+        own_id = threading.get_ident()
+        thread_names = {}
+        samples = self.profile.samples
+
+        while not self._stopping.wait(self.interval):
+            if self._task is not None:
+                # Request profile: the loop thread, only while our task runs
+                if asyncio.current_task(self._loop) is not self._task:
+                    continue
+                frame = sys._current_frames().get(self._loop_thread_id)
+                if frame is not None:
+                    samples[self._collapse(frame, "event-loop")] += 1
+                continue
+
+            if len(thread_names) != threading.active_count():
+                thread_names = {t.ident: t.name for t in threading.enumerate()}
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                name = thread_names.get(thread_id, str(thread_id))
+                samples[self._collapse(frame, name)] += 1
+
+    @staticmethod
+    def _collapse(frame, thread_name: str) -> Tuple[str, ...]:
+        labels = []
+        while frame is not None and len(labels) < MAX_STACK_DEPTH:
+            labels.append(_frame_label(frame.f_code))
+            frame = frame.f_back
+        labels.append(thread_name)
+        labels.reverse()
+        return tuple(labels)
+
+
+async def profile_worker(seconds: float) -> Profile:
+    """Profile every thread of this worker for `seconds`"""
+    profiler = SamplingProfiler(
+        f"worker {os.getpid()}", settings.PROFILE_SAMPLE_INTERVAL_SECONDS
+    )
+    profiler.start()
+    try:
+        await asyncio.sleep(seconds)
+    finally:
+        profile = profiler.stop()
+    return profile
+
+
+def start_request_profile(name: str) -> SamplingProfiler:
+    """Profile the current task (the request) on the loop thread; raises ProfilerBusyError"""
+    profiler = SamplingProfiler(
+        name,
+        settings.PROFILE_SAMPLE_INTERVAL_SECONDS,
+        loop=asyncio.get_running_loop(),
+        loop_thread_id=threading.get_ident(),
+        task=asyncio.current_task(),
+    )
+    profiler.start()
+    return profiler
+
+
+# request id -> finished request profile, oldest evicted first
+stored_profiles: "OrderedDict[str, Profile]" = OrderedDict()
+
+
+def store_profile(profile_id: str, profile: Profile) -> None:
+    stored_profiles[profile_id] = profile
+    while len(stored_profiles) > MAX_STORED_PROFILES:
+        stored_profiles.popitem(last=False)
@@ -0,0 +1,23 @@
+import asyncio
+import contextvars
+from contextvars import ContextVar
+from typing import Any, Callable, Optional, TypeVar
+
+T = TypeVar("T")
+
+# Set by RequestContextMiddleware for the lifetime of each HTTP request, so
+# code that has no Request object (logging, services) can still see them
+request_id_var: ContextVar[Optional[str]] = ContextVar("request_id", default=None)
+user_id_var: ContextVar[Optional[str]] = ContextVar("user_id", default=None)
+route_var: ContextVar[Optional[str]] = ContextVar("route", default=None)
+
+
+async def run_in_executor(func: Callable[..., T], *args: Any) -> T:
+    """
+    loop.run_in_executor(None, ...) that runs `func` in a copy of the caller's
+    context, so request ids and the current trace span follow it into the
+    worker thread.
+    """
+    loop = asyncio.get_running_loop()
+    context = contextvars.copy_context()
+    return await loop.run_in_executor(None, context.run, func, *args)
@@ -0,0 +1,60 @@
+"""
+JSON encoding for HTTP responses, WebSocket messages and cache entries,
+on orjson.
+
+`dumps` covers what Firestore hands back: DatetimeWithNanoseconds (a
+datetime subclass orjson will not take natively) and protobuf Timestamps
+become ISO 8601 strings, pydantic models their field dicts, numpy scalars
+(from the detector) plain numbers. `loads` raises json.JSONDecodeError
+subclasses, so existing `except json.JSONDecodeError` handlers still apply.
+"""
+
+from datetime import date, datetime, timezone
+from decimal import Decimal
+from typing import Any
+
+import orjson
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+
+
+def _default(obj: Any) -> Any:
+    if isinstance(obj, BaseModel):
+        return obj.model_dump()
+    if isinstance(obj, (datetime, date)):
+        return obj.isoformat()
+    to_datetime = getattr(obj, "ToDatetime", None)
+    if to_datetime is not None:
+        # google.protobuf.Timestamp
+        return to_datetime(tzinfo=timezone.utc).isoformat()
+    if isinstance(obj, (set, frozenset, tuple)):
+        return list(obj)
+    if isinstance(obj, Decimal):
+        return float(obj)
+    raise TypeError(f"Type is not JSON serializable: {type(obj).__name__}")
+
+
+def dumps(obj: Any) -> bytes:
+    return orjson.dumps(obj, default=_default, option=_OPTIONS)
+
+
+def dumps_text(obj: Any) -> str:
+    """For WebSocket text frames"""
+    return orjson.dumps(obj, default=_default, option=_OPTIONS).decode("utf-8")
+
+
+loads = orjson.loads
+JSONDecodeError = orjson.JSONDecodeError
+
+
+class AppJSONResponse(JSONResponse):
+    """
+    Default response class. Endpoints can also return one directly with a
+    pydantic model as content, which skips FastAPI's re-validation of the
+    return value against response_model.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
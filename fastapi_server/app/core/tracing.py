@@ -0,0 +1,318 @@
+"""
+Lightweight request tracing.
+
+A root span is opened per HTTP request by RequestContextMiddleware; its trace
+id is the request's X-Request-ID without dashes, so a slow request in the logs
+maps straight to its trace. Child spans nest through a ContextVar, which
+follows awaits and - via request_context.run_in_executor - executor threads.
+
+Finished spans are handed to a background thread and written either as JSON
+lines (TRACE_EXPORTER=json) or posted as OTLP/HTTP JSON to a collector
+(TRACE_EXPORTER=otlp). With no exporter configured no spans are created.
+"""
+
+import atexit
+import json
+import os
+import queue
+import random
+import sys
+import threading
+import time
+import urllib.request
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, List, Optional
+
+from app.core.config import settings
+from app.core.request_context import request_id_var
+
+# OTLP span kinds
+SPAN_KIND_INTERNAL = 1
+SPAN_KIND_SERVER = 2
+SPAN_KIND_CLIENT = 3
+
+EXPORT_BATCH_SIZE = 256
+EXPORT_INTERVAL_SECONDS = 2.0
+EXPORT_QUEUE_SIZE = 4096
+
+
+class Span:
+    __slots__ = (
+        "trace_id",
+        "span_id",
+        "parent_id",
+        "name",
+        "kind",
+        "start_ns",
+        "end_ns",
+        "attributes",
+        "error",
+    )
+
+    def __init__(
+        self,
+        name: str,
+        trace_id: str,
+        parent_id: Optional[str],
+        kind: int = SPAN_KIND_INTERNAL,
+        attributes: Optional[Dict[str, Any]] = None,
+    ):
+        self.trace_id = trace_id
+        self.span_id = os.urandom(8).hex()
+        self.parent_id = parent_id
+        self.name = name
+        self.kind = kind
+        self.start_ns = time.time_ns()
+        self.end_ns = 0
+        self.attributes: Dict[str, Any] = attributes or {}
+        self.error: Optional[str] = None
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    @property
+    def duration_ms(self) -> float:
+        return (self.end_ns - self.start_ns) / 1e6
+
+    def to_json(self) -> Dict[str, Any]:
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_span_id": self.parent_id,
+            "name": self.name,
+            "start_time_unix_nano": self.start_ns,
+            "end_time_unix_nano": self.end_ns,
+            "duration_ms": round(self.duration_ms, 3),
+            "attributes": self.attributes,
+            "status": "error" if self.error else "ok",
+            "error": self.error,
+        }
+
+    def to_otlp(self) -> Dict[str, Any]:
+        otlp: Dict[str, Any] = {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "name": self.name,
+            "kind": self.kind,
+            "startTimeUnixNano": str(self.start_ns),
+            "endTimeUnixNano": str(self.end_ns),
+            "attributes": [_otlp_attribute(k, v) for k, v in self.attributes.items()],
+            "status": (
+                {"code": 2, "message": self.error} if self.error else {"code": 1}
+            ),
+        }
+        if self.parent_id:
+            otlp["parentSpanId"] = self.parent_id
+        return otlp
+
+
+def _otlp_attribute(key: str, value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        return {"key": key, "value": {"boolValue": value}}
+    if isinstance(value, int):
+        return {"key": key, "value": {"intValue": str(value)}}
+    if isinstance(value, float):
+        return {"key": key, "value": {"doubleValue": value}}
+    return {"key": key, "value": {"stringValue": str(value)}}
+
+
+class JsonFileExporter:
+    def __init__(self, path: str):
+        self.path = path
+
+    def export(self, spans: List[Span]) -> None:
+        with open(self.path, "a", encoding="utf-8") as f:
+            for span in spans:
+                f.write(json.dumps(span.to_json(), default=str) + "\n")
+
+
+class OtlpHttpExporter:
+    """OTLP/HTTP with the JSON encoding, accepted by the OpenTelemetry Collector"""
+
+    def __init__(self, endpoint: str, service_name: str, timeout: float = 5.0):
+        self.endpoint = endpoint
+        self.timeout = timeout
+        self.resource = {
+            "attributes": [_otlp_attribute("service.name", service_name or "app")]
+        }
+
+    def export(self, spans: List[Span]) -> None:
+        body = {
+            "resourceSpans": [
+                {
+                    "resource": self.resource,
+                    "scopeSpans": [
+                        {
+                            "scope": {"name": "app.core.tracing"},
+                            "spans": [span.to_otlp() for span in spans],
+                        }
+                    ],
+                }
+            ]
+        }
+        request = urllib.request.Request(
+            self.endpoint,
+            data=json.dumps(body, default=str).encode("utf-8"),
+            headers={"Content-Type": "application/json"},
+            method="POST",
+        )
+        with urllib.request.urlopen(request, timeout=self.timeout) as response:
+            response.read()
+
+
+class BatchSpanProcessor:
+    """
+    Buffers finished spans and exports them from one daemon thread, so the
+    request path only does a non-blocking queue put. Spans are dropped when
+    the queue is full rather than slowing requests down.
+    """
+
+    def __init__(self, exporter):
+        self.exporter = exporter
+        self.dropped = 0
+        self.start()
+
+    def start(self) -> None:
+        """Start the export thread with an empty queue (again after fork)"""
+        self._queue: "queue.Queue[Optional[Span]]" = queue.Queue(EXPORT_QUEUE_SIZE)
+        self._thread = threading.Thread(
+            target=self._run, name="span-exporter", daemon=True
+        )
+        self._thread.start()
+
+    def on_end(self, span: Span) -> None:
+        try:
+            self._queue.put_nowait(span)
+        except queue.Full:
+            self.dropped += 1
+
+    def _export(self, batch: List[Span]) -> None:
+        if not batch:
+            return
+        try:
+            self.exporter.export(batch)
+        except Exception as e:
+            # Logging here would re-enter the request path; stderr is enough
+            print(
+                f"Span export failed ({len(batch)} spans): {e}",
+                file=sys.stderr,
+                flush=True,
+            )
+
+    def _run(self) -> None:
+        batch: List[Span] = []
+        deadline = time.monotonic() + EXPORT_INTERVAL_SECONDS
+        while True:
+            try:
+                span = self._queue.get(timeout=max(deadline - time.monotonic(), 0))
+            except queue.Empty:
+                span = None
+            else:
+                if span is None:
+                    self._export(batch)
+                    return
+                batch.append(span)
+
+            if len(batch) >= EXPORT_BATCH_SIZE or time.monotonic() >= deadline:
+                self._export(batch)
+                batch = []
+                deadline = time.monotonic() + EXPORT_INTERVAL_SECONDS
+
+    def shutdown(self) -> None:
+        """Flush buffered spans and stop the export thread"""
+        self._queue.put(None)
+        self._thread.join(timeout=10)
+
+
+def _build_processor() -> Optional[BatchSpanProcessor]:
+    exporter_name = settings.TRACE_EXPORTER.lower()
+    if exporter_name == "json":
+        return BatchSpanProcessor(JsonFileExporter(settings.TRACE_JSON_PATH))
+    if exporter_name == "otlp":
+        return BatchSpanProcessor(
+            OtlpHttpExporter(settings.TRACE_OTLP_ENDPOINT, settings.APP_NAME)
+        )
+    return None
+
+
+span_processor: Optional[BatchSpanProcessor] = _build_processor()
+
+
+def _restart_span_processor() -> None:
+    # Pre-forked workers (app.launcher) inherit the processor but not its thread
+    if span_processor is not None:
+        span_processor.start()
+
+
+os.register_at_fork(after_in_child=_restart_span_processor)
+
+# The innermost open span of the current request/task
+current_span_var: ContextVar[Optional[Span]] = ContextVar("current_span", default=None)
+
+
+def tracing_enabled() -> bool:
+    return span_processor is not None
+
+
+def trace_id_from_request_id(request_id: Optional[str]) -> str:
+    """uuid4 request ids are exactly 32 hex digits once the dashes are removed"""
+    if request_id:
+        trace_id = request_id.replace("-", "")
+        if len(trace_id) == 32:
+            return trace_id
+    return os.urandom(16).hex()
+
+
+@contextmanager
+def start_span(
+    name: str,
+    kind: int = SPAN_KIND_INTERNAL,
+    root: bool = False,
+    **attributes: Any,
+) -> Iterator[Optional[Span]]:
+    """
+    Open a span as a child of the current one:
+        with start_span("gemini.generate_content", waste_class=waste_class):
+    Yields None when tracing is off or the request was not sampled. A span
+    with no parent starts a new trace only when `root` is set, so code
+    running outside a request (scripts, background jobs) is not traced.
+    """
+    processor = span_processor
+    if processor is None:
+        yield None
+        return
+
+    parent = current_span_var.get()
+    if parent is None:
+        if not root or random.random() >= settings.TRACE_SAMPLE_RATE:
+            yield None
+            return
+        request_id = request_id_var.get()
+        span = Span(name, trace_id_from_request_id(request_id), None, kind, attributes)
+        if request_id:
+            span.attributes["request.id"] = request_id
+    else:
+        span = Span(name, parent.trace_id, parent.span_id, kind, attributes)
+
+    token = current_span_var.set(span)
+    try:
+        yield span
+    except BaseException as e:
+        span.error = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        current_span_var.reset(token)
+        span.end_ns = time.time_ns()
+        processor.on_end(span)
+
+
+def shutdown_tracing() -> None:
+    """Flush pending spans; safe to call more than once"""
+    global span_processor
+    if span_processor is not None:
+        span_processor.shutdown()
+        span_processor = None
+
+
+atexit.register(shutdown_tracing)
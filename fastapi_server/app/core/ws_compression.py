@@ -0,0 +1,84 @@
+"""
+permessage-deflate (RFC 7692) tuned for /ws/detect.
+
+uvicorn negotiates the extension with zlib defaults: level 6 and a 32 KiB
+window, i.e. roughly 300 KiB of compressor state per connection, spent on
+every frame including tiny pongs. WebSocketProtocol replaces that offer
+with WS_DEFLATE_LEVEL and a 2**WS_DEFLATE_WINDOW_BITS window for both
+directions, and sends a message uncompressed (which the RFC allows per
+message) when it is under WS_DEFLATE_MIN_BYTES or the worker's compression
+CPU budget is spent.
+
+Pass it as `ws=` to uvicorn.Config; app.launcher does.
+"""
+
+import time
+
+from uvicorn.protocols.websockets.websockets_impl import (
+    WebSocketProtocol as UvicornWebSocketProtocol,
+)
+from websockets import frames
+from websockets.extensions.permessage_deflate import (
+    PerMessageDeflate,
+    ServerPerMessageDeflateFactory,
+)
+
+from app.core.compression import (
+    COMPRESSION_INPUT_BYTES,
+    COMPRESSION_OUTPUT_BYTES,
+    COMPRESSION_SKIPPED,
+    compression_budget,
+)
+from app.core.config import settings
+
+
+class BudgetedPerMessageDeflate(PerMessageDeflate):
+    def encode(self, frame: frames.Frame) -> frames.Frame:
+        if frame.opcode in frames.CTRL_OPCODES:
+            return frame
+        # Only whole messages may be skipped; a fragment's compression is
+        # decided by its first frame
+        if frame.opcode is not frames.OP_CONT and frame.fin:
+            if len(frame.data) < settings.WS_DEFLATE_MIN_BYTES:
+                return frame
+            if not compression_budget.allow():
+                COMPRESSION_SKIPPED.labels("websocket").inc()
+                return frame
+
+        started = time.thread_time()
+        encoded = super().encode(frame)
+        compression_budget.charge(time.thread_time() - started)
+        COMPRESSION_INPUT_BYTES.labels("websocket", "deflate").inc(len(frame.data))
+        COMPRESSION_OUTPUT_BYTES.labels("websocket", "deflate").inc(len(encoded.data))
+        return encoded
+
+
+class BudgetedPerMessageDeflateFactory(ServerPerMessageDeflateFactory):
+    def process_request_params(self, params, accepted_extensions):
+        response_params, extension = super().process_request_params(
+            params, accepted_extensions
+        )
+        return response_params, BudgetedPerMessageDeflate(
+            extension.remote_no_context_takeover,
+            extension.local_no_context_takeover,
+            extension.remote_max_window_bits,
+            extension.local_max_window_bits,
+            extension.compress_settings,
+        )
+
+
+def deflate_extension_factory() -> BudgetedPerMessageDeflateFactory:
+    return BudgetedPerMessageDeflateFactory(
+        server_max_window_bits=settings.WS_DEFLATE_WINDOW_BITS,
+        client_max_window_bits=settings.WS_DEFLATE_WINDOW_BITS,
+        compress_settings={"level": settings.WS_DEFLATE_LEVEL, "memLevel": 5},
+    )
+
+
+class WebSocketProtocol(UvicornWebSocketProtocol):
+    """uvicorn's websockets protocol with the extension offer above"""
+
+    def __init__(self, config, server_state, app_state, _loop=None):
+        super().__init__(config, server_state, app_state, _loop)
+        if config.ws_per_message_deflate:
+            self.available_extensions = [deflate_extension_factory()]
@@ -0,0 +1,184 @@
+"""
+Record /ws/detect sessions to disk for replay by benchmarks/ws_replay.py.
+
+With WS_RECORD_DIR set, a sampled share of sessions (WS_RECORD_SAMPLE_RATE)
+is written to one `.wsrec` file each: a magic, a JSON header, then one record
+per client message:
+
+    offset_ms   uint32  milliseconds since the session was accepted
+    kind        uint8   KIND_TEXT, KIND_DETECT, KIND_PING or KIND_CLOSE
+    length      uint32  payload length
+    payload     bytes
+
+Detect messages that are exactly {"type": "detect", "image": <base64>} are
+stored as the raw image bytes (a quarter smaller than the base64 text) and
+pings as an empty payload; anything else is kept verbatim as UTF-8 text, so
+replay sends back exactly what the phone sent. A session stops recording once
+its file reaches WS_RECORD_MAX_SESSION_BYTES.
+"""
+
+import base64
+import binascii
+import json
+import os
+import random
+import struct
+import time
+import uuid
+from datetime import datetime, timezone
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+from app.core.config import settings
+from app.core.logging import logger
+from app.core.request_context import run_in_executor
+
+MAGIC = b"TWSR\x01"
+RECORD_HEADER = struct.Struct("<IBI")
+HEADER_LENGTH = struct.Struct("<I")
+
+KIND_TEXT = 0
+KIND_DETECT = 1
+KIND_PING = 2
+KIND_CLOSE = 3
+
+_PING_MESSAGE = json.dumps({"type": "ping"})
+
+
+class Record(NamedTuple):
+    offset: float
+    kind: int
+    message: Optional[str]
+
+
+def encode_message(message: str) -> Tuple[int, bytes]:
+    """Pick the most compact lossless kind for a client message"""
+    try:
+        data = json.loads(message)
+    except json.JSONDecodeError:
+        data = None
+
+    if isinstance(data, dict):
+        if data == {"type": "ping"}:
+            return KIND_PING, b""
+        if set(data) == {"type", "image"} and data["type"] == "detect":
+            image = data["image"]
+            try:
+                raw = base64.b64decode(image, validate=True)
+            except (binascii.Error, TypeError, ValueError):
+                raw = None
+            if raw is not None and base64.b64encode(raw).decode("ascii") == image:
+                return KIND_DETECT, raw
+
+    return KIND_TEXT, message.encode("utf-8")
+
+
+def decode_message(kind: int, payload: bytes) -> Optional[str]:
+    if kind == KIND_DETECT:
+        return json.dumps(
+            {"type": "detect", "image": base64.b64encode(payload).decode("ascii")}
+        )
+    if kind == KIND_PING:
+        return _PING_MESSAGE
+    if kind == KIND_CLOSE:
+        return None
+    return payload.decode("utf-8")
+
+
+def read_session(path: str) -> Tuple[Dict[str, Any], List[Record]]:
+    """Header and records of a recording; a truncated tail is dropped"""
+    records = []
+    with open(path, "rb") as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"{path} is not a WebSocket session recording")
+        (header_length,) = HEADER_LENGTH.unpack(f.read(HEADER_LENGTH.size))
+        header = json.loads(f.read(header_length))
+
+        while True:
+            raw_header = f.read(RECORD_HEADER.size)
+            if len(raw_header) < RECORD_HEADER.size:
+                break
+            offset_ms, kind, length = RECORD_HEADER.unpack(raw_header)
+            payload = f.read(length)
+            if len(payload) < length:
+                break
+            records.append(
+                Record(offset_ms / 1000, kind, decode_message(kind, payload))
+            )
+    return header, records
+
+
+class SessionRecorder:
+    def __init__(self, path: str, max_bytes: int):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.started = time.monotonic()
+        self.written = 0
+        self._file = None
+
+    def _offset_ms(self) -> int:
+        return int((time.monotonic() - self.started) * 1000)
+
+    def _write(self, offset_ms: int, kind: int, payload: bytes) -> None:
+        if self._file is None:
+            return
+        record = RECORD_HEADER.pack(offset_ms, kind, len(payload)) + payload
+        if self.written + len(record) > self.max_bytes:
+            logger.warning(f"WebSocket recording {self.path} reached its size cap")
+            self._close_file()
+            return
+        self._file.write(record)
+        self.written += len(record)
+
+    def _open(self, header: Dict[str, Any]) -> None:
+        encoded = json.dumps(header).encode("utf-8")
+        self._file = open(self.path, "wb")
+        self._file.write(MAGIC + HEADER_LENGTH.pack(len(encoded)) + encoded)
+        self.written = self._file.tell()
+
+    def _record_message(self, offset_ms: int, message: str) -> None:
+        kind, payload = encode_message(message)
+        self._write(offset_ms, kind, payload)
+
+    def _close_file(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def _finish(self, offset_ms: int) -> None:
+        self._write(offset_ms, KIND_CLOSE, b"")
+        self._close_file()
+
+    async def open(self, path: str) -> None:
+        await run_in_executor(
+            self._open,
+            {
+                "started_at": datetime.now(timezone.utc).isoformat(),
+                "path": path,
+                "app_version": settings.APP_VERSION,
+            },
+        )
+
+    async def record(self, message: str) -> None:
+        # Offsets are taken on arrival, before waiting for the writer thread
+        await run_in_executor(self._record_message, self._offset_ms(), message)
+
+    async def close(self) -> None:
+        await run_in_executor(self._finish, self._offset_ms())
+
+
+async def start_session_recording(path: str) -> Optional[SessionRecorder]:
+    """A recorder for this session, or None if recording is off or not sampled"""
+    if not settings.WS_RECORD_DIR or random.random() >= settings.WS_RECORD_SAMPLE_RATE:
+        return None
+
+    name = f"{datetime.now(timezone.utc):%Y%m%dT%H%M%S}-{uuid.uuid4().hex[:8]}.wsrec"
+    recorder = SessionRecorder(
+        os.path.join(settings.WS_RECORD_DIR, name),
+        settings.WS_RECORD_MAX_SESSION_BYTES,
+    )
+    try:
+        await recorder.open(path)
+    except OSError as e:
+        logger.error(f"Could not start WebSocket recording: {e}")
+        return None
+    return recorder
@@ -0,0 +1,328 @@
+"""
+Production launcher: preload once, fork N uvicorn workers.
+
+The master imports the app and the heavy SDKs (inference_sdk with opencv
+and numpy, google.genai, the Firestore/GCS libraries), calls gc.freeze() so
+the collector never touches those objects again, binds the listening socket
+and forks the workers. Module code and data imported before the fork stay
+shared copy-on-write, so each extra worker costs its private memory only.
+
+SDK clients are not built in the master: gRPC channels and HTTP connection
+pools do not survive fork(). Each worker builds its own during its lifespan
+warm-up (see app/services/warmup.py).
+
+The master respawns workers that exit, and replaces a worker whose private
+memory passes WORKER_MAX_MEMORY_BYTES: the replacement is started first,
+then the old worker gets SIGTERM and drains its in-flight requests. SIGTERM
+or SIGINT to the master shuts all workers down gracefully.
+
+A worker that dies within WORKER_MIN_UPTIME_SECONDS of starting (bad
+credentials, failed warm-up) counts as a crash. Respawns after consecutive
+crashes back off exponentially up to RESPAWN_MAX_DELAY_SECONDS, so a broken
+deploy costs one attempt per interval instead of a fork loop.
+
+Usage:
+    python -m app.launcher [--workers N] [--host 0.0.0.0] [--port 8000]
+"""
+
+import argparse
+import gc
+import importlib
+import os
+import signal
+import socket
+import sys
+import time
+from typing import Dict, Optional
+
+from app.core.config import settings
+from app.core.logging import logger, stop_log_listener
+
+# Imported in the master so their code and data are shared by all workers
+PRELOAD_MODULES = (
+    "inference_sdk",
+    "google.genai",
+    "google.cloud.firestore",
+    "google.cloud.storage",
+)
+
+MONITOR_INTERVAL_SECONDS = 5.0
+
+# A worker exiting sooner than this after its start counts as a crash
+WORKER_MIN_UPTIME_SECONDS = 10.0
+RESPAWN_INITIAL_DELAY_SECONDS = 1.0
+RESPAWN_MAX_DELAY_SECONDS = 60.0
+
+
+def default_workers() -> int:
+    """One worker per CPU this process may run on"""
+    if hasattr(os, "sched_getaffinity"):
+        return max(len(os.sched_getaffinity(0)), 1)
+    return os.cpu_count() or 1
+
+
+def private_memory_bytes(pid: int) -> int:
+    """
+    Pages only this process holds (Private_Clean + Private_Dirty), i.e. what
+    it costs on top of what it shares with the master; falls back to RSS
+    """
+    try:
+        private = 0
+        with open(f"/proc/{pid}/smaps_rollup") as f:
+            for line in f:
+                if line.startswith(("Private_Clean:", "Private_Dirty:")):
+                    private += int(line.split()[1]) * 1024
+        return private
+    except (OSError, ValueError, IndexError):
+        pass
+    try:
+        with open(f"/proc/{pid}/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return 0
+
+
+def event_loop_and_http() -> Dict[str, str]:
+    """uvloop and httptools when installed, uvicorn's pure-Python ones otherwise"""
+    options = {"loop": "asyncio", "http": "h11"}
+    try:
+        import uvloop  # noqa: F401
+
+        options["loop"] = "uvloop"
+    except ImportError:
+        pass
+    try:
+        import httptools  # noqa: F401
+
+        options["http"] = "httptools"
+    except ImportError:
+        pass
+    return options
+
+
+def preload():
+    """Import the app and heavy SDKs in the master, then freeze the heap"""
+    started = time.perf_counter()
+    for module in PRELOAD_MODULES:
+        try:
+            importlib.import_module(module)
+        except ImportError as e:
+            logger.warning(f"Could not preload {module}: {e}")
+
+    from app.main import app
+
+    # Objects that exist now are never collected; keeping the collector off
+    # them keeps their pages shared with the workers
+    gc.collect()
+    gc.freeze()
+    logger.info(
+        "Preloaded app in %.2fs, %d objects frozen",
+        time.perf_counter() - started,
+        gc.get_freeze_count(),
+    )
+    return app
+
+
+def bind_socket(host: str, port: int) -> socket.socket:
+    family = socket.AF_INET6 if ":" in host else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(2048)
+    sock.set_inheritable(True)
+    return sock
+
+
+def run_worker(app, sock: socket.socket, options: Dict[str, str]) -> None:
+    """Body of a forked worker; never returns"""
+    import uvicorn
+
+    from app.core.ws_compression import WebSocketProtocol
+
+    # The master's handlers do not apply here; uvicorn installs its own
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+
+    config = uvicorn.Config(
+        app,
+        loop=options["loop"],
+        http=options["http"],
+        lifespan="on",
+        ws=WebSocketProtocol,
+        ws_per_message_deflate=settings.WS_PER_MESSAGE_DEFLATE,
+        timeout_graceful_shutdown=settings.WORKER_GRACEFUL_TIMEOUT_SECONDS,
+    )
+    server = uvicorn.Server(config)
+    exit_code = 0
+    try:
+        server.run(sockets=[sock])
+    except Exception as e:
+        logger.error(f"Worker {os.getpid()} crashed: {e}", exc_info=True)
+        exit_code = 1
+    finally:
+        # os._exit skips atexit, so flush queued log records first
+        stop_log_listener()
+        os._exit(exit_code)
+
+
+class Master:
+    def __init__(self, app, sock: socket.socket, workers: int, max_memory: int):
+        self.app = app
+        self.sock = sock
+        self.target_workers = workers
+        self.max_memory = max_memory
+        self.options = event_loop_and_http()
+        self.workers: Dict[int, float] = {}  # pid -> start time
+        self.retiring: Dict[int, float] = {}  # pid -> SIGTERM time
+        self.stopping = False
+        self.crashes = 0  # consecutive workers that died right after starting
+        self.next_spawn_at = 0.0
+
+    def spawn(self) -> int:
+        # Unflushed output would be written twice, once by the child
+        sys.stdout.flush()
+        sys.stderr.flush()
+        pid = os.fork()
+        if pid == 0:
+            run_worker(self.app, self.sock, self.options)
+        self.workers[pid] = time.monotonic()
+        logger.info("Started worker %d", pid)
+        return pid
+
+    def retire(self, pid: int, reason: str) -> None:
+        logger.warning(f"Retiring worker {pid}: {reason}")
+        self.workers.pop(pid, None)
+        self.retiring[pid] = time.monotonic()
+        try:
+            os.kill(pid, signal.SIGTERM)
+        except ProcessLookupError:
+            self.retiring.pop(pid, None)
+
+    def reap(self) -> None:
+        while True:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                return
+            if pid == 0:
+                return
+            if self.retiring.pop(pid, None) is not None:
+                logger.info("Worker %d exited after retirement", pid)
+                continue
+            started = self.workers.pop(pid, None)
+            if started is not None and not self.stopping:
+                logger.error(
+                    f"Worker {pid} exited unexpectedly (status {os.waitstatus_to_exitcode(status)})"
+                )
+                self.record_exit(time.monotonic() - started)
+
+    def record_exit(self, uptime: float) -> None:
+        """Back off respawns while workers keep dying right after starting"""
+        if uptime >= WORKER_MIN_UPTIME_SECONDS:
+            self.crashes = 0
+            return
+        self.crashes += 1
+        delay = min(
+            RESPAWN_INITIAL_DELAY_SECONDS * 2 ** (self.crashes - 1),
+            RESPAWN_MAX_DELAY_SECONDS,
+        )
+        self.next_spawn_at = time.monotonic() + delay
+        logger.warning(
+            f"Worker crashed during startup ({self.crashes} in a row), "
+            f"respawning in {delay:.0f}s"
+        )
+
+    def kill_overdue(self) -> None:
+        """Workers that did not drain within the graceful timeout are killed"""
+        deadline = settings.WORKER_GRACEFUL_TIMEOUT_SECONDS + 5
+        for pid, retired_at in list(self.retiring.items()):
+            if time.monotonic() - retired_at > deadline:
+                logger.warning(f"Killing worker {pid}: did not exit after SIGTERM")
+                try:
+                    os.kill(pid, signal.SIGKILL)
+                except ProcessLookupError:
+                    pass
+
+    def check_memory(self) -> None:
+        # One replacement at a time, so capacity never drops by more than a worker
+        if not self.max_memory or self.retiring:
+            return
+        for pid in list(self.workers):
+            used = private_memory_bytes(pid)
+            if used > self.max_memory:
+                self.spawn()
+                self.retire(pid, f"private memory {used // 1048576} MB over the limit")
+                return
+
+    def handle_stop(self, signum, _frame) -> None:
+        self.stopping = True
+
+    def run(self) -> None:
+        signal.signal(signal.SIGTERM, self.handle_stop)
+        signal.signal(signal.SIGINT, self.handle_stop)
+
+        for _ in range(self.target_workers):
+            self.spawn()
+
+        last_memory_check = time.monotonic()
+        while not self.stopping:
+            time.sleep(0.5)
+            self.reap()
+            self.kill_overdue()
+            while (
+                len(self.workers) < self.target_workers
+                and not self.stopping
+                and time.monotonic() >= self.next_spawn_at
+            ):
+                self.spawn()
+            if time.monotonic() - last_memory_check >= MONITOR_INTERVAL_SECONDS:
+                last_memory_check = time.monotonic()
+                self.check_memory()
+
+        self.shutdown()
+
+    def shutdown(self) -> None:
+        logger.info("Shutting down %d workers", len(self.workers))
+        for pid in list(self.workers):
+            self.retire(pid, "shutdown")
+        while self.retiring:
+            time.sleep(0.2)
+            self.reap()
+            self.kill_overdue()
+        self.sock.close()
+
+
+def main(argv: Optional[list] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--host", default=settings.SERVER_HOST)
+    parser.add_argument("--port", type=int, default=settings.SERVER_PORT)
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=settings.WEB_CONCURRENCY or default_workers(),
+    )
+    parser.add_argument(
+        "--max-worker-memory",
+        type=int,
+        default=settings.WORKER_MAX_MEMORY_BYTES,
+        help="Private bytes per worker before it is replaced; 0 disables",
+    )
+    args = parser.parse_args(argv)
+    # Read by the app, e.g. to tell whether per-worker caches are consistent
+    settings.WEB_CONCURRENCY = args.workers
+
+    app = preload()
+    sock = bind_socket(args.host, args.port)
+    logger.info(
+        "Listening on %s:%d with %d workers (%s)",
+        args.host,
+        args.port,
+        args.workers,
+        event_loop_and_http(),
+    )
+    Master(app, sock, args.workers, args.max_worker_memory).run()
+    sys.exit(0)
+
+
+if __name__ == "__main__":
+    main()
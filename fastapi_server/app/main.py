@@ -1,23 +1,57 @@
-import time
-import uuid
+import asyncio
 from contextlib import asynccontextmanager
-from fastapi import FastAPI, Request, Response
+from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 import app.core.errors as _
 from app.apis import api_router
+from app.apis.health_router import health_router
+from app.apis.metrics_router import metrics_router
 from app.apis.websocket_router import websocket_router
+from app.core.cache import close_cache
+from app.core.clients import close_clients
 from app.core.config import settings
+from app.core.health import health_monitor
 from app.core.logging import logger
-from app.middlewares.user_id_middleware import UserIDMiddleware
-from typing import Callable, Awaitable
+from app.core.loop_monitor import loop_monitor
+from app.core.memory import memory_tracker
+from app.core.request_context import run_in_executor
+from app.core.serialization import AppJSONResponse
+from app.core.tracing import shutdown_tracing
+from app.middlewares.compression_middleware import CompressionMiddleware
+from app.middlewares.profiling_middleware import RequestProfilingMiddleware
+from app.middlewares.request_context_middleware import RequestContextMiddleware
+from app.services.account_deletion import account_deletion_service
+from app.services.warmup import warm_up
 
 
 @asynccontextmanager
 async def lifespan(_: FastAPI):
     """Startup and shutdown events."""
     logger.info("Application starting up...")
+    if settings.LOOP_MONITOR_ENABLED:
+        loop_monitor.start()
+    if settings.TRACEMALLOC_FRAMES > 0:
+        memory_tracker.start(settings.TRACEMALLOC_FRAMES)
+    # Clients, caches and the detector warm up in the background; /readyz
+    # reports 503 until done, /livez answers right away
+    warmup_task = asyncio.create_task(warm_up())
+    # Also off the startup path: a slow Firestore must not hold up serving
+    resume_task = asyncio.create_task(
+        account_deletion_service.resume_interrupted_jobs()
+    )
     yield
     logger.info("Application shutting down...")
+    for task in (warmup_task, resume_task):
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+    await health_monitor.stop()
+    await close_cache()
+    await run_in_executor(close_clients)
+    await loop_monitor.stop()
+    shutdown_tracing()
 
 
 def create_application() -> FastAPI:
@@ -26,6 +60,7 @@ def create_application() -> FastAPI:
         title=settings.APP_NAME,
         version=settings.APP_VERSION,
         lifespan=lifespan,
+        default_response_class=AppJSONResponse,
     )
 
     # Add CORS middleware
@@ -37,72 +72,22 @@ def create_application() -> FastAPI:
         allow_headers=["*"],
     )
 
-    # Add user ID middleware
-    application.add_middleware(UserIDMiddleware)
-
-    # Request ID middleware
-    @application.middleware("http")
-    async def add_request_id_middleware(
-        request: Request, call_next: Callable[[Request], Awaitable[Response]]
-    ):
-        request_id = str(uuid.uuid4())
-        request.state.request_id = request_id
-
-        # Record request start time
-        start_time = time.time()
-
-        # Log request
-        logger.info(
-            f"Request started: {request.method} {request.url.path} (ID: {request_id})"
-        )
-
-        # Process request
-        try:
-            response = await call_next(request)
-
-            # Log request completion
-            process_time = time.time() - start_time
-            logger.info(
-                f"Request completed: {request.method} {request.url.path} "
-                f"(ID: {request_id}, Status: {response.status_code}, "
-                f"Time: {process_time:.3f}s)"
-            )
-
-            # Add request ID to response headers
-            response.headers["X-Request-ID"] = request_id
-            return response
-        except Exception as e:
-            # Log error and re-raise
-            logger.error(
-                f"Request failed: {request.method} {request.url.path} "
-                f"(ID: {request_id}, Error: {str(e)})",
-                exc_info=True,
-            )
-            raise
+    # Inside the request context layer, so compression counts in request timing
+    if settings.COMPRESSION_ENABLED:
+        application.add_middleware(CompressionMiddleware)
 
-    # Add security headers middleware
-    @application.middleware("http")
-    async def add_security_headers_middleware(
-        request: Request, call_next: Callable[[Request], Awaitable[Response]]
-    ):
-        response = await call_next(request)
-        response.headers["X-Content-Type-Options"] = "nosniff"
-        response.headers["X-Frame-Options"] = "DENY"
-        response.headers["X-XSS-Protection"] = "1; mode=block"
-        response.headers["Referrer-Policy"] = "no-referrer"
-        response.headers["Permissions-Policy"] = "geolocation=(self), microphone=()"
-        response.headers["Content-Security-Policy"] = (
-            "default-src 'self';"
-            "script-src 'self';"
-            "style-src 'self';"
-            "img-src 'self' data:;"
-            "connect-src 'self' ws: wss:"
-        )
+    # Per-request profiling for admins; runs inside the request context layer
+    if settings.ADMIN_TOKEN:
+        application.add_middleware(RequestProfilingMiddleware)
 
-        return response
+    # Request id, user id, timing and security headers in one pure ASGI layer
+    application.add_middleware(RequestContextMiddleware)
 
     application.include_router(api_router, prefix=settings.APP_API_PREFIX)
     application.include_router(websocket_router, prefix=settings.APP_WEB_SOCKET_PREFIX)
+    # Scraped and probed at the root, outside the API prefix
+    application.include_router(metrics_router)
+    application.include_router(health_router)
 
     return application
 
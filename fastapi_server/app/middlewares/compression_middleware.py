@@ -0,0 +1,121 @@
+from typing import Optional
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from app.core.compression import (
+    COMPRESSION_SKIPPED,
+    choose_encoding,
+    compress,
+    compression_budget,
+)
+from app.core.config import settings
+from app.core.request_context import run_in_executor
+
+# Content types worth compressing; images and archives already are
+COMPRESSIBLE_TYPES = (
+    b"application/json",
+    b"text/",
+    b"application/javascript",
+    b"application/xml",
+    b"image/svg+xml",
+)
+
+
+def _header(headers, name: bytes) -> Optional[bytes]:
+    for key, value in headers:
+        if key == name:
+            return value
+    return None
+
+
+class CompressionMiddleware:
+    """
+    Pure ASGI middleware compressing single-body responses (everything the
+    routers return as JSON) with brotli or gzip, per Accept-Encoding.
+
+    A response is sent as-is when it is below COMPRESSION_MIN_BYTES, not a
+    compressible type, already encoded, streamed in several body messages
+    (StreamingResponse, FileResponse) or when this worker's compression CPU
+    budget is spent. Bodies above COMPRESSION_OFFLOAD_BYTES are compressed
+    on the thread pool so a large history page does not stall the loop.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        accept_encoding = _header(scope["headers"], b"accept-encoding")
+        encoding = (
+            choose_encoding(accept_encoding.decode("latin-1"))
+            if accept_encoding
+            else None
+        )
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start_message: Optional[Message] = None
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal start_message
+            if message["type"] == "http.response.start":
+                # Held back until the body shows whether it is worth compressing
+                start_message = message
+                return
+            if message["type"] != "http.response.body" or start_message is None:
+                await send(message)
+                return
+
+            start, start_message = start_message, None
+            body = message.get("body", b"")
+            headers = list(start.get("headers", []))
+            compressible = self._compressible(start["status"], headers)
+            if compressible:
+                headers.append((b"vary", b"Accept-Encoding"))
+                start["headers"] = headers
+
+            if (
+                not compressible
+                or message.get("more_body", False)
+                or len(body) < settings.COMPRESSION_MIN_BYTES
+            ):
+                await send(start)
+                await send(message)
+                return
+
+            if not compression_budget.allow():
+                COMPRESSION_SKIPPED.labels("http").inc()
+                await send(start)
+                await send(message)
+                return
+
+            if len(body) >= settings.COMPRESSION_OFFLOAD_BYTES:
+                compressed = await run_in_executor(compress, body, encoding)
+            else:
+                compressed = compress(body, encoding)
+
+            # A strong ETag names one representation; each coding is another
+            suffix = b"-" + encoding.encode("latin-1") + b'"'
+            start["headers"] = [
+                (key, value[:-1] + suffix if key == b"etag" else value)
+                for key, value in headers
+                if key != b"content-length"
+            ] + [
+                (b"content-encoding", encoding.encode("latin-1")),
+                (b"content-length", str(len(compressed)).encode("latin-1")),
+            ]
+            await send(start)
+            await send({"type": "http.response.body", "body": compressed})
+
+        await self.app(scope, receive, send_wrapper)
+
+    @staticmethod
+    def _compressible(status: int, headers) -> bool:
+        if status < 200 or status in (204, 304):
+            return False
+        if _header(headers, b"content-encoding") is not None:
+            return False
+        content_type = _header(headers, b"content-type")
+        return content_type is not None and content_type.startswith(COMPRESSIBLE_TYPES)
@@ -0,0 +1,50 @@
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from app.core.logging import logger
+from app.core.profiler import ProfilerBusyError, start_request_profile, store_profile
+from app.utils.admin_auth import is_admin_token
+
+
+class RequestProfilingMiddleware:
+    """
+    Profiles a single request when it carries `X-Profile-Request: <ADMIN_TOKEN>`.
+    The profile is stored under the request id, returned as X-Profile-ID, and
+    fetched from GET /admin/profiles/{id}; it never appears in the response body.
+    Only installed when ADMIN_TOKEN is set.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        token = None
+        for name, value in scope["headers"]:
+            if name == b"x-profile-request":
+                token = value.decode("latin-1")
+                break
+        if token is None or not is_admin_token(token):
+            await self.app(scope, receive, send)
+            return
+
+        profile_id = scope.get("state", {}).get("request_id") or "request"
+        try:
+            profiler = start_request_profile(f"{scope['method']} {scope['path']}")
+        except ProfilerBusyError:
+            logger.warning("Request profile skipped: another profile is running")
+            await self.app(scope, receive, send)
+            return
+
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", []))
+                headers.append((b"x-profile-id", profile_id.encode("latin-1")))
+                message["headers"] = headers
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            store_profile(profile_id, profiler.stop())
@@ -0,0 +1,151 @@
+import time
+import uuid
+from typing import List, Optional, Tuple
+from urllib.parse import parse_qsl
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from app.core.logging import logger
+from app.core.loop_monitor import loop_monitor
+from app.core.memory import memory_tracker
+from app.core.metrics import HTTP_REQUEST_DURATION
+from app.core.request_context import request_id_var, route_var, user_id_var
+from app.core.tracing import SPAN_KIND_SERVER, start_span
+
+# Precomputed once; appended to every HTTP response
+SECURITY_HEADERS: List[Tuple[bytes, bytes]] = [
+    (b"x-content-type-options", b"nosniff"),
+    (b"x-frame-options", b"DENY"),
+    (b"x-xss-protection", b"1; mode=block"),
+    (b"referrer-policy", b"no-referrer"),
+    (b"permissions-policy", b"geolocation=(self), microphone=()"),
+    (
+        b"content-security-policy",
+        b"default-src 'self';"
+        b"script-src 'self';"
+        b"style-src 'self';"
+        b"img-src 'self' data:;"
+        b"connect-src 'self' ws: wss:",
+    ),
+]
+
+
+def _extract_user_id(scope: Scope) -> Optional[str]:
+    """X-User-ID header first, then the user_id query parameter"""
+    for name, value in scope["headers"]:
+        if name == b"x-user-id":
+            return value.decode("latin-1") or None
+
+    query_string: bytes = scope.get("query_string", b"")
+    if b"user_id=" in query_string:
+        for name, value in parse_qsl(query_string.decode("latin-1")):
+            if name == "user_id":
+                return value or None
+
+    return None
+
+
+class RequestContextMiddleware:
+    """
+    Pure ASGI middleware that replaces the former UserIDMiddleware and the
+    request-id / security-header `@app.middleware("http")` functions:
+    - assigns a request id and returns it as X-Request-ID
+    - stores request_id and user_id in request.state
+    - logs one line per request with status and duration
+    - records the request latency by route template
+    - opens the root trace span, whose trace id is the request id
+    - tells the loop monitor which request the current task is serving
+    - samples per-route peak allocations while tracemalloc is on
+    - adds the security headers
+
+    Unlike BaseHTTPMiddleware it does not spawn a task or wrap the response
+    body stream; it only wraps `send` to append headers.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] == "websocket":
+            # Long-lived sessions are attributed in loop stall reports too
+            loop_monitor.register_task(scope, None)
+            try:
+                await self.app(scope, receive, send)
+            finally:
+                loop_monitor.unregister_task()
+            return
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request_id = str(uuid.uuid4())
+        user_id = _extract_user_id(scope)
+
+        state = scope.setdefault("state", {})
+        state["request_id"] = request_id
+        state["user_id"] = user_id
+
+        # Visible to logging and services for the rest of this request
+        request_id_token = request_id_var.set(request_id)
+        user_id_token = user_id_var.set(user_id)
+        route_token = route_var.set(scope["path"])
+        loop_monitor.register_task(scope, request_id)
+
+        request_id_header = (b"x-request-id", request_id.encode("latin-1"))
+        status_code = 500
+        start_time = time.perf_counter()
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                headers = list(message.get("headers", []))
+                headers.append(request_id_header)
+                headers.extend(SECURITY_HEADERS)
+                message["headers"] = headers
+            await send(message)
+
+        try:
+            with memory_tracker.sample_request(scope), start_span(
+                f"{scope['method']} {scope['path']}",
+                kind=SPAN_KIND_SERVER,
+                root=True,
+                **{"http.method": scope["method"], "http.target": scope["path"]},
+            ) as span:
+                try:
+                    await self.app(scope, receive, send_wrapper)
+                finally:
+                    if span is not None:
+                        route = scope.get("route")
+                        if route is not None:
+                            span.name = f"{scope['method']} {route.path}"
+                            span.set_attribute("http.route", route.path)
+                        span.set_attribute("http.status_code", status_code)
+        except Exception:
+            logger.error(
+                "Request failed: %s %s",
+                scope["method"],
+                scope["path"],
+                exc_info=True,
+            )
+            raise
+        else:
+            # request_id and user_id are attached to the record by the log filters
+            logger.info(
+                "%s %s %d %.3fs",
+                scope["method"],
+                scope["path"],
+                status_code,
+                time.perf_counter() - start_time,
+            )
+        finally:
+            # The router stores the matched route in scope; templates keep label
+            # cardinality bounded where raw paths contain ids
+            route = scope.get("route")
+            HTTP_REQUEST_DURATION.labels(
+                scope["method"],
+                getattr(route, "path", "unmatched"),
+                str(status_code),
+            ).observe(time.perf_counter() - start_time)
+            request_id_var.reset(request_id_token)
+            user_id_var.reset(user_id_token)
+            route_var.reset(route_token)
+            loop_monitor.unregister_task()
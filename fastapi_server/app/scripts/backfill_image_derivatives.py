@@ -0,0 +1,77 @@
+"""
+Backfill WebP thumbnails and previews for disposal-history records saved
+before the derivative pipeline existed.
+
+Usage:
+    python -m app.scripts.backfill_image_derivatives [--workers 8] [--limit N] [--dry-run]
+"""
+
+import argparse
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Iterator, Tuple
+from app.core.logging import logger
+from app.services.image_derivatives import image_derivative_service
+from app.utils.firestore import iter_documents
+
+PAGE_SIZE = 200
+
+
+def _records_missing_derivatives(limit: int) -> Iterator[Tuple[str, str]]:
+    """Yield (doc_id, image_url) for disposal-history records without thumbnails"""
+    yielded = 0
+    for doc in iter_documents(
+        "disposal-history", ["image_url", "thumbnail_url"], page_size=PAGE_SIZE
+    ):
+        doc_data = doc.to_dict() or {}
+        if doc_data.get("thumbnail_url") or not doc_data.get("image_url"):
+            continue
+
+        yield doc.id, doc_data["image_url"]
+        yielded += 1
+        if limit and yielded >= limit:
+            return
+
+
+def backfill(workers: int, limit: int, dry_run: bool) -> None:
+    processed = 0
+    failed = 0
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {}
+        for doc_id, image_url in _records_missing_derivatives(limit):
+            if dry_run:
+                logger.info(f"[dry-run] Would create derivatives for {doc_id}")
+                processed += 1
+                continue
+
+            future = executor.submit(
+                image_derivative_service.create_derivatives_for_record,
+                doc_id,
+                image_url,
+            )
+            futures[future] = doc_id
+
+        for future in as_completed(futures):
+            doc_id = futures[future]
+            try:
+                future.result()
+                processed += 1
+            except Exception as e:
+                failed += 1
+                logger.warning(f"Failed to backfill derivatives for {doc_id}: {e}")
+
+    logger.info(f"Backfill finished: {processed} processed, {failed} failed")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--limit", type=int, default=0, help="0 means no limit")
+    parser.add_argument("--dry-run", action="store_true")
+    args = parser.parse_args()
+
+    backfill(workers=args.workers, limit=args.limit, dry_run=args.dry_run)
+
+
+if __name__ == "__main__":
+    main()
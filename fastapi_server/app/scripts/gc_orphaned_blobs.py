@@ -0,0 +1,367 @@
+"""
+Garbage-collect images in Cloud Storage that no Firestore document references.
+
+Usage:
+    python -m app.scripts.gc_orphaned_blobs [--dry-run] [--resume]
+        [--state-dir .gc-state] [--min-age-hours 24]
+        [--workers 4] [--batch-size 100] [--max-deletes-per-second 50]
+
+How it works:
+1. Every blob name referenced by disposal-history (image_url and its
+   thumbnail/preview) and profiles (photo_url, photo_urls) is written to a
+   file and externally sorted into `referenced.idx` in the state directory.
+2. `list_blobs` pages through each prefix. GCS lists names in lexicographic
+   order, so each page is merge-joined against the sorted index without
+   loading either side into memory.
+3. Orphans older than --min-age-hours (so uploads whose Firestore write is
+   still in flight are left alone) are deleted in batch requests on a small
+   thread pool, throttled to --max-deletes-per-second.
+4. After each page the next page token is checkpointed, so an interrupted
+   run continues where it stopped with --resume.
+
+A JSON report is written to `report.json` and, in dry-run mode, the orphan
+names to `orphans.txt`.
+"""
+
+import argparse
+import heapq
+import json
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+from app.core.config import settings
+from app.core.logging import logger
+from app.services.avatars import avatar_service
+from app.services.image_derivatives import DERIVATIVE_VARIANTS
+from app.services.image_derivatives import image_derivative_service
+from app.utils.firestore import iter_documents
+from app.utils.storage import storage_client, blob_name_from_public_url
+
+GC_PREFIXES = ["disposal-images/", "profile-images/"]
+
+SORT_CHUNK_SIZE = 100_000
+LIST_PAGE_SIZE = 1000
+MAX_BATCH_SIZE = 100
+
+
+def _disposal_blob_names(doc_data: Dict[str, Any]) -> Iterator[str]:
+    original = blob_name_from_public_url(doc_data.get("image_url") or "")
+    if original:
+        yield original
+        for variant in DERIVATIVE_VARIANTS:
+            yield image_derivative_service.derivative_blob_name(original, variant)
+
+    for field in ("thumbnail_url", "preview_url"):
+        blob_name = blob_name_from_public_url(doc_data.get(field) or "")
+        if blob_name:
+            yield blob_name
+
+
+def _profile_blob_names(doc_data: Dict[str, Any]) -> Iterator[str]:
+    urls = [doc_data.get("photo_url")]
+    urls.extend((doc_data.get("photo_urls") or {}).values())
+
+    for url in urls:
+        blob_name = blob_name_from_public_url(url or "")
+        if not blob_name:
+            continue
+        yield blob_name
+
+        # Every size of a referenced avatar digest is in use
+        user_id = doc_data.get("user_id")
+        filename = blob_name.rsplit("/", 1)[-1]
+        if user_id and filename.endswith(".webp") and "_" in filename:
+            digest = filename.split("_", 1)[0]
+            for size in avatar_service.sizes:
+                yield avatar_service.avatar_blob_name(user_id, digest, size)
+
+
+def _referenced_blob_names() -> Iterator[str]:
+    for doc in iter_documents(
+        "disposal-history", ["image_url", "thumbnail_url", "preview_url"]
+    ):
+        yield from _disposal_blob_names(doc.to_dict() or {})
+
+    for doc in iter_documents("profiles", ["user_id", "photo_url", "photo_urls"]):
+        yield from _profile_blob_names(doc.to_dict() or {})
+
+
+def build_sorted_index(names: Iterable[str], index_path: str) -> int:
+    """External sort: write sorted, de-duplicated names to index_path"""
+    chunk_paths = []
+    directory = os.path.dirname(index_path)
+
+    def _flush(chunk: List[str]) -> None:
+        chunk.sort()
+        fd, path = tempfile.mkstemp(prefix="chunk-", suffix=".idx", dir=directory)
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.writelines(f"{name}\n" for name in chunk)
+        chunk_paths.append(path)
+
+    chunk: List[str] = []
+    for name in names:
+        chunk.append(name)
+        if len(chunk) >= SORT_CHUNK_SIZE:
+            _flush(chunk)
+            chunk = []
+    _flush(chunk)
+
+    count = 0
+    files = [open(path, encoding="utf-8") for path in chunk_paths]
+    try:
+        tmp_index_path = f"{index_path}.tmp"
+        with open(tmp_index_path, "w", encoding="utf-8") as out:
+            previous = None
+            for line in heapq.merge(*files):
+                if line != previous:
+                    out.write(line)
+                    count += 1
+                    previous = line
+        os.replace(tmp_index_path, index_path)
+    finally:
+        for f in files:
+            f.close()
+        for path in chunk_paths:
+            os.remove(path)
+
+    return count
+
+
+class SortedIndexCursor:
+    """Forward-only membership test against a sorted index file"""
+
+    def __init__(self, index_path: str):
+        self._file = open(index_path, encoding="utf-8")
+        self._current: Optional[str] = None
+        self._advance()
+
+    def _advance(self) -> None:
+        line = self._file.readline()
+        self._current = line[:-1] if line else None
+
+    def contains(self, name: str) -> bool:
+        """Names must be queried in ascending order"""
+        while self._current is not None and self._current < name:
+            self._advance()
+        return self._current == name
+
+    def close(self) -> None:
+        self._file.close()
+
+
+class RateLimiter:
+    """Token bucket shared by the deletion threads"""
+
+    def __init__(self, rate: float):
+        self.rate = rate
+        self._tokens = rate
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, tokens: int) -> None:
+        if self.rate <= 0:
+            return
+        # A batch larger than the bucket waits for a full bucket and goes into debt
+        needed = min(tokens, self.rate)
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(
+                    self.rate, self._tokens + (now - self._updated) * self.rate
+                )
+                self._updated = now
+                if self._tokens >= needed:
+                    self._tokens -= tokens
+                    return
+                wait = (needed - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+class OrphanCollector:
+    def __init__(self, args: argparse.Namespace):
+        self.args = args
+        self.state_dir = args.state_dir
+        self.index_path = os.path.join(self.state_dir, "referenced.idx")
+        self.checkpoint_path = os.path.join(self.state_dir, "checkpoint.json")
+        self.report_path = os.path.join(self.state_dir, "report.json")
+        self.orphans_path = os.path.join(self.state_dir, "orphans.txt")
+        self.cutoff = datetime.now(timezone.utc) - timedelta(hours=args.min_age_hours)
+        self.bucket = storage_client.bucket(settings.GCS_BUCKET_NAME)
+        self.rate_limiter = RateLimiter(args.max_deletes_per_second)
+        self.state: Dict[str, Any] = {
+            "started_at": datetime.now(timezone.utc).isoformat(),
+            "dry_run": args.dry_run,
+            "completed_prefixes": [],
+            "prefix": None,
+            "page_token": None,
+            "stats": {
+                "referenced": 0,
+                "scanned": 0,
+                "orphaned": 0,
+                "skipped_recent": 0,
+                "deleted": 0,
+                "delete_errors": 0,
+                "orphaned_bytes": 0,
+            },
+        }
+
+    def _save_checkpoint(self) -> None:
+        tmp_path = f"{self.checkpoint_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.state, f, indent=2)
+        os.replace(tmp_path, self.checkpoint_path)
+
+    def _load_checkpoint(self) -> bool:
+        if not os.path.exists(self.checkpoint_path) or not os.path.exists(
+            self.index_path
+        ):
+            return False
+        with open(self.checkpoint_path, encoding="utf-8") as f:
+            self.state = json.load(f)
+        return True
+
+    def _delete_batch(self, blob_names: List[str]) -> int:
+        """Delete one batch; returns how many of the blobs are gone"""
+        self.rate_limiter.acquire(len(blob_names))
+        try:
+            with storage_client.batch(raise_exception=False) as batch:
+                for name in blob_names:
+                    self.bucket.blob(name).delete()
+        except Exception as e:
+            logger.warning(f"Batch delete of {len(blob_names)} blobs failed: {e}")
+            return 0
+
+        # Failed sub-requests raise nothing; their status is in the responses
+        responses = getattr(batch, "_responses", None)
+        if responses is not None and len(responses) == len(blob_names):
+            # 404: already gone, which is what we wanted
+            failed = [
+                name
+                for name, response in zip(blob_names, responses)
+                if not (200 <= response.status_code < 300)
+                and response.status_code != 404
+            ]
+        else:
+            failed = [name for name in blob_names if self.bucket.blob(name).exists()]
+
+        if failed:
+            logger.warning(
+                f"{len(failed)} of {len(blob_names)} blob deletes failed, "
+                f"e.g. {failed[0]}"
+            )
+        return len(blob_names) - len(failed)
+
+    def _delete_orphans(self, executor: ThreadPoolExecutor, orphans: List[str]):
+        # GCS accepts at most 100 calls per batch request
+        size = max(1, min(self.args.batch_size, MAX_BATCH_SIZE))
+        batches = [orphans[i : i + size] for i in range(0, len(orphans), size)]
+        for batch, deleted in zip(batches, executor.map(self._delete_batch, batches)):
+            self.state["stats"]["deleted"] += deleted
+            self.state["stats"]["delete_errors"] += len(batch) - deleted
+
+    def _collect_prefix(
+        self, prefix: str, executor: ThreadPoolExecutor, orphans_file
+    ) -> None:
+        stats = self.state["stats"]
+        cursor = SortedIndexCursor(self.index_path)
+        try:
+            blobs = self.bucket.list_blobs(
+                prefix=prefix,
+                page_token=self.state["page_token"],
+                page_size=LIST_PAGE_SIZE,
+                fields="items(name,size,timeCreated),nextPageToken",
+            )
+            for page in blobs.pages:
+                page_orphans = []
+                for blob in page:
+                    stats["scanned"] += 1
+                    if cursor.contains(blob.name):
+                        continue
+                    if blob.time_created and blob.time_created > self.cutoff:
+                        stats["skipped_recent"] += 1
+                        continue
+
+                    stats["orphaned"] += 1
+                    stats["orphaned_bytes"] += blob.size or 0
+                    page_orphans.append(blob.name)
+
+                if self.args.dry_run:
+                    orphans_file.writelines(f"{name}\n" for name in page_orphans)
+                else:
+                    self._delete_orphans(executor, page_orphans)
+
+                self.state["page_token"] = blobs.next_page_token
+                self._save_checkpoint()
+        finally:
+            cursor.close()
+
+    def run(self) -> Dict[str, Any]:
+        os.makedirs(self.state_dir, exist_ok=True)
+
+        resumed = self.args.resume and self._load_checkpoint()
+        if resumed:
+            logger.info(
+                f"Resuming GC at prefix {self.state['prefix']} "
+                f"(completed: {self.state['completed_prefixes']})"
+            )
+        else:
+            logger.info("Building sorted index of referenced blobs...")
+            self.state["stats"]["referenced"] = build_sorted_index(
+                _referenced_blob_names(), self.index_path
+            )
+            self._save_checkpoint()
+
+        # Only a resumed run continues the previous run's orphan list
+        orphans_mode = "a" if resumed else "w"
+        with open(self.orphans_path, orphans_mode, encoding="utf-8") as orphans_file:
+            with ThreadPoolExecutor(max_workers=self.args.workers) as executor:
+                for prefix in GC_PREFIXES:
+                    if prefix in self.state["completed_prefixes"]:
+                        continue
+                    if self.state["prefix"] != prefix:
+                        self.state["prefix"] = prefix
+                        self.state["page_token"] = None
+
+                    logger.info(f"Scanning {prefix}")
+                    self._collect_prefix(prefix, executor, orphans_file)
+
+                    self.state["completed_prefixes"].append(prefix)
+                    self.state["prefix"] = None
+                    self.state["page_token"] = None
+                    self._save_checkpoint()
+
+        report = {
+            **self.state,
+            "finished_at": datetime.now(timezone.utc).isoformat(),
+            "min_age_hours": self.args.min_age_hours,
+            "orphans_file": self.orphans_path if self.args.dry_run else None,
+        }
+        with open(self.report_path, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+        # The run is complete; the next run starts from a fresh index
+        os.remove(self.checkpoint_path)
+        return report
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--dry-run", action="store_true")
+    parser.add_argument("--resume", action="store_true")
+    parser.add_argument("--state-dir", default=".gc-state")
+    parser.add_argument("--min-age-hours", type=float, default=24)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--batch-size", type=int, default=100)
+    parser.add_argument("--max-deletes-per-second", type=float, default=50)
+    args = parser.parse_args()
+
+    report = OrphanCollector(args).run()
+    logger.info(f"GC finished: {json.dumps(report['stats'])}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,419 @@
+import asyncio
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+from google.api_core.exceptions import Conflict, FailedPrecondition, NotFound
+from google.cloud.firestore import FieldFilter
+from app.core.config import settings
+from app.core.etag import resource_versions
+from app.core.logging import logger
+from app.utils.firestore import firestore_client
+from app.utils.storage import storage_client
+
+# One document per user, id = user id, holding the user's latest job
+JOBS_COLLECTION = "deletion-jobs"
+
+# Phases run in this order; the profile goes last so the account stays
+# recognisable until everything it owns is gone
+DELETION_PHASES = [
+    "disposal_history",
+    "available_bins",
+    "disposal_images",
+    "profile_images",
+    "profiles",
+]
+
+FIRESTORE_PAGE_SIZE = 500
+GCS_PAGE_SIZE = 1000
+GCS_BATCH_SIZE = 100  # GCS accepts at most 100 calls per batch request
+GCS_PARALLELISM = 8
+BULK_WRITER_MAX_ATTEMPTS = 5
+
+# A running job refreshes its lease on every checkpoint; a job whose lease
+# has expired belongs to a worker that died and may be resumed
+JOB_LEASE_SECONDS = 120
+
+ACTIVE_STATUSES = ("pending", "running")
+
+
+class DeletionPhaseError(Exception):
+    """A deletion phase finished with errors"""
+
+
+class AccountDeletionJob:
+    """Runs one deletion job to completion, checkpointing progress to Firestore"""
+
+    def __init__(self, job_id: str, job_data: Dict[str, Any], worker_id: str):
+        self.job_id = job_id
+        self.data = job_data
+        self.worker_id = worker_id
+        self.job_ref = firestore_client.collection(JOBS_COLLECTION).document(job_id)
+        self.user_id: str = job_data["user_id"]
+        self.force_delete: bool = job_data.get("force_delete", False)
+        self.bucket = storage_client.bucket(settings.GCS_BUCKET_NAME)
+
+    def _checkpoint(self, **fields) -> None:
+        now = datetime.now(timezone.utc)
+        fields["updated_at"] = now
+        fields["lease_owner"] = self.worker_id
+        fields["lease_expires_at"] = now + timedelta(seconds=JOB_LEASE_SECONDS)
+        self.data.update(fields)
+        self.job_ref.update(fields)
+
+    def _add_deleted(self, phase: str, count: int) -> None:
+        deleted = self.data.setdefault("deleted", {})
+        deleted[phase] = deleted.get(phase, 0) + count
+        self._checkpoint(deleted=deleted)
+
+    # Firestore
+
+    def _delete_query_results(self, phase: str, query) -> List[str]:
+        """Delete every document matching the query, one page per BulkWriter flush"""
+        errors: List[str] = []
+
+        def _on_error(failure, _writer) -> bool:
+            if failure.attempts < BULK_WRITER_MAX_ATTEMPTS:
+                return True
+            errors.append(
+                f"Failed to delete {failure.operation.reference.path}: {failure.message}"
+            )
+            return False
+
+        writer = firestore_client.bulk_writer()
+        writer.on_write_error(_on_error)
+        try:
+            while True:
+                # Documents disappear as they are deleted, so always read the first page
+                docs = list(query.select([]).limit(FIRESTORE_PAGE_SIZE).stream())
+                if not docs:
+                    break
+
+                failed_before = len(errors)
+                for doc in docs:
+                    writer.delete(doc.reference)
+                writer.flush()
+
+                self._add_deleted(phase, len(docs) - (len(errors) - failed_before))
+                if len(errors) > failed_before:
+                    # Failed documents would be returned again forever
+                    break
+        finally:
+            writer.close()
+
+        return errors
+
+    def _delete_disposal_history(self) -> List[str]:
+        query = firestore_client.collection("disposal-history").where(
+            filter=FieldFilter("user_id", "==", self.user_id)
+        )
+        return self._delete_query_results("disposal_history", query)
+
+    def _delete_profiles(self) -> List[str]:
+        query = firestore_client.collection("profiles").where(
+            filter=FieldFilter("user_id", "==", self.user_id)
+        )
+        return self._delete_query_results("profiles", query)
+
+    def _delete_available_bins(self) -> List[str]:
+        doc_ref = firestore_client.collection("available-bins").document(self.user_id)
+        if doc_ref.get().exists:
+            doc_ref.delete()
+            self._add_deleted("available_bins", 1)
+        return []
+
+    # Cloud Storage
+
+    def _delete_blob_batch(self, blob_names: List[str]) -> Optional[str]:
+        try:
+            with storage_client.batch(raise_exception=False):
+                for name in blob_names:
+                    self.bucket.blob(name).delete()
+            return None
+        except Exception as e:
+            return f"Failed to delete {len(blob_names)} blobs: {e}"
+
+    def _delete_storage_prefix(self, phase: str, prefix: str) -> List[str]:
+        errors: List[str] = []
+
+        # Deleted last round; counted once they have left the listing, since
+        # failures inside a batch are not raised
+        pending: List[str] = []
+        stop = False
+        with ThreadPoolExecutor(max_workers=GCS_PARALLELISM) as executor:
+            while True:
+                # Like Firestore, deleted blobs drop out of the listing
+                page = list(
+                    self.bucket.list_blobs(
+                        prefix=prefix,
+                        max_results=GCS_PAGE_SIZE,
+                        fields="items(name),nextPageToken",
+                    )
+                )
+                names = [blob.name for blob in page]
+                if pending:
+                    listed = set(names)
+                    self._add_deleted(
+                        phase, sum(1 for name in pending if name not in listed)
+                    )
+                if not names or stop:
+                    break
+
+                if names == pending:
+                    errors.append(
+                        f"{len(names)} blobs under {prefix} could not be deleted"
+                    )
+                    break
+                pending = names
+
+                batches = [
+                    names[i : i + GCS_BATCH_SIZE]
+                    for i in range(0, len(names), GCS_BATCH_SIZE)
+                ]
+                page_errors = [
+                    error
+                    for error in executor.map(self._delete_blob_batch, batches)
+                    if error
+                ]
+                errors.extend(page_errors)
+                if page_errors:
+                    # List once more to count what did go, then give up
+                    stop = True
+
+        return errors
+
+    def _delete_disposal_images(self) -> List[str]:
+        return self._delete_storage_prefix(
+            "disposal_images", f"disposal-images/{self.user_id}/"
+        )
+
+    def _delete_profile_images(self) -> List[str]:
+        return self._delete_storage_prefix(
+            "profile_images", f"profile-images/{self.user_id}/"
+        )
+
+    def run(self) -> None:
+        """Blocking: run the remaining phases. Every phase is idempotent, so a
+        resumed job simply restarts the phase it was in."""
+        phase_handlers: Dict[str, Callable[[], List[str]]] = {
+            "disposal_history": self._delete_disposal_history,
+            "available_bins": self._delete_available_bins,
+            "disposal_images": self._delete_disposal_images,
+            "profile_images": self._delete_profile_images,
+            "profiles": self._delete_profiles,
+        }
+
+        self._checkpoint(status="running")
+        completed = list(self.data.get("completed_phases", []))
+        errors = list(self.data.get("errors", []))
+
+        try:
+            for phase in DELETION_PHASES:
+                if phase in completed:
+                    continue
+
+                self._checkpoint(current_phase=phase)
+                logger.warning(f"Deletion job {self.job_id}: starting {phase}")
+
+                try:
+                    phase_errors = phase_handlers[phase]()
+                except Exception as e:
+                    phase_errors = [f"Error deleting {phase}: {e}"]
+
+                if phase_errors:
+                    errors.extend(phase_errors)
+                    self._checkpoint(errors=errors)
+                    if not self.force_delete:
+                        raise DeletionPhaseError(phase_errors[0])
+
+                completed.append(phase)
+                self._checkpoint(completed_phases=completed)
+
+            deleted = self.data.get("deleted", {})
+            self._checkpoint(
+                status="completed",
+                current_phase=None,
+                completed_at=datetime.now(timezone.utc),
+                lease_expires_at=None,
+            )
+            logger.critical(
+                f"🚨 DELETION COMPLETED for user: {self.user_id} "
+                f"(job {self.job_id}, deleted {deleted}, errors {len(errors)})"
+            )
+
+        except Exception as e:
+            logger.error(f"Deletion job {self.job_id} failed: {e}")
+            self._checkpoint(status="failed", failure_reason=str(e))
+
+
+class AccountDeletionService:
+    def __init__(self):
+        # Identifies this process as the lease owner of the jobs it runs
+        self.worker_id = uuid.uuid4().hex
+        self._running: Dict[str, asyncio.Future] = {}
+        # Keeps fire-and-forget tasks referenced until they finish
+        self._background: Set[asyncio.Future] = set()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _jobs_collection():
+        return firestore_client.collection(JOBS_COLLECTION)
+
+    def get_active_job(self, user_id: str) -> Optional[Dict[str, Any]]:
+        """Blocking: the user's job if it is still pending or running"""
+        job_data = self.get_job(user_id)
+        if job_data and job_data.get("status") in ACTIVE_STATUSES:
+            return job_data
+        return None
+
+    def get_job(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Blocking"""
+        doc = self._jobs_collection().document(job_id).get()
+        return doc.to_dict() if doc.exists else None
+
+    def _new_job(self, user_id: str, force_delete: bool) -> Dict[str, Any]:
+        now = datetime.now(timezone.utc)
+        return {
+            "job_id": user_id,
+            "user_id": user_id,
+            "force_delete": force_delete,
+            "status": "pending",
+            "current_phase": None,
+            "completed_phases": [],
+            "deleted": {phase: 0 for phase in DELETION_PHASES},
+            "errors": [],
+            "failure_reason": None,
+            "created_at": now,
+            "updated_at": now,
+            "completed_at": None,
+            "lease_owner": self.worker_id,
+            "lease_expires_at": now + timedelta(seconds=JOB_LEASE_SECONDS),
+        }
+
+    def create_job(
+        self, user_id: str, force_delete: bool
+    ) -> Tuple[Dict[str, Any], bool]:
+        """
+        Blocking: start a job for the user unless one is already active, in
+        which case that one is returned with created=False.
+
+        The job document is keyed by user id, so concurrent requests cannot
+        both create one: create() fails for all but the first, and a
+        finished job is only replaced if it has not changed since it was read.
+        """
+        job_ref = self._jobs_collection().document(user_id)
+        for _ in range(3):
+            job_data = self._new_job(user_id, force_delete)
+            try:
+                job_ref.create(job_data)
+                return job_data, True
+            except Conflict:
+                pass
+
+            snapshot = job_ref.get()
+            if not snapshot.exists:
+                continue
+            existing = snapshot.to_dict() or {}
+            if existing.get("status") in ACTIVE_STATUSES:
+                return existing, False
+
+            try:
+                job_ref.update(
+                    job_data,
+                    option=firestore_client.write_option(
+                        last_update_time=snapshot.update_time
+                    ),
+                )
+                return job_data, True
+            except (FailedPrecondition, NotFound):
+                # Replaced or removed by a concurrent request; look again
+                continue
+
+        raise RuntimeError(f"Could not create a deletion job for {user_id}")
+
+    def _claim(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Take over an interrupted job unless another worker already did"""
+        snapshot = self._jobs_collection().document(job_id).get()
+        job_data = snapshot.to_dict() if snapshot.exists else None
+        if not job_data or job_data.get("status") not in ACTIVE_STATUSES:
+            return None
+
+        lease_expires_at = job_data.get("lease_expires_at")
+        if (
+            job_data.get("lease_owner") != self.worker_id
+            and lease_expires_at
+            and lease_expires_at > datetime.now(timezone.utc)
+        ):
+            return None
+
+        now = datetime.now(timezone.utc)
+        lease = {
+            "lease_owner": self.worker_id,
+            "lease_expires_at": now + timedelta(seconds=JOB_LEASE_SECONDS),
+            "updated_at": now,
+        }
+        try:
+            # Fails if someone else touched the job since we read it
+            snapshot.reference.update(
+                lease,
+                option=firestore_client.write_option(
+                    last_update_time=snapshot.update_time
+                ),
+            )
+        except Exception:
+            return None
+
+        job_data.update(lease)
+        return job_data
+
+    def start(self, job_data: Dict[str, Any]) -> None:
+        """Run the job on the default executor without blocking the caller"""
+        job_id = job_data["job_id"]
+        with self._lock:
+            if job_id in self._running:
+                return
+
+            job = AccountDeletionJob(job_id, job_data, self.worker_id)
+            loop = asyncio.get_event_loop()
+            task = asyncio.ensure_future(loop.run_in_executor(None, job.run))
+            self._running[job_id] = task
+
+        def _finished(_) -> None:
+            self._running.pop(job_id, None)
+            # Reads served while the job ran may carry a version that
+            # predates the deletion
+            bump = asyncio.ensure_future(resource_versions.bump_all(job.user_id))
+            self._background.add(bump)
+            bump.add_done_callback(self._background.discard)
+
+        task.add_done_callback(_finished)
+
+    async def resume_interrupted_jobs(self) -> None:
+        """Called at startup: pick up jobs whose worker died mid-deletion"""
+        try:
+            loop = asyncio.get_event_loop()
+
+            def _claim_interrupted() -> List[Dict[str, Any]]:
+                query = self._jobs_collection().where(
+                    filter=FieldFilter("status", "in", list(ACTIVE_STATUSES))
+                )
+                claimed = []
+                for doc in query.stream():
+                    job_data = self._claim(doc.id)
+                    if job_data:
+                        claimed.append(job_data)
+                return claimed
+
+            for job_data in await loop.run_in_executor(None, _claim_interrupted):
+                logger.warning(
+                    f"Resuming interrupted deletion job {job_data['job_id']}"
+                )
+                self.start(job_data)
+
+        except Exception as e:
+            logger.error(f"Failed to resume interrupted deletion jobs: {e}")
+
+
+# Global service instance
+account_deletion_service = AccountDeletionService()
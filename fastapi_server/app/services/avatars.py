@@ -0,0 +1,148 @@
+import hashlib
+import io
+from typing import Dict, Iterable, Optional, Set
+from google.api_core.exceptions import NotFound
+from PIL import Image, ImageOps
+from app.core.config import settings
+from app.core.logging import logger
+from app.core.metrics import track_dependency
+from app.core.request_context import run_in_executor
+from app.services.image_derivatives import DERIVATIVE_CACHE_CONTROL, WEBP_QUALITY
+from app.utils.storage import storage_client, blob_name_from_public_url
+
+# Square avatar sizes in pixels; profile documents point photo_url at the default
+AVATAR_SIZES = (128, 256, 512)
+DEFAULT_AVATAR_SIZE = 256
+
+
+class AvatarService:
+    def __init__(self):
+        self.sizes = AVATAR_SIZES
+
+    @staticmethod
+    def content_digest(image_data: bytes) -> str:
+        return hashlib.sha256(image_data).hexdigest()[:16]
+
+    @staticmethod
+    def avatar_prefix(user_id: str) -> str:
+        return f"profile-images/{user_id}/"
+
+    def avatar_blob_name(self, user_id: str, digest: str, size: int) -> str:
+        """profile-images/{user_id}/{digest}_{size}.webp - identical uploads map to the same names"""
+        return f"{self.avatar_prefix(user_id)}{digest}_{size}.webp"
+
+    def render_avatars(self, image_data: bytes) -> Dict[int, bytes]:
+        """Decode the upload once and produce every square WebP size from it"""
+        image = Image.open(io.BytesIO(image_data))
+        largest = max(self.sizes)
+        image.draft("RGB", (largest, largest))
+
+        image = ImageOps.exif_transpose(image)
+        if image.mode != "RGB":
+            image = image.convert("RGB")
+
+        avatars = {}
+        working = image
+        for size in sorted(self.sizes, reverse=True):
+            working = ImageOps.fit(working, (size, size), Image.Resampling.LANCZOS)
+            buffer = io.BytesIO()
+            working.save(buffer, format="WEBP", quality=WEBP_QUALITY, method=4)
+            avatars[size] = buffer.getvalue()
+
+        return avatars
+
+    def store_avatars(self, user_id: str, image_data: bytes) -> Dict[str, str]:
+        """
+        Blocking: resize and upload all avatar sizes.
+        Returns {size: public_url} with string keys so it can be stored in Firestore.
+        """
+        digest = self.content_digest(image_data)
+        avatars = self.render_avatars(image_data)
+        bucket = storage_client.bucket(settings.GCS_BUCKET_NAME)
+
+        urls = {}
+        for size, content in avatars.items():
+            blob = bucket.blob(self.avatar_blob_name(user_id, digest, size))
+            blob.cache_control = DERIVATIVE_CACHE_CONTROL
+            with track_dependency("gcs", "avatars.upload"):
+                blob.upload_from_string(content, content_type="image/webp")
+                blob.make_public()
+            urls[str(size)] = blob.public_url
+
+        return urls
+
+    def _avatar_blob_names(self, user_id: str, url: Optional[str]) -> Set[str]:
+        """Every stored size of the avatar `url` points at, if it is the user's"""
+        blob_name = blob_name_from_public_url(url or "")
+        if not blob_name or not blob_name.startswith(self.avatar_prefix(user_id)):
+            return set()
+
+        filename = blob_name.rsplit("/", 1)[-1]
+        if not (filename.endswith(".webp") and "_" in filename):
+            # Uploaded before avatars were resized: a single blob
+            return {blob_name}
+        digest = filename.split("_", 1)[0]
+        return {self.avatar_blob_name(user_id, digest, size) for size in self.sizes}
+
+    def delete_superseded_avatars(
+        self,
+        user_id: str,
+        previous_url: Optional[str],
+        keep_urls: Iterable[Optional[str]],
+    ) -> int:
+        """
+        Blocking: delete the avatar the profile pointed at before the update,
+        unless one of `keep_urls` still uses it. Only that avatar is touched:
+        a concurrent update's upload may not be in the profile yet, so the
+        rest of the prefix is left to the orphaned-blob GC.
+        """
+        names = self._avatar_blob_names(user_id, previous_url)
+        for url in keep_urls:
+            names -= self._avatar_blob_names(user_id, url)
+
+        bucket = storage_client.bucket(settings.GCS_BUCKET_NAME)
+        deleted_count = 0
+        for name in sorted(names):
+            try:
+                with track_dependency("gcs", "avatars.delete"):
+                    bucket.blob(name).delete()
+                deleted_count += 1
+            except NotFound:
+                pass
+            except Exception as e:
+                logger.warning(f"Failed to delete superseded avatar {name}: {e}")
+
+        return deleted_count
+
+    async def cleanup_superseded_avatars(
+        self,
+        user_id: str,
+        profile_ref,
+        previous_photo_url: Optional[str],
+        new_photo_url: str,
+    ) -> None:
+        """
+        Background task run after a profile photo change. Deletes the photo
+        read before the update, keeping the new avatar and whatever the
+        profile points at now, in case a concurrent update won.
+        """
+        if not previous_photo_url or previous_photo_url == new_photo_url:
+            return
+        try:
+
+            def _cleanup() -> int:
+                current = profile_ref.get().to_dict() or {}
+                return self.delete_superseded_avatars(
+                    user_id,
+                    previous_photo_url,
+                    [new_photo_url, current.get("photo_url")],
+                )
+
+            deleted_count = await run_in_executor(_cleanup)
+            logger.debug("Deleted %d superseded avatars for %s", deleted_count, user_id)
+        except Exception as e:
+            logger.warning(f"Failed to clean up avatars for {user_id}: {e}")
+
+
+# Global service instance
+avatar_service = AvatarService()
@@ -0,0 +1,104 @@
+"""
+In-process copy of the `bins` collection.
+
+The catalog is a handful of documents that change when an operator edits
+them, yet `/bin/available` and every bin-id validation read it from
+Firestore. It is loaded during startup warm-up and reloaded once it is older
+than BINS_CATALOG_TTL_SECONDS. `version` changes whenever the contents do.
+"""
+
+import hashlib
+import json
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional
+
+from app.core.config import settings
+from app.core.logging import logger
+from app.core.metrics import record_cache_lookup, track_dependency
+from app.core.request_context import run_in_executor
+from app.utils.firestore import firestore_client
+from app.utils.single_flight import SingleFlight
+
+
+class BinsCatalog:
+    def __init__(self, ttl_seconds: float, min_reload_seconds: float):
+        self.ttl_seconds = ttl_seconds
+        self.min_reload_seconds = min_reload_seconds
+        self._bins: Optional[Dict[str, Dict[str, Any]]] = None
+        self._loaded_at = 0.0
+        self.version = ""
+        self._lock = threading.Lock()
+        self._reloads = SingleFlight("bins_catalog")
+
+    @property
+    def loaded(self) -> bool:
+        return self._bins is not None
+
+    def _is_fresh(self) -> bool:
+        return (
+            self._bins is not None
+            and time.monotonic() - self._loaded_at < self.ttl_seconds
+        )
+
+    def refresh(self) -> Dict[str, Dict[str, Any]]:
+        """Reload from Firestore (blocking)"""
+        with track_dependency("firestore", "bins.get"):
+            docs = firestore_client.collection("bins").get()
+
+        bins = {doc.id: doc.to_dict() for doc in docs if doc.to_dict() is not None}
+        encoded = json.dumps(bins, sort_keys=True, default=str).encode("utf-8")
+        version = hashlib.sha1(encoded).hexdigest()[:16]
+
+        if version != self.version:
+            logger.info("Loaded bins catalog: %d bins, version %s", len(bins), version)
+        self._bins, self.version = bins, version
+        self._loaded_at = time.monotonic()
+        return bins
+
+    def get_bins_sync(self) -> Dict[str, Dict[str, Any]]:
+        if self._is_fresh():
+            record_cache_lookup("bins_catalog", True)
+            return self._bins
+
+        record_cache_lookup("bins_catalog", False)
+        # One reload at a time; the others get its result
+        with self._lock:
+            if self._is_fresh():
+                return self._bins
+            return self.refresh()
+
+    async def get_bins(self) -> Dict[str, Dict[str, Any]]:
+        """bin id -> document data, served from memory while fresh"""
+        if self._is_fresh():
+            record_cache_lookup("bins_catalog", True)
+            return self._bins
+        # Requests arriving during a reload wait for it instead of queueing
+        # on the lock in executor threads
+        return await self._reloads.do(
+            "bins", lambda: run_in_executor(self.get_bins_sync)
+        )
+
+    async def existing_ids(self, bin_ids: Iterable[str]) -> List[str]:
+        """
+        The ids that name a bin, in the given order. Ids missing from the
+        cached catalog trigger one reload, so a bin added since the last
+        load is still accepted. That reload is skipped while the catalog is
+        younger than min_reload_seconds, so a stream of bogus ids costs at
+        most one collection read per interval.
+        """
+        bin_ids = list(bin_ids)
+        bins = await self.get_bins()
+        if (
+            any(bin_id not in bins for bin_id in bin_ids)
+            and time.monotonic() - self._loaded_at >= self.min_reload_seconds
+        ):
+            self._loaded_at = 0.0
+            bins = await self.get_bins()
+        return [bin_id for bin_id in bin_ids if bin_id in bins]
+
+
+# Global service instance
+bins_catalog = BinsCatalog(
+    settings.BINS_CATALOG_TTL_SECONDS, settings.BINS_CATALOG_MIN_RELOAD_SECONDS
+)
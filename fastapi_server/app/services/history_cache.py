@@ -0,0 +1,93 @@
+"""
+Per-worker cache of rendered /disposal/history pages.
+
+Opening the history tab re-runs the same query until the user saves or
+deletes something, so each page's response body is kept in memory, keyed
+by user and query (waste_class, limit), together with the user's history
+version token (see app/core/etag.py) it was read under. A page is served
+only while that token is still current. Every history write replaces the
+token, which invalidates the user's pages in all workers at once.
+`invalidate()` also drops them here right away.
+
+Memory is bounded by HISTORY_CACHE_MAX_BYTES of response bodies, evicting
+the least recently used user first, and HISTORY_CACHE_MAX_PAGES_PER_USER.
+Nothing is cached while per-user versions are off.
+"""
+
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+from app.core.config import settings
+from app.core.etag import RESOURCE_HISTORY, resource_versions
+from app.core.metrics import Gauge, record_cache_lookup
+
+HISTORY_CACHE_BYTES = Gauge(
+    "history_cache_bytes",
+    "Response bytes held by the per-worker history page cache",
+)
+
+
+class HistoryCache:
+    def __init__(self, max_bytes: int, max_pages_per_user: int):
+        self.max_bytes = max_bytes
+        self.max_pages_per_user = max_pages_per_user
+        # user id -> {page key: (version, body)}, least recently used first
+        self._users: "OrderedDict[str, Dict[str, Tuple[str, bytes]]]" = OrderedDict()
+        self.size_bytes = 0
+
+    def _drop(self, user_id: str) -> None:
+        pages = self._users.pop(user_id, None)
+        if pages:
+            self.size_bytes -= sum(len(body) for _, body in pages.values())
+
+    def get(self, user_id: str, page: str, version: Optional[str]) -> Optional[bytes]:
+        entry = None
+        if version is not None:
+            entry = self._users.get(user_id, {}).get(page)
+            if entry is not None and entry[0] != version:
+                # Written since; every page of this user is older than that
+                self._drop(user_id)
+                entry = None
+            elif entry is not None:
+                self._users.move_to_end(user_id)
+        record_cache_lookup("disposal_history", entry is not None)
+        return entry[1] if entry is not None else None
+
+    def put(self, user_id: str, page: str, version: Optional[str], body: bytes) -> None:
+        if version is None or len(body) > self.max_bytes // 4:
+            return
+
+        pages = self._users.get(user_id)
+        if pages and any(v != version for v, _ in pages.values()):
+            self._drop(user_id)
+            pages = None
+        if pages is None:
+            pages = self._users[user_id] = {}
+
+        previous = pages.pop(page, None)
+        if previous is not None:
+            self.size_bytes -= len(previous[1])
+        elif len(pages) >= self.max_pages_per_user:
+            oldest = next(iter(pages))
+            self.size_bytes -= len(pages.pop(oldest)[1])
+        pages[page] = (version, body)
+        self.size_bytes += len(body)
+        self._users.move_to_end(user_id)
+
+        while self.size_bytes > self.max_bytes and self._users:
+            self._drop(next(iter(self._users)))
+
+    async def invalidate(self, user_id: str) -> bool:
+        """
+        Call after a write to the user's history has committed. False if the
+        version token could not be replaced yet (see ResourceVersions.bump)
+        """
+        self._drop(user_id)
+        return await resource_versions.bump(RESOURCE_HISTORY, user_id)
+
+
+# Global cache instance
+history_cache = HistoryCache(
+    settings.HISTORY_CACHE_MAX_BYTES, settings.HISTORY_CACHE_MAX_PAGES_PER_USER
+)
+HISTORY_CACHE_BYTES.set_function(lambda: history_cache.size_bytes)
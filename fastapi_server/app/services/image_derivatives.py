@@ -0,0 +1,149 @@
+import io
+from typing import Dict, Optional, Tuple
+from PIL import Image, ImageOps
+from app.core.config import settings
+from app.core.logging import logger
+from app.core.metrics import track_dependency
+from app.core.request_context import run_in_executor
+from app.services.history_cache import history_cache
+from app.utils.firestore import firestore_client
+from app.utils.storage import storage_client, blob_name_from_public_url
+
+# Derivatives never change once written (their names are derived from the
+# unique original name), so clients and CDNs may cache them forever.
+DERIVATIVE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+# variant name -> (size, square crop)
+DERIVATIVE_VARIANTS: Dict[str, Tuple[int, bool]] = {
+    "medium": (1024, False),
+    "thumb": (256, True),
+}
+
+WEBP_QUALITY = 80
+
+
+class ImageDerivativeService:
+    def __init__(self):
+        self.variants = DERIVATIVE_VARIANTS
+
+    @staticmethod
+    def derivative_blob_name(original_blob_name: str, variant: str) -> str:
+        """disposal-images/u/20240101_ab12cd34.jpg -> disposal-images/u/20240101_ab12cd34_thumb.webp"""
+        stem = original_blob_name.rsplit(".", 1)[0]
+        return f"{stem}_{variant}.webp"
+
+    @staticmethod
+    def is_derivative_blob_name(blob_name: str) -> bool:
+        return any(
+            blob_name.endswith(f"_{variant}.webp") for variant in DERIVATIVE_VARIANTS
+        )
+
+    def render_derivatives(self, image_data: bytes) -> Dict[str, bytes]:
+        """
+        Decode the original once and produce every WebP variant from it.
+
+        Variants are rendered largest first and each smaller one is resized
+        from the previous result, so the full-resolution pixels are touched once.
+        """
+        image = Image.open(io.BytesIO(image_data))
+
+        # Let the JPEG decoder downscale by a power of two while decoding
+        largest = max(size for size, _ in self.variants.values())
+        image.draft("RGB", (largest, largest))
+
+        image = ImageOps.exif_transpose(image)
+        if image.mode != "RGB":
+            image = image.convert("RGB")
+
+        derivatives = {}
+        working = image
+        for variant, (size, square) in sorted(
+            self.variants.items(), key=lambda item: item[1][0], reverse=True
+        ):
+            if square:
+                resized = ImageOps.fit(working, (size, size), Image.Resampling.LANCZOS)
+            else:
+                resized = working.copy()
+                resized.thumbnail((size, size), Image.Resampling.LANCZOS)
+
+            buffer = io.BytesIO()
+            resized.save(buffer, format="WEBP", quality=WEBP_QUALITY, method=4)
+            derivatives[variant] = buffer.getvalue()
+            working = resized
+
+        return derivatives
+
+    def upload_derivatives(
+        self, original_blob_name: str, derivatives: Dict[str, bytes]
+    ) -> Dict[str, str]:
+        """Upload rendered variants next to the original and return their public URLs"""
+        bucket = storage_client.bucket(settings.GCS_BUCKET_NAME)
+
+        urls = {}
+        for variant, content in derivatives.items():
+            blob = bucket.blob(self.derivative_blob_name(original_blob_name, variant))
+            blob.cache_control = DERIVATIVE_CACHE_CONTROL
+            with track_dependency("gcs", "derivatives.upload"):
+                blob.upload_from_string(content, content_type="image/webp")
+                blob.make_public()
+            urls[variant] = blob.public_url
+
+        return urls
+
+    def create_derivatives(
+        self, original_blob_name: str, image_data: bytes
+    ) -> Dict[str, str]:
+        """Blocking: render and upload all variants for one original"""
+        derivatives = self.render_derivatives(image_data)
+        return self.upload_derivatives(original_blob_name, derivatives)
+
+    def create_derivatives_for_record(
+        self, doc_id: str, image_url: str, image_data: Optional[bytes] = None
+    ) -> Dict[str, str]:
+        """
+        Blocking: render variants for a disposal-history record and store
+        their URLs on the document. Downloads the original if no bytes are given.
+        """
+        blob_name = blob_name_from_public_url(image_url)
+        if not blob_name:
+            raise ValueError(f"Image URL is not in bucket: {image_url}")
+
+        if image_data is None:
+            bucket = storage_client.bucket(settings.GCS_BUCKET_NAME)
+            with track_dependency("gcs", "disposal_image.download"):
+                image_data = bucket.blob(blob_name).download_as_bytes()
+
+        urls = self.create_derivatives(blob_name, image_data)
+
+        with track_dependency("firestore", "disposal_history.update"):
+            firestore_client.collection("disposal-history").document(doc_id).update(
+                {
+                    "thumbnail_url": urls["thumb"],
+                    "preview_url": urls["medium"],
+                }
+            )
+        return urls
+
+    async def process_disposal_image(
+        self,
+        doc_id: str,
+        image_url: str,
+        image_data: bytes,
+        user_id: Optional[str] = None,
+    ) -> None:
+        """Background task run after a disposal record has been saved"""
+        try:
+            await run_in_executor(
+                self.create_derivatives_for_record, doc_id, image_url, image_data
+            )
+        except Exception as e:
+            # The record still has the original image_url, so clients fall back to it
+            logger.warning(f"Failed to create image derivatives for {doc_id}: {e}")
+            return
+        if user_id:
+            # History pages cached before now lack the thumbnail URLs
+            await history_cache.invalidate(user_id)
+
+
+# Global service instance
+image_derivative_service = ImageDerivativeService()
@@ -0,0 +1,85 @@
+"""
+Startup warm-up, run in the background by the lifespan.
+
+Builds the SDK clients, opens the Firestore channel by loading the bins
+catalog, sends the detector one blank frame (DNS, TLS and connection pool
+to Roboflow) and runs the first round of dependency probes. /readyz reports
+not ready until this has finished and every required probe passes.
+"""
+
+import time
+
+from PIL import Image
+
+from app.core.clients import initialize_clients
+from app.core.config import settings
+from app.core.health import health_monitor
+from app.core.logging import logger
+from app.core.request_context import run_in_executor
+from app.services.bins_catalog import bins_catalog
+from app.services.waste_detection import waste_detection_service
+from app.utils.firestore import firestore_client
+from app.utils.storage import storage_client
+
+# Clients whose failure leaves part of the API up; Firestore and GCS are probed
+OPTIONAL_CLIENTS = ("gemini", "roboflow")
+
+
+def _probe_firestore() -> None:
+    firestore_client.collection("bins").limit(1).get()
+
+
+def _probe_storage() -> None:
+    list(storage_client.bucket(settings.GCS_BUCKET_NAME).list_blobs(max_results=1))
+
+
+def register_probes() -> None:
+    health_monitor.register("firestore", _probe_firestore)
+    health_monitor.register("storage", _probe_storage)
+
+
+async def _step(name: str, step) -> bool:
+    started = time.perf_counter()
+    error = None
+    try:
+        await step()
+    except Exception as e:
+        error = str(e)
+        logger.error(f"Warm-up step {name} failed: {e}")
+
+    health_monitor.warmup[name] = {
+        "status": "ok" if error is None else "error",
+        "error": error,
+        "duration_ms": round((time.perf_counter() - started) * 1000, 1),
+    }
+    return error is None
+
+
+async def warm_up() -> None:
+    started = time.perf_counter()
+    register_probes()
+
+    async def clients():
+        errors = await run_in_executor(initialize_clients)
+        for name in OPTIONAL_CLIENTS:
+            health_monitor.set_status(name, errors.get(name) is None, errors.get(name))
+
+    async def detector():
+        if not settings.WARMUP_DETECTOR:
+            return
+        # A blank frame is enough to set up the HTTP connection to the model
+        await waste_detection_service.run_inference(Image.new("RGB", (640, 640)))
+
+    await _step("clients", clients)
+    await _step("bins_catalog", lambda: run_in_executor(bins_catalog.refresh))
+    if not await _step("detector", detector):
+        health_monitor.set_status("roboflow", False, "warm-up inference failed")
+    await health_monitor.probe_all()
+
+    health_monitor.warmed_up = True
+    health_monitor.start()
+    logger.info(
+        "Warm-up finished in %.2fs, ready: %s",
+        time.perf_counter() - started,
+        health_monitor.ready,
+    )
@@ -1,49 +1,100 @@
 import asyncio
 import base64
 import io
-from typing import Dict, Any, Set
+from typing import Dict, Any, Optional, Set
 from PIL import Image
-from inference_sdk import InferenceHTTPClient
+from app.core.clients import LazyClient
 from app.core.config import settings
 from app.core.logging import logger
+from app.core.request_context import run_in_executor
+from app.core.tracing import start_span
+from app.core.metrics import (
+    IMAGE_DECODE_DURATION,
+    INFERENCE_DURATION,
+    WEBSOCKET_BUDGET_REJECTIONS,
+    WEBSOCKET_CONNECTIONS,
+)
+
+
+def get_inference_client():
+    """Roboflow client; inference_sdk pulls in opencv and matplotlib, so import on use"""
+    from inference_sdk import InferenceHTTPClient
+
+    return InferenceHTTPClient(
+        api_url=settings.ROBOFLOW_MODEL_URL, api_key=settings.ROBOFLOW_API_KEY
+    )
 
 
 class WasteDetectionService:
     def __init__(self):
-        self.client = InferenceHTTPClient(
-            api_url=settings.ROBOFLOW_MODEL_URL, api_key=settings.ROBOFLOW_API_KEY
-        )
+        self.client = LazyClient("roboflow", get_inference_client)
         self.model_id = settings.ROBOFLOW_MODEL_ID
         self.connected_clients: Set = set()
+        WEBSOCKET_CONNECTIONS.set_function(lambda: len(self.connected_clients))
 
     async def add_client(self, websocket):
         """Add a new WebSocket client"""
         self.connected_clients.add(websocket)
         logger.info(
-            f"WebSocket client connected. Total clients: {len(self.connected_clients)}"
+            "WebSocket client connected. Total clients: %d", len(self.connected_clients)
         )
 
     async def remove_client(self, websocket):
         """Remove a WebSocket client"""
         self.connected_clients.discard(websocket)
         logger.info(
-            f"WebSocket client disconnected. Total clients: {len(self.connected_clients)}"
+            "WebSocket client disconnected. Total clients: %d",
+            len(self.connected_clients),
         )
 
-    def process_image_from_base64(self, base64_image: str) -> Image.Image:
-        """Convert base64 image to PIL Image"""
+    @staticmethod
+    def _check_memory_budget(footprint: int, memory_budget: Optional[int]) -> None:
+        if memory_budget and footprint > memory_budget:
+            WEBSOCKET_BUDGET_REJECTIONS.inc()
+            raise ValueError(
+                f"Image needs about {footprint // 1048576} MB, over the "
+                f"{memory_budget // 1048576} MB per-connection memory budget"
+            )
+
+    def process_image_from_base64(
+        self, base64_image: str, source: str, memory_budget: Optional[int] = None
+    ) -> Image.Image:
+        """
+        Convert base64 image to PIL Image. With `memory_budget` (bytes), images
+        whose base64 text, raw bytes and decoded pixels would together exceed
+        it are rejected before the pixels are decoded. `source` labels the
+        decode time metric ("websocket", "scan").
+        """
         try:
             # Remove data URL prefix if present
             if "data:image" in base64_image:
                 base64_image = base64_image.split(",")[1]
 
-            # Decode base64 and create PIL Image
-            image_data = base64.b64decode(base64_image)
-            image = Image.open(io.BytesIO(image_data))
+            # Raw bytes are 3/4 of the base64 length
+            footprint = len(base64_image) + len(base64_image) * 3 // 4
+            self._check_memory_budget(footprint, memory_budget)
 
-            # Convert to RGB if necessary
-            if image.mode != "RGB":
-                image = image.convert("RGB")
+            # Decode base64 and create PIL Image
+            with IMAGE_DECODE_DURATION.labels(source).time(), start_span(
+                "detection.decode_image"
+            ):
+                image_data = base64.b64decode(base64_image)
+                image = Image.open(io.BytesIO(image_data))
+
+                # Image.open only reads the header, so the size is known up front
+                pixels = image.width * image.height
+                footprint += pixels * len(image.getbands())
+                if image.mode != "RGB":
+                    footprint += pixels * 3
+                self._check_memory_budget(footprint, memory_budget)
+
+                # Decode now, inside the timer; an RGB image would otherwise
+                # only be decoded lazily by whoever reads its pixels first
+                image.load()
+
+                # Convert to RGB if necessary
+                if image.mode != "RGB":
+                    image = image.convert("RGB")
 
             return image
         except Exception as e:
@@ -54,10 +105,12 @@ class WasteDetectionService:
         """Run inference on the PIL Image directly"""
         try:
             # Run inference in thread pool to avoid blocking
-            loop = asyncio.get_event_loop()
-            result = await loop.run_in_executor(
-                None, lambda: self.client.infer(image, model_id=self.model_id)
-            )
+            with INFERENCE_DURATION.time(), start_span(
+                "detection.run_inference", model_id=self.model_id
+            ):
+                result = await run_in_executor(
+                    lambda: self.client.infer(image, model_id=self.model_id)
+                )
 
             # Ensure result is a dictionary
             if isinstance(result, list):
@@ -102,21 +155,26 @@ class WasteDetectionService:
             logger.error(f"Error formatting results: {e}")
             return {"success": False, "error": str(e), "detections": [], "count": 0}
 
-    async def process_detection_request(self, data: Dict[str, Any]) -> Dict[str, Any]:
-        """Process a detection request"""
+    async def process_detection_request(
+        self, data: Dict[str, Any], source: str, memory_budget: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """Process a detection request; `source` names the caller for metrics"""
         try:
             base64_image = data.get("image")
             if not base64_image:
                 raise ValueError("No image provided in request")
 
-            # Process image
-            image = self.process_image_from_base64(base64_image)
+            with start_span("detection"):
+                # Process image
+                image = self.process_image_from_base64(
+                    base64_image, source, memory_budget
+                )
 
-            # Run inference directly on PIL Image
-            inference_result = await self.run_inference(image)
+                # Run inference directly on PIL Image
+                inference_result = await self.run_inference(image)
 
-            # Format and return results
-            formatted_result = self.format_detection_results(inference_result)
+                # Format and return results
+                formatted_result = self.format_detection_results(inference_result)
 
             return {"type": "detection_result", "data": formatted_result}
 
@@ -0,0 +1,20 @@
+import hmac
+from typing import Optional
+from fastapi import HTTPException, Request
+from app.core.config import settings
+
+
+def is_admin_token(token: Optional[str]) -> bool:
+    """Constant-time check against ADMIN_TOKEN; always False when it is unset"""
+    if not settings.ADMIN_TOKEN or not token:
+        return False
+    return hmac.compare_digest(token.encode(), settings.ADMIN_TOKEN.encode())
+
+
+def require_admin(request: Request) -> None:
+    """
+    Dependency for admin routes. Answers 404 rather than 401/403 so the
+    routes are indistinguishable from missing ones without the token.
+    """
+    if not is_admin_token(request.headers.get("X-Admin-Token")):
+        raise HTTPException(status_code=404, detail="Not Found")
@@ -1,4 +1,6 @@
+from typing import Iterator, List, Optional
 from google.cloud import firestore
+from app.core.clients import LazyClient
 from app.core.config import settings
 
 
@@ -12,4 +14,35 @@ def get_firestore_client() -> firestore.Client:
     )
 
 
-firestore_client = get_firestore_client()
+def iter_documents(
+    collection_name: str,
+    field_paths: Optional[List[str]] = None,
+    page_size: int = 500,
+) -> Iterator[firestore.DocumentSnapshot]:
+    """
+    Stream a whole collection in document-name order, one page at a time,
+    so long-running jobs never hold a single multi-minute stream open
+    """
+    query = firestore_client.collection(collection_name).order_by("__name__")
+    if field_paths:
+        query = query.select(field_paths)
+
+    last_doc = None
+    while True:
+        page_query = query.limit(page_size)
+        if last_doc is not None:
+            page_query = page_query.start_after(last_doc)
+
+        docs = list(page_query.stream())
+        if not docs:
+            return
+
+        yield from docs
+
+        if len(docs) < page_size:
+            return
+        last_doc = docs[-1]
+
+
+# Built on first use or by the lifespan warm-up, not at import
+firestore_client = LazyClient("firestore", get_firestore_client)
@@ -0,0 +1,57 @@
+"""
+Request coalescing for identical concurrent reads.
+
+`SingleFlight.do(key, func)` runs `func()` once per key at a time: callers
+that arrive while a call for their key is in flight wait for it and get
+the same result, or the same exception. Once it finishes the key is free
+again, so nothing is cached beyond the call itself.
+
+The call runs as its own task and every caller awaits it through
+asyncio.shield, so a caller that is cancelled (client gone, timeout)
+neither cancels the call for the others nor sees it cancelled. The task
+inherits the first caller's context, so its logs and spans belong to that
+request. Results are shared between requests: treat them as read-only.
+
+Only awaitable reads overlap, so blocking SDK calls should go through
+run_in_executor inside `func`.
+"""
+
+import asyncio
+from typing import Awaitable, Callable, Dict, TypeVar
+
+from app.core.metrics import Counter
+
+T = TypeVar("T")
+
+SINGLE_FLIGHT_CALLS = Counter(
+    "single_flight_calls",
+    "Coalesced reads: 'leader' ran the call, 'shared' waited for one in flight",
+    ["name", "role"],
+)
+
+
+class SingleFlight:
+    def __init__(self, name: str):
+        self.name = name
+        self._calls: Dict[str, asyncio.Task] = {}
+
+    def _finished(self, key: str, task: asyncio.Task) -> None:
+        if self._calls.get(key) is task:
+            del self._calls[key]
+        # Mark the exception as retrieved in case every caller was cancelled
+        if not task.cancelled():
+            task.exception()
+
+    async def do(self, key: str, func: Callable[[], Awaitable[T]]) -> T:
+        task = self._calls.get(key)
+        if task is None:
+            SINGLE_FLIGHT_CALLS.labels(self.name, "leader").inc()
+            task = asyncio.ensure_future(func())
+            self._calls[key] = task
+            task.add_done_callback(lambda done: self._finished(key, done))
+        else:
+            SINGLE_FLIGHT_CALLS.labels(self.name, "shared").inc()
+        return await asyncio.shield(task)
+
+    def in_flight(self) -> int:
+        return len(self._calls)
@@ -1,4 +1,6 @@
-from google.cloud import storage
+from typing import Optional
+from urllib.parse import unquote, urlparse
+from app.core.clients import LazyClient
 from app.core.config import settings
 
 
@@ -7,7 +9,29 @@ def get_storage_client():
     if not settings.GOOGLE_STORAGE_CREDENTIALS:
         raise ValueError("GOOGLE_FIREBASE_CREDENTIALS is not set in settings.")
 
+    from google.cloud import storage
+
     return storage.Client.from_service_account_json(settings.GOOGLE_STORAGE_CREDENTIALS)
 
 
-storage_client = get_storage_client()
+def blob_name_from_public_url(public_url: str, bucket_name: str = "") -> Optional[str]:
+    """
+    Recover the blob name from a URL produced by `blob.public_url`
+    (https://storage.googleapis.com/{bucket}/{quoted blob name})
+    """
+    if not public_url:
+        return None
+
+    if not bucket_name:
+        bucket_name = settings.GCS_BUCKET_NAME
+
+    path = urlparse(public_url).path.lstrip("/")
+    bucket_prefix = f"{bucket_name}/"
+    if not path.startswith(bucket_prefix):
+        return None
+
+    return unquote(path[len(bucket_prefix) :]) or None
+
+
+# Built on first use or by the lifespan warm-up, not at import
+storage_client = LazyClient("storage", get_storage_client)
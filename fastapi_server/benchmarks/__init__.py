@@ -0,0 +1 @@
+"""Benchmarks for the Trasholini FastAPI server. Run modules with `python -m benchmarks.<name>`."""
@@ -0,0 +1,663 @@
+"""
+In-memory stand-ins for Firestore, Cloud Storage, Roboflow and Gemini.
+
+Each fake sleeps for a latency drawn from a log-normal distribution and fails
+a configurable fraction of calls, so the app can be load-tested on a laptop
+with no network. The fakes block the calling thread exactly like the real
+SDKs, which keeps blocking calls made from `async def` handlers visible.
+
+`install_fakes(config)` must run before anything imports `app`.
+"""
+
+import json
+import math
+import random
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+from urllib.parse import quote
+
+# Per dependency: median latency, log-normal sigma, fraction of failed calls
+PROFILES: Dict[str, Dict[str, Dict[str, float]]] = {
+    # No latency at all: measures the app's own CPU cost
+    "zero": {
+        "firestore": {"median_ms": 0, "sigma": 0, "error_rate": 0},
+        "gcs": {"median_ms": 0, "sigma": 0, "error_rate": 0},
+        "roboflow": {"median_ms": 0, "sigma": 0, "error_rate": 0},
+        "gemini": {"median_ms": 0, "sigma": 0, "error_rate": 0},
+    },
+    # Roughly what the production dependencies look like from the server
+    "realistic": {
+        "firestore": {"median_ms": 12, "sigma": 0.5, "error_rate": 0.001},
+        "gcs": {"median_ms": 45, "sigma": 0.5, "error_rate": 0.001},
+        "roboflow": {"median_ms": 150, "sigma": 0.4, "error_rate": 0.005},
+        "gemini": {"median_ms": 900, "sigma": 0.6, "error_rate": 0.01},
+    },
+    # Slow, heavy-tailed and failing dependencies
+    "degraded": {
+        "firestore": {"median_ms": 60, "sigma": 1.0, "error_rate": 0.02},
+        "gcs": {"median_ms": 200, "sigma": 1.0, "error_rate": 0.02},
+        "roboflow": {"median_ms": 600, "sigma": 0.8, "error_rate": 0.05},
+        "gemini": {"median_ms": 3000, "sigma": 0.9, "error_rate": 0.1},
+    },
+}
+
+BENCH_BUCKET = "bench-bucket"
+BIN_IDS = [
+    "IAwm6VLUto6hIHKg2p2U",
+    "JWU85wViqZWpwa06T2Gp",
+    "YEyKfXmPrwV9rT6PGvWi",
+    "nnqLrEKtFYwN32rYyFpN",
+    "swBByWbqLGZPDpQr0WbJ",
+]
+
+
+class FakeDependencyError(Exception):
+    """Injected failure; real SDK errors are just as opaque to the handlers"""
+
+
+class LatencyModel:
+    def __init__(
+        self,
+        name: str,
+        median_ms: float = 0,
+        sigma: float = 0,
+        error_rate: float = 0,
+        seed: Optional[int] = None,
+    ):
+        self.name = name
+        self.median = median_ms / 1000.0
+        self.sigma = sigma
+        self.error_rate = error_rate
+        self._random = random.Random(seed)
+
+    def wait(self) -> None:
+        """Block like an SDK call, then maybe fail"""
+        if self.median > 0:
+            delay = self.median
+            if self.sigma > 0:
+                delay = self._random.lognormvariate(math.log(self.median), self.sigma)
+            time.sleep(delay)
+        if self.error_rate and self._random.random() < self.error_rate:
+            raise FakeDependencyError(f"Injected {self.name} failure")
+
+
+# Firestore
+
+
+class FakeSnapshot:
+    def __init__(self, reference: "FakeDocumentReference", data: Optional[Dict]):
+        self.reference = reference
+        self.id = reference.id
+        self.exists = data is not None
+        self.update_time = None
+        self._data = None if data is None else dict(data)
+
+    def to_dict(self) -> Optional[Dict[str, Any]]:
+        return None if self._data is None else dict(self._data)
+
+    def get(self, field: str) -> Any:
+        return (self._data or {}).get(field)
+
+
+class FakeDocumentReference:
+    def __init__(self, db: "FakeFirestore", collection: str, doc_id: str):
+        self._db = db
+        self.collection_name = collection
+        self.id = doc_id
+
+    @property
+    def path(self) -> str:
+        return f"{self.collection_name}/{self.id}"
+
+    def _docs(self) -> Dict[str, Dict]:
+        return self._db.collection_data(self.collection_name)
+
+    def get(self, field_paths=None, **kwargs) -> FakeSnapshot:
+        self._db.latency.wait()
+        return FakeSnapshot(self, self._docs().get(self.id))
+
+    def set(self, data: Dict, merge: bool = False) -> None:
+        self._db.latency.wait()
+        self._set(data, merge)
+
+    def _set(self, data: Dict, merge: bool = False) -> None:
+        with self._db.lock:
+            docs = self._docs()
+            if merge and self.id in docs:
+                docs[self.id].update(data)
+            else:
+                docs[self.id] = dict(data)
+
+    def create(self, document_data: Dict) -> None:
+        from google.api_core.exceptions import Conflict
+
+        self._db.latency.wait()
+        with self._db.lock:
+            docs = self._docs()
+            if self.id in docs:
+                raise Conflict(f"Document already exists: {self.path}")
+            docs[self.id] = dict(document_data)
+
+    def update(self, data: Dict, option=None) -> None:
+        self._db.latency.wait()
+        self._update(data)
+
+    def _update(self, data: Dict) -> None:
+        with self._db.lock:
+            docs = self._docs()
+            if self.id not in docs:
+                raise FakeDependencyError(f"No document to update: {self.path}")
+            for key, value in data.items():
+                if type(value).__name__ == "Increment":
+                    docs[self.id][key] = docs[self.id].get(key, 0) + value.value
+                else:
+                    docs[self.id][key] = value
+
+    def delete(self, option=None) -> None:
+        self._db.latency.wait()
+        self._delete()
+
+    def _delete(self) -> None:
+        with self._db.lock:
+            self._docs().pop(self.id, None)
+
+
+_OPERATORS = {
+    "==": lambda a, b: a == b,
+    "!=": lambda a, b: a != b,
+    "<": lambda a, b: a < b,
+    "<=": lambda a, b: a <= b,
+    ">": lambda a, b: a > b,
+    ">=": lambda a, b: a >= b,
+    "in": lambda a, b: a in b,
+    "array_contains": lambda a, b: b in a,
+}
+
+
+class FakeQuery:
+    def __init__(
+        self,
+        db: "FakeFirestore",
+        collection: str,
+        filters: Tuple = (),
+        orders: Tuple = (),
+        limit_count: Optional[int] = None,
+        after: Optional[FakeSnapshot] = None,
+    ):
+        self._db = db
+        self._collection = collection
+        self._filters = filters
+        self._orders = orders
+        self._limit = limit_count
+        self._after = after
+
+    def _copy(self, **changes) -> "FakeQuery":
+        values = {
+            "filters": self._filters,
+            "orders": self._orders,
+            "limit_count": self._limit,
+            "after": self._after,
+        }
+        values.update(changes)
+        return FakeQuery(self._db, self._collection, **values)
+
+    def where(self, field_path=None, op_string=None, value=None, filter=None):
+        if filter is not None:
+            field_path, op_string, value = (
+                filter.field_path,
+                filter.op_string,
+                filter.value,
+            )
+        return self._copy(filters=self._filters + ((field_path, op_string, value),))
+
+    def order_by(self, field_path: str, direction: str = "ASCENDING"):
+        return self._copy(orders=self._orders + ((field_path, direction),))
+
+    def limit(self, count: int):
+        return self._copy(limit_count=count)
+
+    def start_after(self, snapshot):
+        return self._copy(after=snapshot)
+
+    def select(self, field_paths):
+        return self
+
+    def _matches(self) -> List[Tuple[str, Dict]]:
+        with self._db.lock:
+            items = list(self._db.collection_data(self._collection).items())
+
+        matches = [
+            (doc_id, data)
+            for doc_id, data in items
+            if all(
+                field in data and _OPERATORS[op](data[field], value)
+                for field, op, value in self._filters
+            )
+        ]
+        for field, direction in reversed(self._orders):
+            if field == "__name__":
+                key = lambda item: item[0]  # noqa: E731
+            else:
+                key = lambda item, f=field: item[1].get(f)  # noqa: E731
+            matches.sort(key=key, reverse=direction == "DESCENDING")
+
+        if self._after is not None:
+            ids = [doc_id for doc_id, _ in matches]
+            if self._after.id in ids:
+                matches = matches[ids.index(self._after.id) + 1 :]
+        if self._limit is not None:
+            matches = matches[: self._limit]
+        return matches
+
+    def stream(self, *args, **kwargs) -> Iterator[FakeSnapshot]:
+        self._db.latency.wait()
+        for doc_id, data in self._matches():
+            yield FakeSnapshot(
+                FakeDocumentReference(self._db, self._collection, doc_id), data
+            )
+
+    def get(self, *args, **kwargs) -> List[FakeSnapshot]:
+        return list(self.stream())
+
+    def count(self, alias: Optional[str] = None):
+        query = self
+
+        class _AggregationResult:
+            def __init__(self, value: int):
+                self.alias = alias or "count"
+                self.value = value
+
+        class _CountQuery:
+            def get(self, *args, **kwargs):
+                query._db.latency.wait()
+                return [[_AggregationResult(len(query._matches()))]]
+
+        return _CountQuery()
+
+
+class FakeCollection(FakeQuery):
+    def __init__(self, db: "FakeFirestore", name: str):
+        super().__init__(db, name)
+        self.id = name
+
+    def document(self, doc_id: Optional[str] = None) -> FakeDocumentReference:
+        return FakeDocumentReference(
+            self._db, self._collection, doc_id or uuid.uuid4().hex[:20]
+        )
+
+    def add(self, data: Dict) -> Tuple[None, FakeDocumentReference]:
+        reference = self.document()
+        reference.set(data)
+        return None, reference
+
+
+class FakeWriteBatch:
+    """Batched writes apply atomically after one round trip"""
+
+    def __init__(self, db: "FakeFirestore"):
+        self._db = db
+        self._writes: List[Tuple] = []
+
+    def set(self, reference, data, merge=False):
+        self._writes.append(("set", reference, data, merge))
+
+    def update(self, reference, data, option=None):
+        self._writes.append(("update", reference, data))
+
+    def delete(self, reference, option=None):
+        self._writes.append(("delete", reference))
+
+    def commit(self):
+        self._db.latency.wait()
+        for write in self._writes:
+            if write[0] == "set":
+                write[1]._set(write[2], write[3])
+            elif write[0] == "update":
+                write[1]._update(write[2])
+            else:
+                write[1]._delete()
+        self._writes = []
+        return []
+
+    def __len__(self) -> int:
+        return len(self._writes)
+
+
+class FakeBulkWriter(FakeWriteBatch):
+    def on_write_error(self, callback) -> None:
+        pass
+
+    def flush(self) -> None:
+        if self._writes:
+            self.commit()
+
+    def close(self) -> None:
+        self.flush()
+
+
+class FakeFirestore:
+    def __init__(self, latency: LatencyModel):
+        self.latency = latency
+        self.lock = threading.Lock()
+        self.data: Dict[str, Dict[str, Dict]] = {}
+
+    def collection_data(self, name: str) -> Dict[str, Dict]:
+        return self.data.setdefault(name, {})
+
+    def collection(self, name: str) -> FakeCollection:
+        return FakeCollection(self, name)
+
+    def batch(self) -> FakeWriteBatch:
+        return FakeWriteBatch(self)
+
+    def bulk_writer(self) -> FakeBulkWriter:
+        return FakeBulkWriter(self)
+
+    def get_all(self, references: Iterable, field_paths=None, **kwargs):
+        references = list(references)
+        self.latency.wait()
+        for reference in references:
+            yield FakeSnapshot(reference, reference._docs().get(reference.id))
+
+    def write_option(self, **kwargs):
+        return kwargs
+
+    def close(self) -> None:
+        pass
+
+
+# Cloud Storage
+
+
+class FakeBlob:
+    def __init__(self, bucket: "FakeBucket", name: str):
+        self.bucket = bucket
+        self.name = name
+        self.cache_control: Optional[str] = None
+        self.content_type: Optional[str] = None
+        self.size: Optional[int] = None
+        self.time_created: Optional[datetime] = None
+
+    @property
+    def public_url(self) -> str:
+        return f"https://storage.googleapis.com/{self.bucket.name}/{quote(self.name, safe='/~')}"
+
+    def upload_from_string(self, data, content_type=None, **kwargs) -> None:
+        self.bucket.latency.wait()
+        if isinstance(data, str):
+            data = data.encode("utf-8")
+        with self.bucket.lock:
+            self.bucket.objects[self.name] = (bytes(data), datetime.now(timezone.utc))
+
+    def make_public(self) -> None:
+        self.bucket.latency.wait()
+
+    def download_as_bytes(self, **kwargs) -> bytes:
+        self.bucket.latency.wait()
+        return self.bucket.objects[self.name][0]
+
+    def exists(self, **kwargs) -> bool:
+        self.bucket.latency.wait()
+        return self.name in self.bucket.objects
+
+    def delete(self, **kwargs) -> None:
+        self.bucket.latency.wait()
+        with self.bucket.lock:
+            if self.bucket.objects.pop(self.name, None) is None:
+                raise FakeDependencyError(f"404 No such object: {self.name}")
+
+
+class _FakePage(list):
+    @property
+    def num_items(self) -> int:
+        return len(self)
+
+
+class _FakeBlobIterator:
+    def __init__(self, blobs: List[FakeBlob], page_size: int):
+        self._blobs = blobs
+        self._page_size = page_size
+        self.next_page_token: Optional[str] = None
+
+    def __iter__(self):
+        return iter(self._blobs)
+
+    @property
+    def pages(self):
+        for start in range(0, len(self._blobs), self._page_size):
+            end = start + self._page_size
+            self.next_page_token = str(end) if end < len(self._blobs) else None
+            yield _FakePage(self._blobs[start:end])
+
+
+class FakeBucket:
+    def __init__(self, name: str, latency: LatencyModel):
+        self.name = name
+        self.latency = latency
+        self.lock = threading.Lock()
+        self.objects: Dict[str, Tuple[bytes, datetime]] = {}
+
+    def blob(self, name: str) -> FakeBlob:
+        return FakeBlob(self, name)
+
+    def list_blobs(
+        self,
+        prefix: str = "",
+        max_results: Optional[int] = None,
+        page_size: Optional[int] = None,
+        start_offset: Optional[str] = None,
+        page_token: Optional[str] = None,
+        **kwargs,
+    ) -> _FakeBlobIterator:
+        self.latency.wait()
+        with self.lock:
+            names = sorted(name for name in self.objects if name.startswith(prefix))
+        if start_offset:
+            names = [name for name in names if name >= start_offset]
+        if page_token:
+            names = names[int(page_token) :]
+        if max_results:
+            names = names[:max_results]
+
+        blobs = []
+        for name in names:
+            blob = FakeBlob(self, name)
+            content, created = self.objects.get(name, (b"", None))
+            blob.size, blob.time_created = len(content), created
+            blobs.append(blob)
+        return _FakeBlobIterator(blobs, page_size or 1000)
+
+
+class _NullBatch:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+class FakeStorage:
+    def __init__(self, latency: LatencyModel):
+        self.latency = latency
+        self._buckets: Dict[str, FakeBucket] = {}
+
+    def bucket(self, name: str) -> FakeBucket:
+        if name not in self._buckets:
+            self._buckets[name] = FakeBucket(name, self.latency)
+        return self._buckets[name]
+
+    def list_blobs(self, bucket, **kwargs):
+        if not isinstance(bucket, FakeBucket):
+            bucket = self.bucket(bucket)
+        return bucket.list_blobs(**kwargs)
+
+    def batch(self, raise_exception: bool = True) -> _NullBatch:
+        return _NullBatch()
+
+    def close(self) -> None:
+        pass
+
+
+# Roboflow and Gemini
+
+WASTE_CLASSES = ["plastic_bottle", "aluminum_can", "paper", "cardboard", "glass_bottle"]
+
+
+class FakeInferenceClient:
+    """inference_sdk.InferenceHTTPClient"""
+
+    latency = LatencyModel("roboflow")
+
+    def __init__(self, api_url: str = "", api_key: str = ""):
+        self._random = random.Random(7)
+
+    def infer(self, image, model_id: Optional[str] = None) -> Dict[str, Any]:
+        self.latency.wait()
+        width, height = getattr(image, "size", (640, 480))
+        return {
+            "predictions": [
+                {
+                    "class": self._random.choice(WASTE_CLASSES),
+                    "confidence": round(self._random.uniform(0.5, 0.99), 3),
+                    "x": width / 2,
+                    "y": height / 2,
+                    "width": width / 3,
+                    "height": height / 3,
+                }
+            ]
+        }
+
+
+class _FakeGeminiResponse:
+    def __init__(self, text: str):
+        self.text = text
+
+
+class _FakeGeminiModels:
+    def __init__(self, latency: LatencyModel):
+        self._latency = latency
+
+    def generate_content(self, model: str, contents: str, **kwargs):
+        self._latency.wait()
+        return _FakeGeminiResponse(
+            json.dumps(
+                {
+                    "recommended_bin_id": BIN_IDS[0],
+                    "disposal_tips": "Rinse and drop in the recycling bin.",
+                    "preparation_steps": "Empty and rinse the item.",
+                    "environmental_note": "Recycling saves energy and resources.",
+                }
+            )
+        )
+
+
+class FakeGeminiClient:
+    """google.genai.Client"""
+
+    latency = LatencyModel("gemini")
+
+    def __init__(self, api_key: str = "", **kwargs):
+        self.models = _FakeGeminiModels(self.latency)
+
+
+# Installation
+
+
+class FakeServices:
+    def __init__(self, config: Dict[str, Dict[str, float]], seed: int = 1):
+        self.config = config
+        self.firestore = FakeFirestore(
+            LatencyModel("firestore", seed=seed, **config["firestore"])
+        )
+        self.storage = FakeStorage(LatencyModel("gcs", seed=seed + 1, **config["gcs"]))
+        FakeInferenceClient.latency = LatencyModel(
+            "roboflow", seed=seed + 2, **config["roboflow"]
+        )
+        FakeGeminiClient.latency = LatencyModel(
+            "gemini", seed=seed + 3, **config["gemini"]
+        )
+
+
+def load_config(profile: str = "realistic", overrides_path: Optional[str] = None):
+    """A named profile, optionally overridden per dependency from a JSON file"""
+    config = {name: dict(values) for name, values in PROFILES[profile].items()}
+    if overrides_path:
+        with open(overrides_path, encoding="utf-8") as f:
+            for name, values in json.load(f).items():
+                config.setdefault(name, {}).update(values)
+    return config
+
+
+def install_fakes(config: Dict[str, Dict[str, float]], seed: int = 1) -> FakeServices:
+    """
+    Register the fakes as overrides for the app's lazily built SDK clients.
+    Environment defaults are set first, so call this before importing `app`.
+    """
+    import os
+
+    os.environ.setdefault("GCS_BUCKET_NAME", BENCH_BUCKET)
+    os.environ.setdefault("APP_NAME", "Trasholini benchmark")
+    os.environ.setdefault("APP_VERSION", "bench")
+
+    from app.core.clients import override_client
+
+    services = FakeServices(config, seed)
+    override_client("firestore", services.firestore)
+    override_client("storage", services.storage)
+    override_client("roboflow", FakeInferenceClient())
+    override_client("gemini", FakeGeminiClient())
+    return services
+
+
+def seed_data(services: FakeServices, users: int, history_per_user: int) -> None:
+    """Bins catalog, one profile per user and some disposal history each"""
+    bins = services.firestore.collection_data("bins")
+    for index, bin_id in enumerate(BIN_IDS):
+        bins[bin_id] = {
+            "name": f"Bin {index}",
+            "description": f"Bin {index} waste",
+            "color": "0xFF2196F3",
+            "imagePath": f"assets/bins/{index}.png",
+        }
+
+    profiles = services.firestore.collection_data("profiles")
+    history = services.firestore.collection_data("disposal-history")
+    available = services.firestore.collection_data("available-bins")
+    start = datetime(2025, 1, 1, tzinfo=timezone.utc)
+
+    for user_index in range(users):
+        user_id = f"bench-user-{user_index}"
+        profiles[uuid.uuid4().hex[:20]] = {
+            "user_id": user_id,
+            "email": f"{user_id}@example.com",
+            "display_name": user_id,
+            "photo_url": None,
+            "eco_points": 0,
+            "total_scans": 0,
+            "created_at": start,
+            "updated_at": start,
+        }
+        available[user_id] = {"bin_ids": BIN_IDS[:3]}
+        for item in range(history_per_user):
+            saved = start + timedelta(minutes=item)
+            history[uuid.uuid4().hex[:20]] = {
+                "user_id": user_id,
+                "waste_class": WASTE_CLASSES[item % len(WASTE_CLASSES)],
+                "confidence": 0.9,
+                "disposal_tips": "Rinse and recycle.",
+                "preparation_steps": "Empty it.",
+                "environmental_note": "Saves energy.",
+                "message": "Saved from benchmark",
+                "recommended_bin": {
+                    "id": BIN_IDS[0],
+                    "name": "Bin 0",
+                    "description": "Bin 0 waste",
+                },
+                "image_url": f"https://storage.googleapis.com/{BENCH_BUCKET}/disposal-images/{user_id}/{item}.jpg",
+                "image_filename": f"{item}.jpg",
+                "created_at": saved,
+                "saved_at": saved.isoformat(),
+            }
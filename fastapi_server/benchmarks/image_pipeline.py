@@ -0,0 +1,257 @@
+"""
+Time and allocations per stage of the image preprocessing pipeline.
+
+Stages are the functions the upload and WebSocket paths run today, plus a
+few alternative strategies for comparison (prefixed `alt_`). Each stage runs
+over a synthetic phone-camera corpus - noisy, gradient-lit photos at common
+sensor resolutions as baseline JPEG, EXIF-rotated JPEG, PNG screenshots and
+the 4:2:0 JPEGs phones produce when converting HEIC for upload - or over a
+directory of real photos with --corpus.
+
+peak_alloc_kb is the tracemalloc peak, i.e. Python-level allocations such as
+the decoded base64 bytes and the re-encoded output; Pillow's pixel buffers are
+allocated in C and do not show up there.
+
+Usage:
+    python -m benchmarks.image_pipeline [--repeat 5] [--stages a,b]
+        [--resolutions 1280x960,4032x3024] [--corpus DIR] [--output out.json]
+"""
+
+import argparse
+import base64
+import io
+import json
+import os
+import statistics
+import sys
+import time
+import tracemalloc
+from typing import Callable, Dict, List, Tuple
+
+from PIL import Image
+
+from benchmarks.fakes import install_fakes, load_config
+
+DEFAULT_RESOLUTIONS = "640x480,1280x960,1920x1440,4032x3024"
+
+# EXIF orientation 6: the sensor image must be rotated 90 degrees on display
+_EXIF_ORIENTATION_TAG = 0x0112
+
+
+class CorpusImage:
+    def __init__(self, name: str, data: bytes, filename: str, content_type: str):
+        self.name = name
+        self.data = data
+        self.filename = filename
+        self.content_type = content_type
+        self.base64 = base64.b64encode(data).decode("ascii")
+
+
+def _photo(width: int, height: int) -> Image.Image:
+    """Sensor noise over a lighting gradient; compresses like a real photo"""
+    noise = Image.effect_noise((width, height), 40).convert("L")
+    gradient = Image.linear_gradient("L").resize((width, height))
+    return Image.merge("RGB", (Image.blend(noise, gradient, 0.5), gradient, noise))
+
+
+def synthetic_corpus(resolutions: List[Tuple[int, int]]) -> List[CorpusImage]:
+    corpus = []
+    for width, height in resolutions:
+        image = _photo(width, height)
+        label = f"{width}x{height}"
+
+        buffer = io.BytesIO()
+        image.save(buffer, format="JPEG", quality=92)
+        corpus.append(
+            CorpusImage(f"jpeg_{label}", buffer.getvalue(), "photo.jpg", "image/jpeg")
+        )
+
+        exif = Image.Exif()
+        exif[_EXIF_ORIENTATION_TAG] = 6
+        buffer = io.BytesIO()
+        image.save(buffer, format="JPEG", quality=92, exif=exif.tobytes())
+        corpus.append(
+            CorpusImage(
+                f"jpeg_exif_{label}", buffer.getvalue(), "IMG_0001.JPG", "image/jpeg"
+            )
+        )
+
+        # What iOS hands over when a HEIC photo is shared as JPEG
+        buffer = io.BytesIO()
+        image.save(buffer, format="JPEG", quality=90, subsampling="4:2:0")
+        corpus.append(
+            CorpusImage(
+                f"heic_converted_{label}",
+                buffer.getvalue(),
+                "IMG_0002.jpeg",
+                "application/octet-stream",
+            )
+        )
+
+        buffer = io.BytesIO()
+        image.save(buffer, format="PNG", compress_level=6)
+        corpus.append(
+            CorpusImage(
+                f"png_{label}", buffer.getvalue(), "screenshot.png", "image/png"
+            )
+        )
+    return corpus
+
+
+def directory_corpus(path: str) -> List[CorpusImage]:
+    corpus = []
+    for name in sorted(os.listdir(path)):
+        full_path = os.path.join(path, name)
+        if not os.path.isfile(full_path):
+            continue
+        with open(full_path, "rb") as f:
+            data = f.read()
+        corpus.append(CorpusImage(name, data, name, "image/jpeg"))
+    return corpus
+
+
+class _Upload:
+    """The attributes is_valid_image_file reads from an UploadFile"""
+
+    def __init__(self, filename: str, content_type: str):
+        self.filename = filename
+        self.content_type = content_type
+
+
+def build_stages() -> Dict[str, Callable[[CorpusImage], object]]:
+    from app.apis.scan_router import is_valid_image_file, validate_image_content
+    from app.services.waste_detection import waste_detection_service
+
+    def reencode_for_detection(item: CorpusImage) -> str:
+        # analyze_waste_from_upload: decode, convert, re-encode JPEG, base64
+        image = Image.open(io.BytesIO(item.data))
+        if image.mode != "RGB":
+            image = image.convert("RGB")
+        buffer = io.BytesIO()
+        image.save(buffer, format="JPEG", quality=85)
+        return base64.b64encode(buffer.getvalue()).decode()
+
+    def alt_validate_header_only(item: CorpusImage) -> bool:
+        # Image.open parses the header only; no full-file verify pass
+        with Image.open(io.BytesIO(item.data)) as image:
+            return image.width > 0 and image.height > 0
+
+    def alt_decode_draft_1024(item: CorpusImage) -> Image.Image:
+        # JPEG DCT scaling: decode at 1/2, 1/4 or 1/8 size when that covers 1024px
+        image = Image.open(io.BytesIO(item.data))
+        image.draft("RGB", (1024, 1024))
+        image = image.convert("RGB")
+        image.thumbnail((1024, 1024))
+        return image
+
+    def alt_reencode_draft_1024(item: CorpusImage) -> str:
+        buffer = io.BytesIO()
+        alt_decode_draft_1024(item).save(buffer, format="JPEG", quality=85)
+        return base64.b64encode(buffer.getvalue()).decode()
+
+    return {
+        "is_valid_image_file": lambda item: is_valid_image_file(
+            _Upload(item.filename, item.content_type)
+        ),
+        "validate_image_content": lambda item: validate_image_content(item.data),
+        "process_image_from_base64": lambda item: waste_detection_service.process_image_from_base64(
+            item.base64, "benchmark"
+        ),
+        "reencode_for_detection": reencode_for_detection,
+        "alt_validate_header_only": alt_validate_header_only,
+        "alt_decode_draft_1024": alt_decode_draft_1024,
+        "alt_reencode_draft_1024": alt_reencode_draft_1024,
+    }
+
+
+def measure(
+    stage: Callable[[CorpusImage], object], item: CorpusImage, repeat: int
+) -> Dict[str, float]:
+    # Warm-up call: imports, codec initialization
+    stage(item)
+
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        stage(item)
+        timings.append(time.perf_counter() - start)
+
+    # Separate pass: tracemalloc would inflate the timings above
+    tracemalloc.start()
+    try:
+        tracemalloc.reset_peak()
+        before, _ = tracemalloc.get_traced_memory()
+        result = stage(item)
+        _, peak = tracemalloc.get_traced_memory()
+        del result
+    finally:
+        tracemalloc.stop()
+
+    return {
+        "ms_median": round(statistics.median(timings) * 1000, 3),
+        "ms_min": round(min(timings) * 1000, 3),
+        "peak_alloc_kb": round((peak - before) / 1024, 1),
+    }
+
+
+def run(
+    corpus: List[CorpusImage], stage_names: List[str], repeat: int
+) -> Dict[str, Dict[str, Dict[str, float]]]:
+    stages = build_stages()
+    results: Dict[str, Dict[str, Dict[str, float]]] = {}
+    for name in stage_names:
+        results[name] = {}
+        for item in corpus:
+            results[name][item.name] = measure(stages[name], item, repeat)
+            print(
+                f"{name:<28} {item.name:<28} {results[name][item.name]}",
+                file=sys.stderr,
+            )
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--stages", help="Comma-separated subset of stages")
+    parser.add_argument("--resolutions", default=DEFAULT_RESOLUTIONS)
+    parser.add_argument(
+        "--corpus", help="Directory of real photos instead of synthetic ones"
+    )
+    parser.add_argument("--output", help="Also write the JSON results here")
+    args = parser.parse_args()
+
+    # The stages live in modules that build SDK clients at import time
+    install_fakes(load_config("zero"))
+
+    if args.corpus:
+        corpus = directory_corpus(args.corpus)
+    else:
+        resolutions = [
+            tuple(int(value) for value in resolution.split("x"))
+            for resolution in args.resolutions.split(",")
+        ]
+        corpus = synthetic_corpus(resolutions)
+
+    available = list(build_stages())
+    stage_names = args.stages.split(",") if args.stages else available
+    unknown = set(stage_names) - set(available)
+    if unknown:
+        parser.error(f"Unknown stages: {', '.join(sorted(unknown))}")
+
+    report = {
+        "corpus": {
+            item.name: {"bytes": len(item.data), "base64_bytes": len(item.base64)}
+            for item in corpus
+        },
+        "stages": run(corpus, stage_names, args.repeat),
+    }
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output + "\n")
+    print(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""
+Check that importing app.main stays fast and credential-free.
+
+Imports the app in a fresh interpreter with `-X importtime` and no Google or
+Roboflow credentials in the environment, then fails (exit 1) if the import
+took longer than --budget seconds, raised, or loaded one of the heavy SDKs
+that must only be imported when their client is first built.
+
+Usage:
+    python -m benchmarks.import_time [--budget 1.5] [--module app.main] [--top 15]
+"""
+
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+from typing import Dict, List, Tuple
+
+# Pulled in by the lazily built clients, never by importing the app
+DEFERRED_MODULES = ("inference_sdk", "google.genai", "cv2", "matplotlib")
+
+_IMPORTTIME_LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|(\s*)(\S+)$")
+
+_CREDENTIAL_SETTINGS = (
+    "GOOGLE_FIREBASE_CREDENTIALS",
+    "GOOGLE_STORAGE_CREDENTIALS",
+    "GOOGLE_APPLICATION_CREDENTIALS",
+    "ROBOFLOW_API_KEY",
+    "GEMINI_API_KEY",
+)
+
+
+def measure_import(module: str) -> Tuple[int, str, Dict[str, int]]:
+    """Return code, stderr and cumulative microseconds per top-level import"""
+    env = {
+        key: value
+        for key, value in os.environ.items()
+        if key not in _CREDENTIAL_SETTINGS
+    }
+    # FastAPI refuses an empty title or version; everything else may stay unset
+    env.setdefault("APP_NAME", "Trasholini")
+    env.setdefault("APP_VERSION", "import-check")
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        env=env,
+        cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    )
+
+    cumulative: Dict[str, int] = {}
+    other_lines: List[str] = []
+    for line in completed.stderr.splitlines():
+        match = _IMPORTTIME_LINE.match(line)
+        if match:
+            cumulative[match.group(4)] = int(match.group(2))
+        elif not line.startswith("import time:"):
+            other_lines.append(line)
+    return completed.returncode, "\n".join(other_lines), cumulative
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--module", default="app.main")
+    parser.add_argument("--budget", type=float, default=1.5, help="Seconds")
+    parser.add_argument("--top", type=int, default=15)
+    args = parser.parse_args()
+
+    returncode, errors, cumulative = measure_import(args.module)
+    if returncode != 0:
+        print(errors, file=sys.stderr)
+        print(f"Importing {args.module} failed without credentials", file=sys.stderr)
+        sys.exit(1)
+
+    total = cumulative.get(args.module, 0) / 1e6
+    deferred = sorted(
+        name
+        for name in cumulative
+        if any(
+            name == prefix or name.startswith(prefix + ".")
+            for prefix in DEFERRED_MODULES
+        )
+    )
+    slowest = sorted(cumulative.items(), key=lambda item: item[1], reverse=True)
+
+    print(
+        json.dumps(
+            {
+                "module": args.module,
+                "import_seconds": round(total, 3),
+                "budget_seconds": args.budget,
+                "deferred_modules_imported": deferred,
+                "slowest": {
+                    name: round(micros / 1e6, 3) for name, micros in slowest[: args.top]
+                },
+            },
+            indent=2,
+        )
+    )
+
+    if deferred:
+        print(f"Heavy SDKs imported eagerly: {', '.join(deferred)}", file=sys.stderr)
+        sys.exit(1)
+    if total > args.budget:
+        print(
+            f"Importing {args.module} took {total:.3f}s, over the {args.budget}s budget",
+            file=sys.stderr,
+        )
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
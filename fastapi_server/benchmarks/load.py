@@ -0,0 +1,415 @@
+"""
+Load test the app against in-memory fakes and compare runs.
+
+`run` starts `benchmarks.server` in a subprocess (or targets `--url`), drives
+each scenario at the given concurrency for a fixed time and prints JSON with
+throughput, latency percentiles and server CPU per request. CPU comes from
+the server's own process_cpu_seconds_total in /metrics, so client work is
+not counted.
+
+`compare` diffs two result files and exits 1 when a scenario regressed by
+more than the threshold.
+
+Usage:
+    python -m benchmarks.load run [--scenarios analyze,history,ws_detect]
+        [--concurrency 16] [--duration 20] [--profile realistic]
+        [--output results.json]
+    python -m benchmarks.load compare baseline.json candidate.json [--threshold 0.1]
+"""
+
+import argparse
+import asyncio
+import base64
+import io
+import json
+import os
+import platform
+import random
+import re
+import socket
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+import httpx
+import websockets
+from PIL import Image
+
+from benchmarks.fakes import PROFILES
+
+SCENARIOS = ("analyze", "save_tips", "history", "ws_detect")
+DEFAULT_SCENARIOS = "analyze,save_tips,history,ws_detect"
+
+# Metrics compared by `compare`: (path, higher is worse)
+COMPARED_METRICS: List[Tuple[Tuple[str, ...], bool]] = [
+    (("throughput_rps",), False),
+    (("latency_ms", "p50"), True),
+    (("latency_ms", "p95"), True),
+    (("latency_ms", "p99"), True),
+    (("cpu_ms_per_request",), True),
+    (("error_rate",), True),
+]
+
+_CPU_PATTERN = re.compile(r"^process_cpu_seconds_total (\S+)$", re.MULTILINE)
+
+
+def _percentile(sorted_values: List[float], fraction: float) -> float:
+    """Nearest-rank percentile"""
+    if not sorted_values:
+        return 0.0
+    index = max(
+        0,
+        min(
+            len(sorted_values) - 1, int(round(fraction * len(sorted_values) + 0.5)) - 1
+        ),
+    )
+    return sorted_values[index]
+
+
+def _phone_photo(width: int = 1280, height: int = 960) -> bytes:
+    """A noisy JPEG so it compresses like a camera photo, not a flat color"""
+    image = Image.effect_noise((width, height), 48).convert("RGB")
+    buffer = io.BytesIO()
+    image.save(buffer, format="JPEG", quality=85)
+    return buffer.getvalue()
+
+
+class ScenarioRunner:
+    def __init__(self, base_url: str, users: int, image: bytes):
+        self.base_url = base_url.rstrip("/")
+        self.ws_url = "ws" + self.base_url[len("http") :] + "/ws/detect"
+        self.users = users
+        self.image = image
+        self.image_b64 = base64.b64encode(image).decode("ascii")
+        self._random = random.Random(3)
+
+    def _user_headers(self) -> Dict[str, str]:
+        return {"X-User-ID": f"bench-user-{self._random.randrange(self.users)}"}
+
+    async def analyze(self, client: httpx.AsyncClient) -> bool:
+        response = await client.post(
+            "/scan/analyze",
+            json={"image": self.image_b64},
+            headers=self._user_headers(),
+        )
+        return response.status_code == 200
+
+    async def save_tips(self, client: httpx.AsyncClient) -> bool:
+        response = await client.post(
+            "/scan/save-tips",
+            headers=self._user_headers(),
+            files={"file": ("photo.jpg", self.image, "image/jpeg")},
+            data={
+                "waste_class": "plastic_bottle",
+                "confidence": "0.91",
+                "disposal_tips": "Rinse and recycle.",
+                "preparation_steps": "Empty it.",
+                "environmental_note": "Saves energy.",
+                "message": "Saved from benchmark",
+            },
+        )
+        return response.status_code == 200
+
+    async def history(self, client: httpx.AsyncClient) -> bool:
+        response = await client.get(
+            "/disposal/history", params={"limit": 50}, headers=self._user_headers()
+        )
+        return response.status_code == 200
+
+    async def run_http(
+        self,
+        name: str,
+        concurrency: int,
+        duration: float,
+        latencies: List[float],
+        errors: List[int],
+    ) -> None:
+        request = getattr(self, name)
+        limits = httpx.Limits(
+            max_connections=concurrency, max_keepalive_connections=concurrency
+        )
+        async with httpx.AsyncClient(
+            base_url=self.base_url, limits=limits, timeout=60
+        ) as client:
+            deadline = time.perf_counter() + duration
+
+            async def worker() -> None:
+                while time.perf_counter() < deadline:
+                    start = time.perf_counter()
+                    try:
+                        ok = await request(client)
+                    except httpx.HTTPError:
+                        ok = False
+                    latencies.append(time.perf_counter() - start)
+                    if not ok:
+                        errors[0] += 1
+
+            await asyncio.gather(*(worker() for _ in range(concurrency)))
+
+    async def run_ws_detect(
+        self,
+        concurrency: int,
+        duration: float,
+        latencies: List[float],
+        errors: List[int],
+    ) -> None:
+        """One phone per worker: a session sending frames back to back"""
+        frame = json.dumps({"type": "detect", "image": self.image_b64})
+        deadline = time.perf_counter() + duration
+
+        async def session() -> None:
+            async with websockets.connect(self.ws_url, max_size=None) as ws:
+                await ws.recv()  # welcome message
+                while time.perf_counter() < deadline:
+                    start = time.perf_counter()
+                    await ws.send(frame)
+                    reply = json.loads(await ws.recv())
+                    latencies.append(time.perf_counter() - start)
+                    if reply.get("type") != "detection_result":
+                        errors[0] += 1
+
+        await asyncio.gather(*(session() for _ in range(concurrency)))
+
+
+async def _server_cpu_seconds(base_url: str) -> Optional[float]:
+    try:
+        async with httpx.AsyncClient(base_url=base_url, timeout=10) as client:
+            response = await client.get("/metrics")
+        match = _CPU_PATTERN.search(response.text)
+        return float(match.group(1)) if match else None
+    except httpx.HTTPError:
+        return None
+
+
+async def run_scenario(
+    runner: ScenarioRunner, name: str, concurrency: int, duration: float, warmup: float
+) -> Dict[str, Any]:
+    async def drive(seconds: float, latencies: List[float], errors: List[int]):
+        if name == "ws_detect":
+            await runner.run_ws_detect(concurrency, seconds, latencies, errors)
+        else:
+            await runner.run_http(name, concurrency, seconds, latencies, errors)
+
+    if warmup > 0:
+        await drive(warmup, [], [0])
+
+    latencies: List[float] = []
+    errors = [0]
+    cpu_before = await _server_cpu_seconds(runner.base_url)
+    started = time.perf_counter()
+    await drive(duration, latencies, errors)
+    elapsed = time.perf_counter() - started
+    cpu_after = await _server_cpu_seconds(runner.base_url)
+
+    latencies.sort()
+    count = len(latencies)
+    result: Dict[str, Any] = {
+        "requests": count,
+        "errors": errors[0],
+        "error_rate": round(errors[0] / count, 4) if count else 0.0,
+        "duration_s": round(elapsed, 3),
+        "throughput_rps": round(count / elapsed, 2) if elapsed else 0.0,
+        "latency_ms": {
+            "p50": round(_percentile(latencies, 0.50) * 1000, 2),
+            "p95": round(_percentile(latencies, 0.95) * 1000, 2),
+            "p99": round(_percentile(latencies, 0.99) * 1000, 2),
+            "mean": round(sum(latencies) / count * 1000, 2) if count else 0.0,
+            "max": round(latencies[-1] * 1000, 2) if count else 0.0,
+        },
+        "cpu_ms_per_request": None,
+    }
+    if cpu_before is not None and cpu_after is not None and count:
+        result["cpu_ms_per_request"] = round((cpu_after - cpu_before) / count * 1000, 3)
+    return result
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_server(args: argparse.Namespace) -> Tuple[subprocess.Popen, str]:
+    port = _free_port()
+    command = [
+        sys.executable,
+        "-m",
+        "benchmarks.server",
+        "--port",
+        str(port),
+        "--profile",
+        args.profile,
+        "--users",
+        str(args.users),
+        "--history",
+        str(args.history),
+    ]
+    if args.fake_config:
+        command += ["--fake-config", args.fake_config]
+
+    cwd = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    process = subprocess.Popen(command, cwd=cwd)
+    base_url = f"http://127.0.0.1:{port}"
+
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"Benchmark server exited with {process.returncode}")
+        try:
+            if httpx.get(f"{base_url}/test/health", timeout=1).status_code == 200:
+                return process, base_url
+        except httpx.HTTPError:
+            time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError("Benchmark server did not become healthy within 60s")
+
+
+def _git_revision() -> Optional[str]:
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"],
+            stderr=subprocess.DEVNULL,
+            text=True,
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def command_run(args: argparse.Namespace) -> int:
+    scenarios = [name.strip() for name in args.scenarios.split(",") if name.strip()]
+    unknown = set(scenarios) - set(SCENARIOS)
+    if unknown:
+        print(f"Unknown scenarios: {', '.join(sorted(unknown))}", file=sys.stderr)
+        return 2
+
+    process = None
+    base_url = args.url
+    if not base_url:
+        process, base_url = start_server(args)
+
+    try:
+        runner = ScenarioRunner(base_url, args.users, _phone_photo())
+        results = {}
+        for name in scenarios:
+            results[name] = asyncio.run(
+                run_scenario(runner, name, args.concurrency, args.duration, args.warmup)
+            )
+            print(f"{name}: {json.dumps(results[name])}", file=sys.stderr)
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait(timeout=30)
+
+    report = {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "git_revision": _git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "target": args.url or "benchmarks.server",
+            "profile": None if args.url else args.profile,
+            "fake_config": args.fake_config,
+            "concurrency": args.concurrency,
+            "duration_s": args.duration,
+        },
+        "scenarios": results,
+    }
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output + "\n")
+    print(output)
+    return 0
+
+
+def _lookup(values: Dict[str, Any], path: Tuple[str, ...]) -> Optional[float]:
+    for key in path:
+        if not isinstance(values, dict) or key not in values:
+            return None
+        values = values[key]
+    return values
+
+
+def compare_reports(
+    baseline: Dict[str, Any], candidate: Dict[str, Any], threshold: float
+) -> Tuple[List[Dict[str, Any]], bool]:
+    """Per-metric relative change; a change beyond `threshold` in the bad direction regresses"""
+    rows = []
+    regressed = False
+    for scenario, base_values in baseline["scenarios"].items():
+        new_values = candidate["scenarios"].get(scenario)
+        if new_values is None:
+            continue
+        for path, higher_is_worse in COMPARED_METRICS:
+            old, new = _lookup(base_values, path), _lookup(new_values, path)
+            if old is None or new is None:
+                continue
+            change = (new - old) / old if old else (0.0 if new == old else float("inf"))
+            worse = change > threshold if higher_is_worse else change < -threshold
+            # Error rates near zero make relative change meaningless
+            if path == ("error_rate",):
+                worse = new - old > 0.01
+            regressed = regressed or worse
+            rows.append(
+                {
+                    "scenario": scenario,
+                    "metric": ".".join(path),
+                    "baseline": old,
+                    "candidate": new,
+                    "change": round(change, 4) if change != float("inf") else None,
+                    "regression": worse,
+                }
+            )
+    return rows, regressed
+
+
+def command_compare(args: argparse.Namespace) -> int:
+    with open(args.baseline, encoding="utf-8") as f:
+        baseline = json.load(f)
+    with open(args.candidate, encoding="utf-8") as f:
+        candidate = json.load(f)
+
+    rows, regressed = compare_reports(baseline, candidate, args.threshold)
+    for row in rows:
+        change = "n/a" if row["change"] is None else f"{row['change'] * 100:+.1f}%"
+        flag = "  REGRESSION" if row["regression"] else ""
+        print(
+            f"{row['scenario']:<10} {row['metric']:<20} "
+            f"{row['baseline']:>10} -> {row['candidate']:>10} {change:>9}{flag}"
+        )
+    print(json.dumps({"regressed": regressed, "threshold": args.threshold}))
+    return 1 if regressed else 0
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run = commands.add_parser("run", help="Run scenarios and print JSON results")
+    run.add_argument("--scenarios", default=DEFAULT_SCENARIOS)
+    run.add_argument("--concurrency", type=int, default=16)
+    run.add_argument("--duration", type=float, default=20.0)
+    run.add_argument("--warmup", type=float, default=2.0)
+    run.add_argument("--profile", choices=sorted(PROFILES), default="realistic")
+    run.add_argument("--fake-config")
+    run.add_argument("--users", type=int, default=50)
+    run.add_argument("--history", type=int, default=100)
+    run.add_argument("--url", help="Target a running server instead of starting one")
+    run.add_argument("--output", help="Also write the JSON report here")
+    run.set_defaults(handler=command_run)
+
+    compare = commands.add_parser("compare", help="Flag regressions between two runs")
+    compare.add_argument("baseline")
+    compare.add_argument("candidate")
+    compare.add_argument("--threshold", type=float, default=0.1)
+    compare.set_defaults(handler=command_compare)
+
+    args = parser.parse_args()
+    sys.exit(args.handler(args))
+
+
+if __name__ == "__main__":
+    main()
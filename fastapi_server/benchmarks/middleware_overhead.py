@@ -0,0 +1,215 @@
+"""
+Per-request overhead of the middleware stack, before and after the move
+to a single pure ASGI middleware.
+
+Both stacks wrap the same trivial FastAPI endpoint and are driven directly
+through the ASGI interface (no sockets), so the numbers are the cost of the
+middleware layers themselves.
+
+Usage:
+    python -m benchmarks.middleware_overhead [--requests 20000] [--repeat 5]
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import statistics
+import time
+import uuid
+from typing import Awaitable, Callable, Dict, List
+from fastapi import FastAPI, Request, Response
+from fastapi.middleware.cors import CORSMiddleware
+from starlette.middleware.base import BaseHTTPMiddleware
+from app.middlewares.request_context_middleware import RequestContextMiddleware
+
+logger = logging.getLogger("benchmarks.middleware")
+
+
+class LegacyUserIDMiddleware(BaseHTTPMiddleware):
+    """The former app.middlewares.user_id_middleware.UserIDMiddleware"""
+
+    async def dispatch(self, request: Request, call_next: Callable) -> Response:
+        user_id = request.headers.get("X-User-ID")
+        if not user_id:
+            user_id = request.query_params.get("user_id")
+        request.state.user_id = user_id
+        if user_id:
+            logger.info(
+                f"Request from user: {user_id} - {request.method} {request.url.path}"
+            )
+        else:
+            logger.info(f"Anonymous request: {request.method} {request.url.path}")
+        return await call_next(request)
+
+
+def _endpoint_app() -> FastAPI:
+    application = FastAPI(title="bench", version="0")
+
+    @application.get("/bin/available")
+    async def available(request: Request):
+        return {"bins": [], "user": getattr(request.state, "user_id", None)}
+
+    return application
+
+
+def build_legacy_app() -> FastAPI:
+    """CORS + UserIDMiddleware + request-id and security-header http middlewares"""
+    application = _endpoint_app()
+    application.add_middleware(
+        CORSMiddleware,
+        allow_origins=["*"],
+        allow_credentials=True,
+        allow_methods=["*"],
+        allow_headers=["*"],
+    )
+    application.add_middleware(LegacyUserIDMiddleware)
+
+    @application.middleware("http")
+    async def add_request_id_middleware(
+        request: Request, call_next: Callable[[Request], Awaitable[Response]]
+    ):
+        request_id = str(uuid.uuid4())
+        request.state.request_id = request_id
+        start_time = time.time()
+        logger.info(
+            f"Request started: {request.method} {request.url.path} (ID: {request_id})"
+        )
+        response = await call_next(request)
+        process_time = time.time() - start_time
+        logger.info(
+            f"Request completed: {request.method} {request.url.path} "
+            f"(ID: {request_id}, Status: {response.status_code}, "
+            f"Time: {process_time:.3f}s)"
+        )
+        response.headers["X-Request-ID"] = request_id
+        return response
+
+    @application.middleware("http")
+    async def add_security_headers_middleware(
+        request: Request, call_next: Callable[[Request], Awaitable[Response]]
+    ):
+        response = await call_next(request)
+        response.headers["X-Content-Type-Options"] = "nosniff"
+        response.headers["X-Frame-Options"] = "DENY"
+        response.headers["X-XSS-Protection"] = "1; mode=block"
+        response.headers["Referrer-Policy"] = "no-referrer"
+        response.headers["Permissions-Policy"] = "geolocation=(self), microphone=()"
+        response.headers["Content-Security-Policy"] = (
+            "default-src 'self';"
+            "script-src 'self';"
+            "style-src 'self';"
+            "img-src 'self' data:;"
+            "connect-src 'self' ws: wss:"
+        )
+        return response
+
+    return application
+
+
+def build_current_app() -> FastAPI:
+    application = _endpoint_app()
+    application.add_middleware(
+        CORSMiddleware,
+        allow_origins=["*"],
+        allow_credentials=True,
+        allow_methods=["*"],
+        allow_headers=["*"],
+    )
+    application.add_middleware(RequestContextMiddleware)
+    return application
+
+
+def build_bare_app() -> FastAPI:
+    """No middleware: the floor both stacks are measured against"""
+    return _endpoint_app()
+
+
+async def _drive(app, requests: int) -> float:
+    """Send `requests` GETs through the ASGI app; returns seconds elapsed"""
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": "/bin/available",
+        "raw_path": b"/bin/available",
+        "query_string": b"",
+        "root_path": "",
+        "headers": [(b"host", b"bench"), (b"x-user-id", b"bench-user")],
+        "client": ("127.0.0.1", 50000),
+        "server": ("bench", 80),
+    }
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        pass
+
+    start = time.perf_counter()
+    for _ in range(requests):
+        await app(dict(scope), receive, send)
+    return time.perf_counter() - start
+
+
+async def _startup(app) -> None:
+    # Build the middleware stack once outside the timed loop
+    await _drive(app, 10)
+
+
+def run(requests: int, repeat: int) -> Dict[str, Dict[str, float]]:
+    apps = {
+        "bare": build_bare_app(),
+        "legacy": build_legacy_app(),
+        "current": build_current_app(),
+    }
+
+    results: Dict[str, Dict[str, float]] = {}
+    loop = asyncio.new_event_loop()
+    try:
+        for name, app in apps.items():
+            loop.run_until_complete(_startup(app))
+            samples: List[float] = []
+            for _ in range(repeat):
+                elapsed = loop.run_until_complete(_drive(app, requests))
+                samples.append(elapsed / requests * 1e6)
+            results[name] = {
+                "us_per_request_median": round(statistics.median(samples), 2),
+                "us_per_request_min": round(min(samples), 2),
+            }
+    finally:
+        loop.close()
+
+    floor = results["bare"]["us_per_request_median"]
+    for name in ("legacy", "current"):
+        results[name]["middleware_overhead_us"] = round(
+            results[name]["us_per_request_median"] - floor, 2
+        )
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--requests", type=int, default=20000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument(
+        "--log-level",
+        default="INFO",
+        help="Level for the app loggers; INFO matches production",
+    )
+    args = parser.parse_args()
+
+    # Log to a null handler so the cost of formatting is measured, not the terminal
+    for name in ("app", "benchmarks"):
+        bench_logger = logging.getLogger(name)
+        bench_logger.handlers = [logging.NullHandler()]
+        bench_logger.propagate = False
+        bench_logger.setLevel(args.log_level)
+
+    print(json.dumps(run(args.requests, args.repeat), indent=2))
+
+
+if __name__ == "__main__":
+    main()
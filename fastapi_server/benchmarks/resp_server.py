@@ -0,0 +1,113 @@
+"""
+A local stand-in for Redis, enough for CACHE_BACKEND=redis.
+
+Speaks the Redis protocol (RESP2) and supports PING, AUTH, SELECT, GET,
+SET (with EX/PX), DEL, DBSIZE and FLUSHDB, with keys expiring like Redis'.
+Single process, in memory, no persistence.
+
+Usage:
+    python -m benchmarks.resp_server [--port 6379]
+    CACHE_BACKEND=redis CACHE_REDIS_URL=redis://127.0.0.1:6379/0 python -m benchmarks.server
+"""
+
+import argparse
+import asyncio
+import time
+from typing import Dict, List, Optional, Tuple
+
+# key -> (value, expires_at or None)
+Store = Dict[bytes, Tuple[bytes, Optional[float]]]
+
+
+def _bulk(value: Optional[bytes]) -> bytes:
+    if value is None:
+        return b"$-1\r\n"
+    return b"$%d\r\n%s\r\n" % (len(value), value)
+
+
+async def _read_command(reader: asyncio.StreamReader) -> Optional[List[bytes]]:
+    line = await reader.readline()
+    if not line:
+        return None
+    if not line.startswith(b"*"):
+        # Inline command, as typed into telnet
+        return line.strip().split()
+    parts = []
+    for _ in range(int(line[1:])):
+        header = await reader.readline()
+        length = int(header[1:])
+        parts.append((await reader.readexactly(length + 2))[:-2])
+    return parts
+
+
+def execute(store: Store, parts: List[bytes]) -> bytes:
+    command = parts[0].upper()
+    args = parts[1:]
+    now = time.time()
+
+    if command == b"PING":
+        return b"+PONG\r\n"
+    if command in (b"AUTH", b"SELECT"):
+        return b"+OK\r\n"
+    if command == b"GET":
+        entry = store.get(args[0])
+        if entry is not None and entry[1] is not None and entry[1] <= now:
+            del store[args[0]]
+            entry = None
+        return _bulk(entry[0] if entry else None)
+    if command == b"SET":
+        expires_at = None
+        options = [arg.upper() for arg in args[2:]]
+        if b"PX" in options:
+            expires_at = now + int(args[2 + options.index(b"PX") + 1]) / 1000
+        elif b"EX" in options:
+            expires_at = now + int(args[2 + options.index(b"EX") + 1])
+        store[args[0]] = (args[1], expires_at)
+        return b"+OK\r\n"
+    if command == b"DEL":
+        removed = sum(1 for key in args if store.pop(key, None) is not None)
+        return b":%d\r\n" % removed
+    if command == b"DBSIZE":
+        return b":%d\r\n" % len(store)
+    if command == b"FLUSHDB":
+        store.clear()
+        return b"+OK\r\n"
+    return b"-ERR unknown command '%s'\r\n" % command
+
+
+async def serve(host: str, port: int) -> None:
+    store: Store = {}
+
+    async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                parts = await _read_command(reader)
+                if parts is None:
+                    break
+                if parts:
+                    writer.write(execute(store, parts))
+                    await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    server = await asyncio.start_server(handle, host, port)
+    print(f"RESP stand-in listening on {host}:{port}", flush=True)
+    async with server:
+        await server.serve_forever()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=6379)
+    args = parser.parse_args()
+    try:
+        asyncio.run(serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
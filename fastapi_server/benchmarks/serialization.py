@@ -0,0 +1,181 @@
+"""
+CPU cost of response and WebSocket serialization, stdlib json vs orjson.
+
+Payloads mirror the highest-volume responses: disposal history pages of
+100 and 500 items with realistic tip text, as returned by /history and
+/date-range, and the WebSocket detect request/response frames.
+
+- history_fastapi: what FastAPI did before app.core.serialization - the
+  returned model validated and serialized against response_model, then
+  rendered by JSONResponse with json.dumps.
+- history_app_response: the handler returns AppJSONResponse(model) itself.
+- history_dict_default_class: a handler returning a plain dict under the
+  default response class, i.e. response_model serialization plus orjson.
+- ws_*: one frame encoded or decoded by each library.
+
+Usage:
+    python -m benchmarks.serialization [--repeat 200] [--items 100,500]
+        [--output out.json]
+"""
+
+import argparse
+import base64
+import json
+import os
+import random
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, List
+
+from benchmarks.fakes import install_fakes, load_config
+
+_WORDS = (
+    "rinse the container remove the cap flatten cardboard before recycling "
+    "check local guidelines glass must be sorted by colour batteries belong at "
+    "collection points never in household waste compost food scraps separately"
+).split()
+
+
+def _text(rng: random.Random, words: int) -> str:
+    return " ".join(rng.choice(_WORDS) for _ in range(words)).capitalize() + "."
+
+
+def history_items(count: int, seed: int = 7) -> List[Dict[str, Any]]:
+    rng = random.Random(seed)
+    saved = datetime(2025, 6, 1, tzinfo=timezone.utc)
+    items = []
+    for index in range(count):
+        doc_id = f"doc{index:06d}"
+        items.append(
+            {
+                "id": doc_id,
+                "confidence": round(rng.uniform(0.4, 0.99), 4),
+                "disposal_tips": _text(rng, 60),
+                "environmental_note": _text(rng, 30),
+                "image_url": f"https://storage.googleapis.com/bench/{doc_id}.jpg",
+                "thumbnail_url": f"https://storage.googleapis.com/bench/{doc_id}_t.jpg",
+                "preview_url": None,
+                "preparation_steps": _text(rng, 40),
+                "recommended_bin": {
+                    "description": _text(rng, 12),
+                    "id": "IAwm6VLUto6hIHKg2p2U",
+                    "name": "Recycling",
+                },
+                "saved_at": (saved - timedelta(minutes=index)).isoformat(),
+                "user_id": "bench-user",
+                "waste_class": rng.choice(["plastic", "glass", "paper", "metal"]),
+            }
+        )
+    return items
+
+
+def build_cases(count: int) -> Dict[str, Callable[[], object]]:
+    from fastapi.responses import JSONResponse
+    from fastapi.utils import create_model_field
+
+    from app.apis.history_router import DisposalHistoryResponse
+    from app.core.serialization import AppJSONResponse
+
+    raw = history_items(count)
+    model = DisposalHistoryResponse(
+        success=True, history=raw, count=len(raw), message="bench"
+    )
+    as_dict = model.model_dump()
+    field = create_model_field(name="Response", type_=DisposalHistoryResponse)
+
+    def response_model(content: Any) -> Any:
+        # fastapi.routing.serialize_response for an async handler
+        value, _ = field.validate(content, {}, loc=("response",))
+        return field.serialize(value, mode="json", by_alias=True)
+
+    def history_fastapi() -> bytes:
+        return JSONResponse(response_model(model)).body
+
+    def history_app_response() -> bytes:
+        return AppJSONResponse(model).body
+
+    def history_dict_default_class() -> bytes:
+        return AppJSONResponse(response_model(as_dict)).body
+
+    return {
+        "history_fastapi": history_fastapi,
+        "history_app_response": history_app_response,
+        "history_dict_default_class": history_dict_default_class,
+    }
+
+
+def build_ws_cases() -> Dict[str, Callable[[], object]]:
+    from app.core.serialization import dumps_text, loads
+
+    detect_response = {
+        "type": "detection_result",
+        "success": True,
+        "detections": [
+            {
+                "class": "plastic",
+                "confidence": 0.91,
+                "bbox": {"x": 120.5, "y": 88.0, "width": 64.0, "height": 128.0},
+            }
+        ]
+        * 5,
+        "timestamp": time.time(),
+    }
+    # A 640x480 camera frame is roughly this much base64
+    detect_request = json.dumps(
+        {"type": "detect", "image": base64.b64encode(os.urandom(96_000)).decode()}
+    )
+
+    return {
+        "ws_encode_json": lambda: json.dumps(detect_response),
+        "ws_encode_orjson": lambda: dumps_text(detect_response),
+        "ws_decode_json": lambda: json.loads(detect_request),
+        "ws_decode_orjson": lambda: loads(detect_request),
+    }
+
+
+def measure(case: Callable[[], object], repeat: int) -> Dict[str, float]:
+    case()
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        case()
+        timings.append(time.perf_counter() - start)
+    return {
+        "us_median": round(statistics.median(timings) * 1e6, 1),
+        "us_min": round(min(timings) * 1e6, 1),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=200)
+    parser.add_argument("--items", default="100,500")
+    parser.add_argument("--output", help="Also write the JSON results here")
+    args = parser.parse_args()
+
+    # history_router builds SDK clients on first use
+    install_fakes(load_config("zero"))
+
+    results: Dict[str, Dict[str, Dict[str, float]]] = {}
+    groups = [
+        (f"{count}_items", build_cases(count))
+        for count in (int(value) for value in args.items.split(","))
+    ]
+    groups.append(("ws", build_ws_cases()))
+    for group, cases in groups:
+        results[group] = {}
+        for name, case in cases.items():
+            results[group][name] = measure(case, args.repeat)
+            print(f"{group:<10} {name:<28} {results[group][name]}", file=sys.stderr)
+
+    output = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output + "\n")
+    print(output)
+
+
+if __name__ == "__main__":
+    main()
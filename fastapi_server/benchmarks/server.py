@@ -0,0 +1,59 @@
+"""
+Run the app on uvicorn with in-memory fakes instead of Google/Roboflow.
+
+Usage:
+    python -m benchmarks.server [--port 8765] [--profile realistic]
+                                [--fake-config overrides.json]
+                                [--users 50] [--history 100]
+"""
+
+import argparse
+import os
+
+from benchmarks.fakes import PROFILES, install_fakes, load_config, seed_data
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--profile", choices=sorted(PROFILES), default="realistic")
+    parser.add_argument(
+        "--fake-config",
+        help='JSON overrides per dependency, e.g. {"gemini": {"median_ms": 2000}}',
+    )
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--history", type=int, default=100)
+    parser.add_argument("--seed", type=int, default=1)
+    return parser
+
+
+def main() -> None:
+    args = build_parser().parse_args()
+
+    # Paths match the deployed app: REST at the root, WebSockets under /ws
+    os.environ.setdefault("APP_API_PREFIX", "")
+    os.environ.setdefault("APP_WEB_SOCKET_PREFIX", "/ws")
+    os.environ.setdefault("LOG_LEVEL", "WARNING")
+
+    services = install_fakes(load_config(args.profile, args.fake_config), args.seed)
+    seed_data(services, args.users, args.history)
+
+    import uvicorn
+
+    from app.core.config import settings
+    from app.core.ws_compression import WebSocketProtocol
+    from app.main import app
+
+    uvicorn.run(
+        app,
+        host=args.host,
+        port=args.port,
+        log_level="warning",
+        ws=WebSocketProtocol,
+        ws_per_message_deflate=settings.WS_PER_MESSAGE_DEFLATE,
+    )
+
+
+if __name__ == "__main__":
+    main()
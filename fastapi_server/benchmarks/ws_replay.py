@@ -0,0 +1,199 @@
+"""
+Replay recorded /ws/detect sessions (WS_RECORD_DIR) against a server.
+
+Each replayed session connects, then sends the recorded client messages with
+their original spacing divided by --speed. --sessions runs that many sessions
+in parallel, cycling through the recordings, with starts spread over --ramp
+seconds. Latency is measured from each send to the reply it produced, and the
+JSON report has the same shape as `benchmarks.load run`, so two replays can
+be diffed with `benchmarks.load compare`.
+
+Usage:
+    python -m benchmarks.ws_replay recordings/ [more.wsrec ...]
+        [--url ws://127.0.0.1:8765/ws/detect] [--speed 1] [--sessions 10]
+        [--ramp 0] [--output replay.json]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import sys
+import time
+from collections import deque
+from datetime import datetime, timezone
+from typing import Any, Deque, Dict, List
+from urllib.parse import urlsplit
+
+import websockets
+
+from app.core.ws_recording import KIND_CLOSE, Record, read_session
+from benchmarks.load import _git_revision, _percentile, _server_cpu_seconds
+
+# How long to wait for outstanding replies after the last recorded message
+DRAIN_TIMEOUT_SECONDS = 30.0
+
+
+def load_recordings(paths: List[str]) -> List[List[Record]]:
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files.extend(
+                os.path.join(path, name)
+                for name in sorted(os.listdir(path))
+                if name.endswith(".wsrec")
+            )
+        else:
+            files.append(path)
+    return [read_session(path)[1] for path in files]
+
+
+class ReplayStats:
+    def __init__(self):
+        self.latencies: List[float] = []
+        self.sent = 0
+        self.errors = 0
+        self.failed_sessions = 0
+
+
+async def replay_session(
+    url: str, records: List[Record], speed: float, stats: ReplayStats
+) -> None:
+    # Sends awaiting a reply, oldest first; the server answers in order
+    pending: Deque[float] = deque()
+    drained = asyncio.Event()
+    drained.set()
+
+    async def receive(ws) -> None:
+        async for raw in ws:
+            reply = json.loads(raw)
+            # Keep-alive pings come from the server, not in reply to anything
+            if reply.get("type") == "ping" or not pending:
+                continue
+            stats.latencies.append(time.perf_counter() - pending.popleft())
+            if reply.get("type") == "error":
+                stats.errors += 1
+            if not pending:
+                drained.set()
+
+    try:
+        async with websockets.connect(url, max_size=None) as ws:
+            await ws.recv()  # welcome message
+            receiver = asyncio.create_task(receive(ws))
+            started = time.perf_counter()
+            try:
+                for record in records:
+                    delay = started + record.offset / speed - time.perf_counter()
+                    if delay > 0:
+                        await asyncio.sleep(delay)
+                    if record.kind == KIND_CLOSE:
+                        break
+                    drained.clear()
+                    pending.append(time.perf_counter())
+                    await ws.send(record.message)
+                    stats.sent += 1
+                await asyncio.wait_for(drained.wait(), DRAIN_TIMEOUT_SECONDS)
+            finally:
+                receiver.cancel()
+            stats.errors += len(pending)
+    except (OSError, asyncio.TimeoutError, websockets.WebSocketException) as e:
+        print(f"Session failed: {e!r}", file=sys.stderr)
+        stats.failed_sessions += 1
+        stats.errors += len(pending)
+
+
+async def replay(
+    url: str,
+    recordings: List[List[Record]],
+    sessions: int,
+    speed: float,
+    ramp: float,
+) -> Dict[str, Any]:
+    stats = ReplayStats()
+
+    async def delayed(index: int) -> None:
+        if ramp > 0 and sessions > 1:
+            await asyncio.sleep(ramp * index / (sessions - 1))
+        await replay_session(url, recordings[index % len(recordings)], speed, stats)
+
+    base_url = _http_base_url(url)
+    cpu_before = await _server_cpu_seconds(base_url)
+    started = time.perf_counter()
+    await asyncio.gather(*(delayed(index) for index in range(sessions)))
+    elapsed = time.perf_counter() - started
+    cpu_after = await _server_cpu_seconds(base_url)
+
+    latencies = sorted(stats.latencies)
+    count = len(latencies)
+    result: Dict[str, Any] = {
+        "sessions": sessions,
+        "failed_sessions": stats.failed_sessions,
+        "messages_sent": stats.sent,
+        "requests": count,
+        "errors": stats.errors,
+        "error_rate": round(stats.errors / stats.sent, 4) if stats.sent else 0.0,
+        "duration_s": round(elapsed, 3),
+        "throughput_rps": round(count / elapsed, 2) if elapsed else 0.0,
+        "latency_ms": {
+            "p50": round(_percentile(latencies, 0.50) * 1000, 2),
+            "p95": round(_percentile(latencies, 0.95) * 1000, 2),
+            "p99": round(_percentile(latencies, 0.99) * 1000, 2),
+            "mean": round(sum(latencies) / count * 1000, 2) if count else 0.0,
+            "max": round(latencies[-1] * 1000, 2) if count else 0.0,
+        },
+        "cpu_ms_per_request": None,
+    }
+    if cpu_before is not None and cpu_after is not None and count:
+        result["cpu_ms_per_request"] = round((cpu_after - cpu_before) / count * 1000, 3)
+    return result
+
+
+def _http_base_url(ws_url: str) -> str:
+    """ws://host:port/ws/detect -> http://host:port, for /metrics"""
+    parts = urlsplit(ws_url)
+    scheme = "https" if parts.scheme == "wss" else "http"
+    return f"{scheme}://{parts.netloc}"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("recordings", nargs="+", help=".wsrec files or directories")
+    parser.add_argument("--url", default="ws://127.0.0.1:8765/ws/detect")
+    parser.add_argument("--speed", type=float, default=1.0)
+    parser.add_argument("--sessions", type=int, help="Defaults to one per recording")
+    parser.add_argument("--ramp", type=float, default=0.0)
+    parser.add_argument("--output", help="Also write the JSON report here")
+    args = parser.parse_args()
+
+    recordings = load_recordings(args.recordings)
+    if not recordings:
+        parser.error("No recordings found")
+    if args.speed <= 0:
+        parser.error("--speed must be positive")
+    sessions = args.sessions or len(recordings)
+
+    result = asyncio.run(replay(args.url, recordings, sessions, args.speed, args.ramp))
+    report = {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "git_revision": _git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "target": args.url,
+            "recordings": len(recordings),
+            "speed": args.speed,
+            "ramp_s": args.ramp,
+        },
+        "scenarios": {"ws_replay": result},
+    }
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output + "\n")
+    print(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,37 @@
+import logging
+
+from app.core.logging import NOT_RATE_LIMITED, RateLimitFilter
+
+
+def _record(level: int, lineno: int = 132, extra=None) -> logging.LogRecord:
+    return logging.getLogger("app").makeRecord(
+        "app",
+        level,
+        "request_context_middleware.py",
+        lineno,
+        "%s %s %d %.3fs",
+        ("GET", "/disposal/history", 200, 0.012),
+        None,
+        extra=extra,
+    )
+
+
+def test_access_lines_are_not_rate_limited():
+    limiter = RateLimitFilter(burst=20, window_seconds=10)
+    passed = sum(limiter.filter(_record(logging.INFO)) for _ in range(100))
+    assert passed == 100
+
+
+def test_errors_from_one_call_site_are_rate_limited():
+    limiter = RateLimitFilter(burst=20, window_seconds=10)
+    passed = sum(limiter.filter(_record(logging.ERROR, 42)) for _ in range(100))
+    assert passed == 20
+
+
+def test_security_warnings_opt_out():
+    limiter = RateLimitFilter(burst=20, window_seconds=10)
+    passed = sum(
+        limiter.filter(_record(logging.WARNING, 7, NOT_RATE_LIMITED))
+        for _ in range(100)
+    )
+    assert passed == 100
@@ -684,6 +684,11 @@ class _AccountDeletionPageState extends ConsumerState<AccountDeletionPage> {
                 ),
               ),
 
+              if (isDeleting && deletionState.deletionResponse != null) ...[
+                const SizedBox(height: 16),
+                _buildDeletionProgress(deletionState.deletionResponse!),
+              ],
+
               if (deletionState.error != null) ...[
                 const SizedBox(height: 16),
                 Container(
@@ -783,6 +788,57 @@ class _AccountDeletionPageState extends ConsumerState<AccountDeletionPage> {
     );
   }
 
+  static const Map<String, String> _phaseLabels = {
+    'disposal_history': 'scan history',
+    'available_bins': 'bin settings',
+    'disposal_images': 'scan images',
+    'profile_images': 'profile picture',
+    'profiles': 'profile',
+  };
+
+  Widget _buildDeletionProgress(UserDeletionResponse job) {
+    final phase = job.currentPhase;
+    final label =
+        phase == null
+            ? 'Waiting to start...'
+            : 'Deleting your ${_phaseLabels[phase] ?? phase}...';
+
+    return Container(
+      padding: const EdgeInsets.all(16),
+      decoration: BoxDecoration(
+        color: Colors.orange[50],
+        borderRadius: BorderRadius.circular(12),
+        border: Border.all(color: Colors.orange[200]!),
+      ),
+      child: Column(
+        crossAxisAlignment: CrossAxisAlignment.start,
+        children: [
+          Text(
+            'Deletion in progress',
+            style: TextStyle(
+              fontWeight: FontWeight.bold,
+              color: Colors.orange[800],
+            ),
+          ),
+          const SizedBox(height: 8),
+          Text(label, style: TextStyle(color: Colors.orange[800])),
+          const SizedBox(height: 12),
+          LinearProgressIndicator(
+            value:
+                job.completedPhases.length / UserDeletionResponse.totalPhases,
+            backgroundColor: Colors.orange[100],
+            valueColor: AlwaysStoppedAnimation<Color>(Colors.orange[600]!),
+          ),
+          const SizedBox(height: 8),
+          Text(
+            'Please keep this screen open. You will be signed out when it is done.',
+            style: TextStyle(fontSize: 12, color: Colors.grey[700]),
+          ),
+        ],
+      ),
+    );
+  }
+
   Widget _buildLoadingCard() {
     return Container(
       padding: const EdgeInsets.all(32),
@@ -952,6 +1008,8 @@ class _AccountDeletionPageState extends ConsumerState<AccountDeletionPage> {
     }
   }
 
+  /// Called once the deletion job has completed, never when it was only
+  /// accepted
   Future<void> _handleDeletionSuccess(UserDeletionResponse response) async {
     // Show success message
     ScaffoldMessenger.of(context).showSnackBar(
@@ -118,6 +118,12 @@ class UserDeletionNotifier extends StateNotifier<UserDeletionState> {
 
   UserDeletionNotifier(this._service) : super(const UserDeletionState());
 
+  /// How often a running deletion job is polled
+  static const Duration pollInterval = Duration(seconds: 2);
+
+  /// Consecutive failed polls before giving up on tracking the job
+  static const int maxPollFailures = 5;
+
   /// ⚠️ DANGER: Delete all user data permanently
   /// This operation cannot be undone!
   Future<void> deleteAllUserData({
@@ -137,20 +143,59 @@ class UserDeletionNotifier extends StateNotifier<UserDeletionState> {
       debugPrint('  - Email: $userEmail');
       debugPrint('  - Force delete: $forceDelete');
 
-      final response = await _service.deleteAllUserData(
+      var job = await _service.deleteAllUserData(
         userEmail: userEmail,
         forceDelete: forceDelete,
       );
 
-      state = state.copyWith(
-        deletionResponse: response,
-        isDeleting: false,
-        error: null,
-        deletionCompleted: true,
-      );
+      // The server only accepted the job; it is done once it completes
+      // or fails
+      var pollFailures = 0;
+      while (!job.isFinished) {
+        if (!mounted) return;
+        state = state.copyWith(deletionResponse: job, isDeleting: true);
+
+        await Future.delayed(pollInterval);
+        if (!mounted) return;
+
+        try {
+          job = await _service.getDeletionJob(job.jobId);
+          pollFailures = 0;
+        } catch (e) {
+          pollFailures++;
+          debugPrint(
+            '🚨 UserDeletionNotifier: Poll $pollFailures failed: $e',
+          );
+          if (pollFailures >= maxPollFailures) {
+            throw const DeletionException(
+              'Lost track of the deletion. It may still be running; '
+              'please check again later.',
+            );
+          }
+        }
+      }
+
+      if (!mounted) return;
+
+      if (job.isFailed) {
+        final reason = job.errors.isNotEmpty ? job.errors.first : job.message;
+        state = state.copyWith(
+          deletionResponse: job,
+          isDeleting: false,
+          error: 'Deletion failed and your data was not fully removed: $reason',
+          deletionCompleted: true,
+        );
+      } else {
+        state = state.copyWith(
+          deletionResponse: job,
+          isDeleting: false,
+          error: null,
+          deletionCompleted: true,
+        );
+      }
 
       debugPrint(
-        '🚨 UserDeletionNotifier: Deletion completed - Success: ${response.success}',
+        '🚨 UserDeletionNotifier: Deletion job ${job.jobId} ${job.status}',
       );
     } catch (e) {
       debugPrint('🚨 UserDeletionNotifier: Error during deletion: $e');
@@ -166,6 +211,7 @@ class UserDeletionNotifier extends StateNotifier<UserDeletionState> {
         errorMessage = e.message;
       }
 
+      if (!mounted) return;
       state = state.copyWith(
         isDeleting: false,
         error: errorMessage,
@@ -74,9 +74,16 @@ class DeletionSummary {
   }
 }
 
+/// A server-side deletion job, as returned when it is started and by each
+/// poll of its status URL
 class UserDeletionResponse {
   final bool success;
   final String message;
+  final String jobId;
+  final String status;
+  final String statusUrl;
+  final String? currentPhase;
+  final List<String> completedPhases;
   final Map<String, dynamic> deletedItems;
   final List<String> errors;
   final String timestamp;
@@ -85,14 +92,27 @@ class UserDeletionResponse {
   const UserDeletionResponse({
     required this.success,
     required this.message,
+    required this.jobId,
+    required this.status,
+    required this.statusUrl,
+    this.currentPhase,
+    this.completedPhases = const [],
     required this.deletedItems,
     required this.errors,
     required this.timestamp,
     this.summary,
   });
 
+  /// Phases the server runs, in order
+  static const int totalPhases = 5;
+
+  bool get isCompleted => status == 'completed';
+  bool get isFailed => status == 'failed';
+  bool get isFinished => isCompleted || isFailed;
+
   factory UserDeletionResponse.fromJson(Map<String, dynamic> json) {
-    final deletedItems = json['deleted_items'] as Map<String, dynamic>;
+    final deletedItems =
+        (json['deleted_items'] as Map<String, dynamic>?) ?? <String, dynamic>{};
     DeletionSummary? summary;
 
     if (deletedItems.containsKey('summary') &&
@@ -105,8 +125,15 @@ class UserDeletionResponse {
     return UserDeletionResponse(
       success: json['success'] as bool,
       message: json['message'] as String,
+      jobId: json['job_id'] as String,
+      status: json['status'] as String,
+      statusUrl: json['status_url'] as String,
+      currentPhase: json['current_phase'] as String?,
+      completedPhases: List<String>.from(
+        (json['completed_phases'] as List?) ?? const [],
+      ),
       deletedItems: deletedItems,
-      errors: List<String>.from(json['errors'] as List),
+      errors: List<String>.from((json['errors'] as List?) ?? const []),
       timestamp: json['timestamp'] as String,
       summary: summary,
     );
@@ -267,18 +294,13 @@ class DangerService {
         '🚨 DangerService: Received deletion response with status: ${response.statusCode}',
       );
 
-      if (response.statusCode == 200) {
+      // 202: the server accepted the deletion and runs it as a background
+      // job; nothing is deleted yet. Poll it with getDeletionJob.
+      if (response.statusCode == 200 || response.statusCode == 202) {
         final result = UserDeletionResponse.fromJson(response.data);
 
-        debugPrint('🚨 DangerService: User data deletion completed');
-        debugPrint('  - Success: ${result.success}');
-        debugPrint(
-          '  - Documents deleted: ${result.summary?.totalDocumentsDeleted ?? 0}',
-        );
-        debugPrint(
-          '  - Files deleted: ${result.summary?.totalFilesDeleted ?? 0}',
-        );
-        debugPrint('  - Errors: ${result.errors.length}');
+        debugPrint('🚨 DangerService: User data deletion accepted');
+        debugPrint('  - Job: ${result.jobId} (${result.status})');
 
         return result;
       } else {
@@ -317,6 +339,45 @@ class DangerService {
     }
   }
 
+  /// Current state of a deletion job started by [deleteAllUserData]
+  Future<UserDeletionResponse> getDeletionJob(String jobId) async {
+    try {
+      await _dioClient.initialize();
+
+      final response = await _dioClient.dio.get(
+        '/danger/user/deletion-jobs/$jobId',
+      );
+
+      if (response.statusCode == 200) {
+        final result = UserDeletionResponse.fromJson(response.data);
+        debugPrint(
+          'DangerService: Deletion job $jobId is ${result.status}'
+          ' (${result.currentPhase ?? '-'})',
+        );
+        return result;
+      } else {
+        throw DeletionException(
+          'Unexpected response status: ${response.statusCode}',
+          response.statusCode,
+        );
+      }
+    } on DioException catch (e) {
+      debugPrint(
+        'DangerService: DioException in getDeletionJob: ${e.message}',
+      );
+      if (e.response?.statusCode == 404) {
+        throw DeletionException('Deletion job not found', 404);
+      }
+      rethrow;
+    } catch (e) {
+      if (e is DeletionException) rethrow;
+      debugPrint('DangerService: Unexpected error in getDeletionJob: $e');
+      throw DeletionException(
+        'Failed to get deletion progress: ${e.toString()}',
+      );
+    }
+  }
+
   /// Check if the service is ready to make API calls
   Future<bool> isServiceReady() async {
     try {